@@ -1,14 +1,61 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from datetime import datetime
+
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
-from datetime import datetime
+
+from indicators import BarIndex, channels
+from resample import bucket_ends, resample_frame, timeframe_seconds
+
+
+class HigherTimeframeCache:
+    """Small LRU cache for resampled frames and indicators keyed by a data fingerprint."""
+    
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+    @staticmethod
+    def fingerprint(df: pd.DataFrame) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for column in ('time', 'open', 'high', 'low', 'close'):
+            digest.update(np.ascontiguousarray(df[column].to_numpy()).tobytes())
+        return digest.hexdigest()
+        
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+higher_timeframe_cache = HigherTimeframeCache()
 
 class AdvancedStrategies:
     
     @staticmethod
-    def bollinger_bands_strategy(df: pd.DataFrame, period: int = 20, std_dev: float = 2.0) -> pd.DataFrame:
-        df['BB_Middle'] = df['close'].rolling(window=period).mean()
-        df['BB_Std'] = df['close'].rolling(window=period).std()
+    def bollinger_bands_strategy(df: pd.DataFrame, period: int = 20, std_dev: float = 2.0,
+                                 index: Optional[BarIndex] = None) -> pd.DataFrame:
+        df['BB_Middle'] = index.sma(period) if index is not None else df['close'].rolling(window=period).mean()
+        df['BB_Std'] = index.std(period) if index is not None else df['close'].rolling(window=period).std()
         df['BB_Upper'] = df['BB_Middle'] + (df['BB_Std'] * std_dev)
         df['BB_Lower'] = df['BB_Middle'] - (df['BB_Std'] * std_dev)
         
@@ -37,9 +84,9 @@ class AdvancedStrategies:
     
     @staticmethod
     def stochastic_strategy(df: pd.DataFrame, k_period: int = 14, d_period: int = 3, 
-                           oversold: int = 20, overbought: int = 80) -> pd.DataFrame:
-        low_min = df['low'].rolling(window=k_period).min()
-        high_max = df['high'].rolling(window=k_period).max()
+                           oversold: int = 20, overbought: int = 80,
+                           index: Optional[BarIndex] = None) -> pd.DataFrame:
+        high_max, low_min = channels(df, [k_period], index)[k_period]
         
         df['Stoch_K'] = 100 * ((df['close'] - low_min) / (high_max - low_min))
         df['Stoch_D'] = df['Stoch_K'].rolling(window=d_period).mean()
@@ -53,20 +100,19 @@ class AdvancedStrategies:
     
     @staticmethod
     def ichimoku_strategy(df: pd.DataFrame, tenkan: int = 9, kijun: int = 26, 
-                         senkou_b: int = 52) -> pd.DataFrame:
-        high_tenkan = df['high'].rolling(window=tenkan).max()
-        low_tenkan = df['low'].rolling(window=tenkan).min()
+                         senkou_b: int = 52, index: Optional[BarIndex] = None) -> pd.DataFrame:
+        extremes = channels(df, [tenkan, kijun, senkou_b], index)
+        
+        high_tenkan, low_tenkan = extremes[tenkan]
         df['Tenkan_sen'] = (high_tenkan + low_tenkan) / 2
         
-        high_kijun = df['high'].rolling(window=kijun).max()
-        low_kijun = df['low'].rolling(window=kijun).min()
+        high_kijun, low_kijun = extremes[kijun]
         df['Kijun_sen'] = (high_kijun + low_kijun) / 2
         
         df['Senkou_span_A'] = ((df['Tenkan_sen'] + df['Kijun_sen']) / 2).shift(kijun)
         
-        high_senkou = df['high'].rolling(window=senkou_b).max()
-        low_senkou = df['low'].rolling(window=senkou_b).min()
-        df['Senkou_span_B'] = ((high_senkou + low_senkou) / 2).shift(kijun)
+        high_senkou, low_senkou = extremes[senkou_b]
+        df['Senkou_span_B'] = pd.Series((high_senkou + low_senkou) / 2, index=df.index).shift(kijun)
         
         df['Chikou_span'] = df['close'].shift(-kijun)
         
@@ -97,9 +143,9 @@ class AdvancedStrategies:
         return df
     
     @staticmethod
-    def fibonacci_retracement(df: pd.DataFrame, lookback: int = 50) -> pd.DataFrame:
-        rolling_max = df['high'].rolling(window=lookback).max()
-        rolling_min = df['low'].rolling(window=lookback).min()
+    def fibonacci_retracement(df: pd.DataFrame, lookback: int = 50,
+                              index: Optional[BarIndex] = None) -> pd.DataFrame:
+        rolling_max, rolling_min = channels(df, [lookback], index)[lookback]
         diff = rolling_max - rolling_min
         
         df['Fib_0'] = rolling_max
@@ -112,35 +158,138 @@ class AdvancedStrategies:
         
         return df
     
+    @staticmethod
+    def align_higher_timeframe(df: pd.DataFrame, df_htf: pd.DataFrame, columns: List[str],
+                               base_timeframe: str, htf_timeframe: str,
+                               session_offset: int = 0) -> pd.DataFrame:
+        """
+        Attach higher-timeframe columns to df with a sorted as-of join.
+
+        A higher-timeframe bar only becomes usable once it has closed, and a base
+        bar is acted on at its own close. Each base bar therefore receives the
+        values of the latest higher-timeframe bar that closed at or before the
+        base bar's close, which keeps the join free of lookahead.
+        """
+        base_close = df['time'] + pd.Timedelta(seconds=timeframe_seconds(base_timeframe))
+        htf_open = df_htf['time'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        htf_close = pd.to_datetime(bucket_ends(htf_open, htf_timeframe, session_offset), unit='s')
+        
+        left = pd.DataFrame({'available_at': base_close.to_numpy(dtype='datetime64[ns]')})
+        right = pd.DataFrame({'available_at': htf_close.to_numpy(dtype='datetime64[ns]')})
+        for column in columns:
+            right[column] = df_htf[column].to_numpy()
+        merged = pd.merge_asof(left, right, on='available_at', direction='backward')
+        
+        for column in columns:
+            df[column] = merged[column].to_numpy()
+        return df
+    
+    @staticmethod
+    def trend_direction(df: pd.DataFrame, ma_period: int) -> pd.Series:
+        """+1 above the moving average, -1 below it, 0 while the average is still warming up."""
+        ma = df['close'].rolling(window=ma_period).mean()
+        trend = np.where(df['close'] > ma, 1, -1)
+        trend[ma.isna().to_numpy()] = 0
+        return pd.Series(trend, index=df.index)
+    
+    @staticmethod
+    def _combine_trends(df: pd.DataFrame, trend_columns: List[str]) -> pd.DataFrame:
+        trends = df[trend_columns].fillna(0)
+        df['Signal'] = 0
+        df.loc[(trends == 1).all(axis=1), 'Signal'] = 1
+        df.loc[(trends == -1).all(axis=1), 'Signal'] = -1
+        df['Position'] = df['Signal'].diff()
+        return df
+    
     @staticmethod
     def multi_timeframe_trend(df_h1: pd.DataFrame, df_h4: pd.DataFrame, 
-                             df_d1: pd.DataFrame, ma_period: int = 50) -> pd.DataFrame:
+                             df_d1: pd.DataFrame, ma_period: int = 50,
+                             timeframes: Tuple[str, str, str] = ('H1', 'H4', 'D1')) -> pd.DataFrame:
+        base_tf, mid_tf, high_tf = timeframes
         df_h1['MA_H1'] = df_h1['close'].rolling(window=ma_period).mean()
-        df_h4['MA_H4'] = df_h4['close'].rolling(window=ma_period).mean()
-        df_d1['MA_D1'] = df_d1['close'].rolling(window=ma_period).mean()
+        df_h1['Trend_H1'] = AdvancedStrategies.trend_direction(df_h1, ma_period)
         
-        df_h1['Trend_H1'] = np.where(df_h1['close'] > df_h1['MA_H1'], 1, -1)
-        df_h4['Trend_H4'] = np.where(df_h4['close'] > df_h4['MA_H4'], 1, -1)
-        df_d1['Trend_D1'] = np.where(df_d1['close'] > df_d1['MA_D1'], 1, -1)
+        for df_htf, tf, name in ((df_h4, mid_tf, 'H4'), (df_d1, high_tf, 'D1')):
+            df_htf[f'MA_{name}'] = df_htf['close'].rolling(window=ma_period).mean()
+            df_htf[f'Trend_{name}'] = AdvancedStrategies.trend_direction(df_htf, ma_period)
+            AdvancedStrategies.align_higher_timeframe(df_h1, df_htf, [f'Trend_{name}'], base_tf, tf)
         
-        df_h1 = df_h1.merge(df_h4[['time', 'Trend_H4']], on='time', how='left')
-        df_h1 = df_h1.merge(df_d1[['time', 'Trend_D1']], on='time', how='left')
-        
-        df_h1['Trend_H4'] = df_h1['Trend_H4'].ffill()
-        df_h1['Trend_D1'] = df_h1['Trend_D1'].ffill()
-        
-        df_h1['Signal'] = 0
-        df_h1.loc[(df_h1['Trend_H1'] == 1) & (df_h1['Trend_H4'] == 1) & (df_h1['Trend_D1'] == 1), 'Signal'] = 1
-        df_h1.loc[(df_h1['Trend_H1'] == -1) & (df_h1['Trend_H4'] == -1) & (df_h1['Trend_D1'] == -1), 'Signal'] = -1
-        
-        df_h1['Position'] = df_h1['Signal'].diff()
-        return df_h1
+        return AdvancedStrategies._combine_trends(df_h1, ['Trend_H1', 'Trend_H4', 'Trend_D1'])
     
     @staticmethod
-    def volume_weighted_strategy(df: pd.DataFrame, period: int = 20) -> pd.DataFrame:
-        df['VWAP'] = (df['close'] * df['tick_volume']).rolling(window=period).sum() / df['tick_volume'].rolling(window=period).sum()
-        
-        df['Volume_MA'] = df['tick_volume'].rolling(window=period).mean()
+    def _higher_timeframe_trend_filter(df: pd.DataFrame, base_timeframe: str, higher_timeframes: List[str],
+                                       trend_for: Callable[[str], pd.DataFrame], ma_period: int,
+                                       session_offset: int) -> pd.DataFrame:
+        """Combine the base trend with each higher timeframe's 'time'/'Trend' frame from trend_for(tf)."""
+        df[f'MA_{base_timeframe}'] = df['close'].rolling(window=ma_period).mean()
+        df[f'Trend_{base_timeframe}'] = AdvancedStrategies.trend_direction(df, ma_period)
+        trend_columns = [f'Trend_{base_timeframe}']
+        
+        for tf in higher_timeframes:
+            column = f'Trend_{tf}'
+            AdvancedStrategies.align_higher_timeframe(
+                df, trend_for(tf).rename(columns={'Trend': column}), [column], base_timeframe, tf, session_offset
+            )
+            trend_columns.append(column)
+        
+        return AdvancedStrategies._combine_trends(df, trend_columns)
+    
+    @staticmethod
+    def multi_timeframe_from_base(df: pd.DataFrame, base_timeframe: str,
+                                  higher_timeframes: List[str], ma_period: int = 50,
+                                  session_offset: int = 0) -> pd.DataFrame:
+        """
+        Multi-timeframe trend filter served from a single base series.
+
+        Higher-timeframe bars are resampled locally from df and their trend is
+        cached per (data, timeframe, ma_period), so parameter sweeps and repeated
+        backtests over the same bars compute each one only once.
+        """
+        data_key = higher_timeframe_cache.fingerprint(df)
+        
+        def trend_for(tf):
+            df_htf = higher_timeframe_cache.get_or_compute(
+                (data_key, tf, session_offset),
+                lambda: resample_frame(df[['time', 'open', 'high', 'low', 'close']], tf, session_offset)
+            )
+            return higher_timeframe_cache.get_or_compute(
+                (data_key, tf, session_offset, ma_period),
+                lambda: pd.DataFrame({'time': df_htf['time'],
+                                      'Trend': AdvancedStrategies.trend_direction(df_htf, ma_period)})
+            )
+        
+        return AdvancedStrategies._higher_timeframe_trend_filter(
+            df, base_timeframe, higher_timeframes, trend_for, ma_period, session_offset
+        )
+    
+    @staticmethod
+    def multi_timeframe_from_frames(df: pd.DataFrame, base_timeframe: str,
+                                    higher_frames: Dict[str, pd.DataFrame], ma_period: int = 50,
+                                    session_offset: int = 0) -> pd.DataFrame:
+        """
+        Multi-timeframe trend filter over higher-timeframe bars fetched as such.
+
+        Live trading reads a few higher-timeframe bars from the terminal instead
+        of resampling a base history long enough to warm up the slowest one.
+        The still-forming bar of each frame closes in the future, so the as-of
+        join never hands it to a base bar.
+        """
+        return AdvancedStrategies._higher_timeframe_trend_filter(
+            df, base_timeframe, list(higher_frames),
+            lambda tf: pd.DataFrame({'time': higher_frames[tf]['time'],
+                                     'Trend': AdvancedStrategies.trend_direction(higher_frames[tf], ma_period)}),
+            ma_period, session_offset
+        )
+    
+    @staticmethod
+    def volume_weighted_strategy(df: pd.DataFrame, period: int = 20,
+                                 index: Optional[BarIndex] = None) -> pd.DataFrame:
+        if index is not None:
+            df['VWAP'] = index.vwap(period)
+            df['Volume_MA'] = index.volume_ma(period)
+        else:
+            df['VWAP'] = (df['close'] * df['tick_volume']).rolling(window=period).sum() / df['tick_volume'].rolling(window=period).sum()
+            df['Volume_MA'] = df['tick_volume'].rolling(window=period).mean()
         df['Volume_Ratio'] = df['tick_volume'] / df['Volume_MA']
         
         df['Signal'] = 0
@@ -151,11 +300,11 @@ class AdvancedStrategies:
         return df
     
     @staticmethod
-    def breakout_strategy(df: pd.DataFrame, lookback: int = 20, volume_threshold: float = 1.5) -> pd.DataFrame:
-        df['High_Max'] = df['high'].rolling(window=lookback).max()
-        df['Low_Min'] = df['low'].rolling(window=lookback).min()
+    def breakout_strategy(df: pd.DataFrame, lookback: int = 20, volume_threshold: float = 1.5,
+                          index: Optional[BarIndex] = None) -> pd.DataFrame:
+        df['High_Max'], df['Low_Min'] = channels(df, [lookback], index)[lookback]
         
-        df['Volume_MA'] = df['tick_volume'].rolling(window=lookback).mean()
+        df['Volume_MA'] = index.volume_ma(lookback) if index is not None else df['tick_volume'].rolling(window=lookback).mean()
         df['Volume_Ratio'] = df['tick_volume'] / df['Volume_MA']
         
         df['Signal'] = 0
@@ -166,9 +315,10 @@ class AdvancedStrategies:
         return df
     
     @staticmethod
-    def mean_reversion_strategy(df: pd.DataFrame, period: int = 20, std_threshold: float = 2.0) -> pd.DataFrame:
-        df['MA'] = df['close'].rolling(window=period).mean()
-        df['Std'] = df['close'].rolling(window=period).std()
+    def mean_reversion_strategy(df: pd.DataFrame, period: int = 20, std_threshold: float = 2.0,
+                                index: Optional[BarIndex] = None) -> pd.DataFrame:
+        df['MA'] = index.sma(period) if index is not None else df['close'].rolling(window=period).mean()
+        df['Std'] = index.std(period) if index is not None else df['close'].rolling(window=period).std()
         
         df['Z_Score'] = (df['close'] - df['MA']) / df['Std']
         
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Throughput and memory benchmarks for strategies, backtests and the optimizer.
+
+Every case runs on seeded synthetic H1 bars at each requested size. Wall time
+is the best of ``--repeat`` untraced runs; peak memory comes from one separate
+run under ``tracemalloc`` so tracing overhead never skews throughput.
+
+Results are compared against a JSON baseline and the run fails (exit code 1)
+when bars/sec drops or peak memory grows beyond the configured tolerances:
+
+    python benchmarks/bench.py                      # 10k, 100k and 1M bars
+    python benchmarks/bench.py --sizes 10000 --filter backtest
+    python benchmarks/bench.py --update-baseline    # record a new baseline
+
+Baselines are machine specific; record them on the machine that enforces them.
+CI uploads its run as ``bench-results.json``; turn that into the baseline with
+
+    python benchmarks/bench.py --record-from bench-results.json
+
+Peak memory depends on numpy/pandas internals, so it is only compared when the
+baseline was recorded with the same versions.
+"""
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from advanced_strategies import AdvancedStrategies, higher_timeframe_cache
+from ea_tester import EATester
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+OPTIMIZE_GRID = {'fast_period': [5, 10], 'slow_period': [20, 30]}
+
+
+def make_bars(n: int, seed: int = 42) -> pd.DataFrame:
+    """Seeded geometric random walk shaped like MT5 H1 rates."""
+    rng = np.random.default_rng(seed)
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    open_ = np.r_[1.1, close[:-1]]
+    wick = np.abs(rng.normal(0, 0.0005, (2, n)))
+    return pd.DataFrame({
+        'time': pd.date_range('2000-01-03', periods=n, freq='h'),
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + wick[0]),
+        'low': np.minimum(open_, close) * (1 - wick[1]),
+        'close': close,
+        'tick_volume': rng.integers(1, 1000, n).astype(np.uint64),
+        'spread': np.full(n, 10, dtype=np.int32),
+        'real_volume': np.zeros(n, dtype=np.uint64),
+    })
+
+
+class Case:
+    """One benchmark: ``prepare`` runs untimed, ``run`` is measured; ``work`` bars are processed per bar of input."""
+
+    def __init__(self, name: str, run: Callable[[Any], Any],
+                 prepare: Optional[Callable[[pd.DataFrame], Any]] = None, work: int = 1):
+        self.name = name
+        self.run = run
+        self.prepare = prepare or (lambda df: df.copy())
+        self.work = work
+
+
+def _multi_timeframe(df: pd.DataFrame):
+    higher_timeframe_cache.clear()
+    return AdvancedStrategies.multi_timeframe_from_base(df, 'H1', ['H4', 'D1'])
+
+
+def _signals(df: pd.DataFrame) -> pd.DataFrame:
+    return EATester().run_strategy(df, 'simple_ma_crossover', {})
+
+
+def build_cases() -> List[Case]:
+    tester = EATester()
+    cases = [
+        Case('strategy.bollinger_bands', AdvancedStrategies.bollinger_bands_strategy),
+        Case('strategy.macd', AdvancedStrategies.macd_strategy),
+        Case('strategy.stochastic', AdvancedStrategies.stochastic_strategy),
+        Case('strategy.ichimoku', AdvancedStrategies.ichimoku_strategy),
+        Case('strategy.atr_trailing_stop', AdvancedStrategies.atr_trailing_stop),
+        Case('strategy.fibonacci_retracement', AdvancedStrategies.fibonacci_retracement),
+        Case('strategy.multi_timeframe_trend', _multi_timeframe),
+        Case('strategy.volume_weighted', AdvancedStrategies.volume_weighted_strategy),
+        Case('strategy.breakout', AdvancedStrategies.breakout_strategy),
+        Case('strategy.mean_reversion', AdvancedStrategies.mean_reversion_strategy),
+    ]
+    for name in ('bollinger_bands', 'macd', 'stochastic', 'ichimoku', 'vwap', 'breakout', 'mean_reversion',
+                 'multi_timeframe_trend', 'simple_ma_crossover', 'rsi'):
+        cases.append(Case(f'run_strategy.{name}', lambda df, name=name: tester.run_strategy(df, name, {}),
+                          prepare=lambda df: df))
+    cases.append(Case('backtest', tester.backtest, prepare=_signals))
+    evaluations = int(np.prod([len(v) for v in OPTIMIZE_GRID.values()]))
+    cases.append(Case('optimize', lambda df: tester.optimize_parameters(df, 'simple_ma_crossover', OPTIMIZE_GRID),
+                      prepare=lambda df: df, work=evaluations))
+    return cases
+
+
+def measure(case: Case, df: pd.DataFrame, repeat: int, trace_memory: bool = True) -> Dict[str, Any]:
+    timings = []
+    for _ in range(repeat):
+        data = case.prepare(df)
+        gc.collect()
+        start = time.perf_counter()
+        case.run(data)
+        timings.append(time.perf_counter() - start)
+
+    peak = None
+    if trace_memory:
+        data = case.prepare(df)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            case.run(data)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    seconds = min(timings)
+    return {
+        'bars': len(df),
+        'seconds': round(seconds, 6),
+        'bars_per_sec': round(len(df) * case.work / seconds, 1) if seconds > 0 else float('inf'),
+        'peak_mb': round(peak / 2 ** 20, 3) if peak is not None else None,
+    }
+
+
+def run_benchmarks(sizes: List[int], pattern: str = '*', repeat: Optional[int] = None,
+                   trace_memory: bool = True, log: Optional[Callable[[str], None]] = None) -> Dict[str, Dict[str, Any]]:
+    log = log or (lambda line: print(line, flush=True))
+    cases = [case for case in build_cases() if fnmatch.fnmatch(case.name, pattern)]
+    results = {}
+    for size in sizes:
+        df = make_bars(size)
+        # Slow cases at large sizes are dominated by real work, one run is enough
+        runs = repeat or (3 if size <= 100_000 else 1)
+        for case in cases:
+            key = f'{case.name}@{size}'
+            results[key] = measure(case, df, runs, trace_memory)
+            r = results[key]
+            memory = f"{r['peak_mb']:10.1f} MB" if r['peak_mb'] is not None else ''
+            log(f"{key:<42} {r['seconds']:10.4f} s {r['bars_per_sec']:14,.0f} bars/s {memory}")
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            throughput_tolerance: float = 0.2, memory_tolerance: float = 0.2,
+            memory_slack_mb: float = 1.0, check_memory: bool = True) -> List[str]:
+    """Regressions of ``results`` against ``baseline``; cases missing from either side are ignored."""
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        floor = reference['bars_per_sec'] * (1 - throughput_tolerance)
+        if current['bars_per_sec'] < floor:
+            regressions.append(
+                f"{key}: throughput {current['bars_per_sec']:,.0f} bars/s is below "
+                f"{floor:,.0f} (baseline {reference['bars_per_sec']:,.0f})"
+            )
+        if check_memory and current.get('peak_mb') is not None and reference.get('peak_mb') is not None:
+            ceiling = reference['peak_mb'] * (1 + memory_tolerance) + memory_slack_mb
+            if current['peak_mb'] > ceiling:
+                regressions.append(
+                    f"{key}: peak memory {current['peak_mb']:.1f} MB is above "
+                    f"{ceiling:.1f} MB (baseline {reference['peak_mb']:.1f} MB)"
+                )
+    return regressions
+
+
+def environment() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+    }
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def same_libraries(recorded: Optional[Dict[str, str]], current: Dict[str, str]) -> bool:
+    """True when numpy and pandas match, i.e. peak memory figures are comparable."""
+    return bool(recorded) and all(recorded.get(name) == current[name] for name in ('numpy', 'pandas'))
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]], recorded_in: Optional[Dict[str, str]] = None):
+    existing = load_baseline(path) or {}
+    # Results from another environment replace the baseline instead of mixing with it
+    if recorded_in is not None and existing.get('environment') != recorded_in:
+        existing = {}
+    merged = {**existing.get('results', {}), **results}
+    with open(path, 'w') as f:
+        json.dump({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'environment': recorded_in or environment(),
+            'results': dict(sorted(merged.items())),
+        }, f, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--filter', default='*', help='glob over case names, e.g. "strategy.*"')
+    parser.add_argument('--repeat', type=int, default=None, help='timed runs per case (best is kept)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='write results into the baseline')
+    parser.add_argument('--record-from', help='write the baseline from a saved --output file instead of running')
+    parser.add_argument('--output', help='also write this run\'s results to a JSON file')
+    parser.add_argument('--throughput-tolerance', type=float, default=0.2,
+                        help='allowed relative drop in bars/sec (default 0.2)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.2,
+                        help='allowed relative growth in peak memory (default 0.2)')
+    args = parser.parse_args(argv)
+
+    if args.record_from:
+        with open(args.record_from) as f:
+            recorded = json.load(f)
+        save_baseline(args.baseline, recorded['results'], recorded_in=recorded['environment'])
+        print(f"Baseline recorded from {args.record_from}: {args.baseline}")
+        return 0
+
+    results = run_benchmarks(args.sizes, args.filter, args.repeat, not args.no_memory)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        # A gate without a baseline would pass every run
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 1
+    if baseline.get('environment') != environment():
+        print("Warning: baseline was recorded in a different environment", baseline.get('environment'))
+    check_memory = same_libraries(baseline.get('environment'), environment())
+    if not check_memory:
+        print("Skipping peak memory checks: the baseline used other numpy/pandas versions")
+
+    regressions = compare(results, baseline['results'], args.throughput_tolerance, args.memory_tolerance,
+                          check_memory=check_memory)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Compact in-memory representation of MT5 rate arrays.
+
+MT5 returns 60 bytes per bar: int64 time, float64 OHLC, uint64 tick and real
+volume, int32 spread. :class:`CompactBars` stores the same bars in 32 bytes:
+
+- time as one int64 base plus int32 second offsets;
+- prices as int32 ticks (``price * 10**digits``) or as float32;
+- volumes as uint32 whenever they fit (they are kept as-is otherwise).
+
+Tick mode is lossless. ``digits`` is inferred as the smallest number of
+decimals whose decoding reproduces every price bit for bit, and the encoder
+falls back to float32 when no such scale exists or the ticks would overflow
+int32. float32 keeps about 7 significant digits, which is enough for FX but
+not exact. Callers always get float64 back (``to_rates``/``column``), so
+indicators keep computing in double precision.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+PRICE_MODES = ('ticks', 'float32')
+MAX_DIGITS = 8
+
+_INT32_MAX = np.iinfo(np.int32).max
+_UINT32_MAX = np.iinfo(np.uint32).max
+
+
+def _encode_ticks(prices: Dict[str, np.ndarray]):
+    """(digits, {field: int32 ticks}) for the smallest exact scale, or None."""
+    for digits in range(MAX_DIGITS + 1):
+        scale = 10.0 ** digits
+        encoded = {}
+        for field, values in prices.items():
+            scaled = np.rint(values * scale)
+            if (len(scaled) and np.abs(scaled).max() > _INT32_MAX) or not np.array_equal(scaled / scale, values):
+                break
+            encoded[field] = scaled.astype(np.int32)
+        else:
+            return digits, encoded
+    return None
+
+
+class CompactBars:
+    def __init__(self, dtype: np.dtype, time_base: int, columns: Dict[str, np.ndarray], digits: Optional[int]):
+        self.dtype = dtype
+        self.time_base = time_base
+        self.columns = columns
+        # None means prices are stored as float32
+        self.digits = digits
+
+    @classmethod
+    def from_rates(cls, rates: np.ndarray, prices: str = 'ticks') -> "CompactBars":
+        if prices not in PRICE_MODES:
+            raise ValueError(f"prices must be one of {PRICE_MODES}")
+        rates = np.asarray(rates)
+        columns = {}
+        time_base = int(rates['time'][0]) if len(rates) else 0
+        offsets = rates['time'].astype(np.int64) - time_base
+        fits = not len(offsets) or (offsets.min() >= np.iinfo(np.int32).min and offsets.max() <= _INT32_MAX)
+        columns['time'] = offsets.astype(np.int32) if fits else offsets
+
+        price_fields = [name for name in rates.dtype.names if name in PRICE_FIELDS]
+        digits = None
+        if prices == 'ticks':
+            encoded = _encode_ticks({name: rates[name].astype(np.float64) for name in price_fields})
+            if encoded is not None:
+                digits, ticks = encoded
+                columns.update(ticks)
+        if digits is None:
+            columns.update({name: rates[name].astype(np.float32) for name in price_fields})
+
+        for name in rates.dtype.names:
+            if name in columns:
+                continue
+            values = rates[name]
+            if values.dtype.kind == 'u' and values.dtype.itemsize > 4 and (not len(values) or values.max() <= _UINT32_MAX):
+                values = values.astype(np.uint32)
+            columns[name] = np.ascontiguousarray(values)
+        return cls(rates.dtype, time_base, columns, digits)
+
+    @property
+    def price_mode(self) -> str:
+        return 'float32' if self.digits is None else 'ticks'
+
+    def __len__(self) -> int:
+        return len(self.columns['time'])
+
+    def __getitem__(self, key: slice) -> "CompactBars":
+        if not isinstance(key, slice):
+            raise TypeError("CompactBars only supports slicing")
+        return CompactBars(self.dtype, self.time_base, {name: values[key] for name, values in self.columns.items()},
+                           self.digits)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.columns.values())
+
+    @property
+    def time(self) -> np.ndarray:
+        return self.columns['time'].astype(np.int64) + self.time_base
+
+    def searchsorted(self, epoch: int, side: str = 'left') -> int:
+        """Position of ``epoch`` (seconds) in the time column, without decoding it."""
+        offset = epoch - self.time_base
+        offsets = self.columns['time']
+        if offsets.dtype == np.int32:
+            # Clamp so the comparison stays in int32 range
+            offset = min(max(offset, np.iinfo(np.int32).min), _INT32_MAX)
+        return int(np.searchsorted(offsets, offset, side=side))
+
+    def column(self, name: str) -> np.ndarray:
+        """One column decoded to its MT5 dtype (float64 prices, int64 time, uint64 volumes)."""
+        if name == 'time':
+            return self.time
+        values = self.columns[name]
+        if name in PRICE_FIELDS:
+            if self.digits is None:
+                return values.astype(np.float64)
+            return values.astype(np.float64) / (10.0 ** self.digits)
+        return values.astype(self.dtype[name])
+
+    def to_rates(self) -> np.ndarray:
+        """Decode back into an MT5 structured rates array."""
+        rates = np.empty(len(self), dtype=self.dtype)
+        for name in self.dtype.names:
+            rates[name] = self.column(name)
+        return rates
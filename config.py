@@ -12,7 +12,57 @@ class Settings(BaseSettings):
     MT5_SERVER: Optional[str] = None
     MT5_PATH: Optional[str] = None
     
+    # "terminal" uses the MetaTrader5 package (stubbed where unavailable), "simulator" the local mt5_sim backend
+    MT5_BACKEND: str = "terminal"
+    MT5_SIM_SEED: int = 42
+    MT5_SIM_BALANCE: float = 10000.0
+    MT5_SIM_LATENCY_MS: float = 0.0
+    # ISO timestamp freezing the simulator clock (advanced explicitly); wall clock when unset
+    MT5_SIM_START_TIME: Optional[str] = None
+    
     LOG_LEVEL: str = "INFO"
+    METRICS_ENABLED: bool = True
+    # Terminal calls from batch endpoints run on one worker thread; calls beyond this many pending get 429
+    MT5_WORKER_QUEUE_SIZE: int = 1024
+    ORDER_BATCH_MAX_ORDERS: int = 100
+    # Cadence of the shared account/positions/orders snapshot; 0 makes every read call MT5 directly
+    SNAPSHOT_POLL_INTERVAL_MS: float = 1000.0
+    # How long /api/v1/symbols reuses one symbols_get() call
+    SYMBOL_CATALOG_TTL_SECONDS: float = 300.0
+    # Local SQLite copy of the deal history, pulled incrementally; empty path disables it, interval 0 syncs only on ?sync=true
+    DEALS_STORE_PATH: Optional[str] = ".cache/deals.sqlite3"
+    DEALS_SYNC_INTERVAL_MS: float = 5000.0
+    # Connection supervisor: probe cadence and timeout, then reconnect backoff doubling up to the max; 0 interval disables it
+    MT5_PROBE_INTERVAL_MS: float = 5000.0
+    MT5_PROBE_TIMEOUT_MS: float = 5000.0
+    MT5_RECONNECT_BACKOFF_MS: float = 1000.0
+    MT5_RECONNECT_MAX_BACKOFF_MS: float = 60000.0
+    # Admin-only endpoints (request profiling) are disabled while unset
+    ADMIN_API_KEY: Optional[str] = None
+    PROFILER_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILER_MAX_PROFILES: int = 20
+    
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_SIZE: int = 16
+    JOB_HISTORY_SIZE: int = 100
+    PORTFOLIO_WORKERS: int = 4
+    MONTE_CARLO_MAX_PATHS: int = 100000
+    
+    BACKTEST_CACHE_ENABLED: bool = True
+    BACKTEST_CACHE_DIR: str = ".cache/backtests"
+    BACKTEST_CACHE_MAX_MB: int = 512
+    
+    # Derive higher timeframes locally from one cached base series (e.g. "M1" or "M5")
+    RESAMPLE_BASE_TIMEFRAME: Optional[str] = None
+    RESAMPLE_SESSION_OFFSET_MINUTES: int = 0
+    RESAMPLE_CACHE_SYMBOLS: int = 32
+    # 'ticks' (lossless int32) or 'float32' to hold cached bars in ~half the memory; off when unset
+    RESAMPLE_CACHE_COMPACT: Optional[str] = None
+    
+    # JSON file of per-symbol contract specs, so offline backtests size P&L like the live terminal
+    SYMBOL_SPECS_FILE: Optional[str] = None
+    # Reload a cached spec once it is this old; tick_value of cross-currency symbols moves with FX rates
+    SYMBOL_SPECS_TTL_SECONDS: Optional[float] = 3600.0
     
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, extra="ignore")
 
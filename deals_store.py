@@ -0,0 +1,286 @@
+"""
+Local SQLite copy of the account's deal history.
+
+:class:`DealsSync` pulls only the deals newer than the stored watermark from
+``history_deals_get`` on every cycle, so it repeats a small overlap window
+rather than the whole history. :class:`DealsStore` keeps the deals in a table
+indexed by time, symbol, magic and position. Filtered, keyset-paginated
+queries and P&L aggregations per magic, symbol or day then run locally
+without touching the terminal.
+
+Times are MT5 server-time epoch seconds (``time``) and milliseconds
+(``time_msc``). Naive datetimes passed in are read as server time, as they
+are for bars. Pages are ordered by ``(time_msc, ticket)``, and a cursor is
+the last row's pair, so a page stays stable while new deals arrive.
+"""
+import asyncio
+import calendar
+import functools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('ticket', 'order', 'time', 'time_msc', 'type', 'entry', 'magic', 'position_id', 'reason', 'volume',
+           'price', 'commission', 'swap', 'profit', 'fee', 'symbol', 'comment', 'external_id')
+GROUPS = {
+    'magic': 'magic',
+    'symbol': 'symbol',
+    'day': "date(time, 'unixepoch')",
+}
+# Deals are re-read this far behind the watermark in case the server stamps a late fill slightly earlier
+SYNC_OVERLAP_SECONDS = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deals (
+    ticket INTEGER PRIMARY KEY,
+    "order" INTEGER,
+    time INTEGER NOT NULL,
+    time_msc INTEGER NOT NULL,
+    type INTEGER,
+    entry INTEGER,
+    magic INTEGER,
+    position_id INTEGER,
+    reason INTEGER,
+    volume REAL,
+    price REAL,
+    commission REAL,
+    swap REAL,
+    profit REAL,
+    fee REAL,
+    symbol TEXT,
+    comment TEXT,
+    external_id TEXT
+);
+CREATE INDEX IF NOT EXISTS deals_time ON deals (time_msc, ticket);
+CREATE INDEX IF NOT EXISTS deals_symbol_time ON deals (symbol, time_msc, ticket);
+CREATE INDEX IF NOT EXISTS deals_magic_time ON deals (magic, time_msc, ticket);
+CREATE INDEX IF NOT EXISTS deals_position ON deals (position_id);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value INTEGER);
+"""
+
+
+def to_epoch(value) -> Optional[int]:
+    """Epoch seconds for a datetime (naive values are taken as server time); None passes through."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if value.tzinfo is not None:
+        return calendar.timegm(value.utctimetuple())
+    return calendar.timegm(value.timetuple())
+
+
+def _datetime(epoch: float) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).replace(tzinfo=None)
+
+
+def encode_cursor(time_msc: int, ticket: int) -> str:
+    return f"{time_msc}:{ticket}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        time_msc, ticket = cursor.split(':')
+        return int(time_msc), int(ticket)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def query_deals(deals: Iterable[Any], symbol: Optional[str] = None, magic: Optional[int] = None,
+                position: Optional[int] = None, limit: int = 1000, cursor: Optional[str] = None,
+                prefix: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """:meth:`DealsStore.query` over deals straight from ``history_deals_get``, for when there is no store yet."""
+    if fields is not None and any(field not in COLUMNS for field in fields):
+        raise ValueError(f"Unknown fields: {', '.join(f for f in fields if f not in COLUMNS)}")
+    after = decode_cursor(cursor) if cursor else None
+    rows = sorted((deal._asdict() for deal in deals), key=lambda row: (row['time_msc'], row['ticket']))
+    rows = [row for row in rows
+            if (symbol is None or row['symbol'] == symbol)
+            and (not prefix or row['symbol'].startswith(prefix))
+            and (magic is None or row['magic'] == magic)
+            and (position is None or row['position_id'] == position)
+            and (after is None or (row['time_msc'], row['ticket']) > after)]
+    next_cursor = encode_cursor(rows[limit - 1]['time_msc'], rows[limit - 1]['ticket']) if len(rows) > limit else None
+    page = rows[:limit]
+    deals = page if fields is None else [{field: row[field] for field in fields} for row in page]
+    return {'data': deals, 'count': len(deals), 'next_cursor': next_cursor}
+
+
+class DealsStore:
+    def __init__(self, path: str):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM deals').fetchone()[0]
+
+    @property
+    def watermark(self) -> Optional[int]:
+        """Server time (epoch seconds) up to which the history has been synced; None before the first sync."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = 'watermark'").fetchone()
+        return row[0] if row else None
+
+    def upsert(self, deals: Iterable[Dict[str, Any]], watermark: Optional[int] = None) -> int:
+        """Insert or replace deals (dicts with COLUMNS keys) and advance the watermark atomically."""
+        rows = [tuple(deal.get(column) for column in COLUMNS) for deal in deals]
+        placeholders = ', '.join('?' * len(COLUMNS))
+        names = ', '.join(f'"{column}"' for column in COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(f'INSERT OR REPLACE INTO deals ({names}) VALUES ({placeholders})', rows)
+            if watermark is not None:
+                self._conn.execute(
+                    "INSERT INTO sync_state (key, value) VALUES ('watermark', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = max(value, excluded.value)", (watermark,))
+        return len(rows)
+
+    @staticmethod
+    def _where(start: Optional[int], end: Optional[int], symbol: Optional[str], magic: Optional[int],
+               position: Optional[int], prefix: Optional[str] = None) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if start is not None:
+            clauses.append('time_msc >= ?')
+            params.append(start * 1000)
+        if end is not None:
+            clauses.append('time_msc < ?')
+            params.append((end + 1) * 1000)
+        if symbol is not None:
+            clauses.append('symbol = ?')
+            params.append(symbol)
+        if prefix:
+            # A range rather than LIKE, so the symbol index applies
+            clauses.append('symbol >= ? AND symbol < ?')
+            params.extend((prefix, prefix + '\U0010ffff'))
+        if magic is not None:
+            clauses.append('magic = ?')
+            params.append(magic)
+        if position is not None:
+            clauses.append('position_id = ?')
+            params.append(position)
+        return ' AND '.join(clauses) or '1', params
+
+    def query(self, start=None, end=None, symbol: Optional[str] = None, magic: Optional[int] = None,
+              position: Optional[int] = None, limit: int = 1000, cursor: Optional[str] = None,
+              prefix: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """One page of deals in (time_msc, ticket) order, optionally only ``fields``; next_cursor is None on the last page."""
+        if fields is not None and any(field not in COLUMNS for field in fields):
+            raise ValueError(f"Unknown fields: {', '.join(f for f in fields if f not in COLUMNS)}")
+        where, params = self._where(to_epoch(start), to_epoch(end), symbol, magic, position, prefix)
+        if cursor:
+            where += ' AND (time_msc, ticket) > (?, ?)'
+            params.extend(decode_cursor(cursor))
+        selected = list(fields) if fields is not None else list(COLUMNS)
+        # The cursor needs the sort key even when the client did not ask for it
+        extra = [column for column in ('time_msc', 'ticket') if column not in selected]
+        names = ', '.join(f'"{column}"' for column in selected + extra)
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT {names} FROM deals WHERE {where} ORDER BY time_msc, ticket LIMIT ?', params + [limit + 1]
+            ).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1]['time_msc'], rows[limit - 1]['ticket']) if len(rows) > limit else None
+        deals = [{column: row[column] for column in selected} for row in rows[:limit]]
+        return {'data': deals, 'count': len(deals), 'next_cursor': next_cursor}
+
+    def aggregate(self, group_by: str = 'magic', start=None, end=None, symbol: Optional[str] = None,
+                  magic: Optional[int] = None, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Deal count, volume and P&L components per magic, symbol or server-time day."""
+        if group_by not in GROUPS:
+            raise ValueError(f"group_by must be one of {sorted(GROUPS)}")
+        key = GROUPS[group_by]
+        where, params = self._where(to_epoch(start), to_epoch(end), symbol, magic, None, prefix)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT {key} AS key, COUNT(*) AS deals, SUM(volume) AS volume, SUM(profit) AS profit,
+                           SUM(commission) AS commission, SUM(swap) AS swap, SUM(fee) AS fee,
+                           SUM(profit + commission + swap + fee) AS net
+                    FROM deals WHERE {where} GROUP BY {key} ORDER BY {key}""", params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+class DealsSync:
+    def __init__(self, store: DealsStore, fetch: Callable[[datetime, datetime], Any], interval: float = 5.0,
+                 runner: Optional[Callable[..., Awaitable[Any]]] = None,
+                 history_start: datetime = datetime(2000, 1, 1)):
+        """fetch is history_deals_get; runner executes it (e.g. on the MT5 worker thread), inline by default."""
+        self.store = store
+        self.fetch = fetch
+        self.interval = interval
+        self.runner = runner
+        self.history_start = history_start
+        self.syncs = 0
+        self.last_sync: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._sync_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def sync_now(self) -> int:
+        """Pull deals from just behind the watermark up to now; returns how many were written."""
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
+        async with self._sync_lock:
+            watermark = self.store.watermark
+            date_from = self.history_start if watermark is None else _datetime(max(watermark - SYNC_OVERLAP_SECONDS, 0))
+            # Server time can run ahead of local time by a few hours
+            date_to = _datetime(time.time()) + timedelta(days=1)
+            if self.runner is None:
+                deals = self.fetch(date_from, date_to)
+            else:
+                deals = await self.runner(self.fetch, date_from, date_to)
+            if deals is None:
+                raise RuntimeError("history_deals_get returned no data")
+            rows = [deal._asdict() for deal in deals]
+            new_watermark = max([row['time'] for row in rows], default=watermark)
+            loop = asyncio.get_running_loop()
+            written = await loop.run_in_executor(None, functools.partial(self.store.upsert, rows, new_watermark))
+            if new_watermark is None:
+                # Empty history: start the next cycle from the requested start
+                await loop.run_in_executor(None, functools.partial(self.store.upsert, [], to_epoch(date_from)))
+            self.syncs += 1
+            self.last_sync = time.time()
+            return written
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync_now()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.last_error != str(e):
+                    logger.warning(f"Deals sync failed: {e}")
+                self.last_error = str(e)
+            await asyncio.sleep(self.interval)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -79,12 +79,43 @@ except ImportError:
     mt5 = MetaTrader5Mock()
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Callable
 import logging
+import time
+
+import metrics
+from resample import infer_timeframe
+from indicators import BarIndex
+from leaderboard import Leaderboard, ParetoFront
+from risk_metrics import batch_risk_metrics, metrics_row, periods_per_year
+from symbol_specs import SymbolSpec
+from signals import LEAN_STRATEGIES, bar_arrays, strategy_signals
+from timings import NULL_TIMER
 
 logger = logging.getLogger(__name__)
 
+# Memory cap for one batch of optimizer equity curves scored together
+RISK_BATCH_BYTES = 32 * 1024 * 1024
+
+
+def _trade_time(value) -> str:
+    """Trade entry/exit time as str(Timestamp), e.g. '2024-01-01 09:00:00'."""
+    if isinstance(value, np.datetime64):
+        return str(pd.Timestamp(value))
+    return str(value)
+
+
+def _format_timestamps(times: np.ndarray) -> List[str]:
+    """Equity-curve timestamps: ISO format for datetimes, str() for anything else."""
+    if np.issubdtype(times.dtype, np.datetime64):
+        seconds = times.astype('datetime64[s]')
+        if (seconds == times).all():
+            return np.datetime_as_string(seconds, unit='s').tolist()
+        return [pd.Timestamp(t).isoformat() for t in times]
+    return [t.isoformat() if isinstance(t, datetime) else str(t) for t in times.tolist()]
+
+
 class EATester:
     def __init__(self):
         self.results = []
@@ -122,32 +153,49 @@ class EATester:
         
         return df
     
-    def simple_ma_crossover_strategy(self, df: pd.DataFrame, fast_period: int = 10, slow_period: int = 20) -> pd.DataFrame:
+    def simple_ma_crossover_strategy(self, df: pd.DataFrame, fast_period: int = 10, slow_period: int = 20,
+                                     index: Optional[BarIndex] = None) -> pd.DataFrame:
         df = df.copy()
-        df['Fast_MA'] = df['close'].rolling(window=fast_period).mean()
-        df['Slow_MA'] = df['close'].rolling(window=slow_period).mean()
+        if index is not None:
+            df['Fast_MA'] = index.sma(fast_period)
+            df['Slow_MA'] = index.sma(slow_period)
+        else:
+            df['Fast_MA'] = df['close'].rolling(window=fast_period).mean()
+            df['Slow_MA'] = df['close'].rolling(window=slow_period).mean()
         
         df['signal'] = 0
         df.loc[df['Fast_MA'] > df['Slow_MA'], 'signal'] = 1
         df.loc[df['Fast_MA'] < df['Slow_MA'], 'signal'] = -1
         return df
     
-    def rsi_strategy(self, df: pd.DataFrame, rsi_period: int = 14, oversold: int = 30, overbought: int = 70) -> pd.DataFrame:
+    def rsi_strategy(self, df: pd.DataFrame, rsi_period: int = 14, oversold: int = 30, overbought: int = 70,
+                     index: Optional[BarIndex] = None) -> pd.DataFrame:
         df = df.copy()
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=rsi_period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period).mean()
-        rs = gain / (loss + 1e-9)
-        df['RSI'] = 100 - (100 / (1 + rs))
+        if index is not None:
+            df['RSI'] = index.rsi(rsi_period)
+        else:
+            delta = df['close'].diff()
+            gain = (delta.where(delta > 0, 0)).rolling(window=rsi_period).mean()
+            loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period).mean()
+            rs = gain / (loss + 1e-9)
+            df['RSI'] = 100 - (100 / (1 + rs))
         
         df['signal'] = 0
         df.loc[df['RSI'] < oversold, 'signal'] = 1
         df.loc[df['RSI'] > overbought, 'signal'] = -1
         return df
     
-    def run_strategy(self, df: pd.DataFrame, strategy_name: str, strategy_params: Dict) -> pd.DataFrame:
+    def run_strategy(self, df: pd.DataFrame, strategy_name: str, strategy_params: Dict,
+                     index: Optional[BarIndex] = None) -> pd.DataFrame:
+        """
+        Apply a named strategy. index, a BarIndex built from the same bars, lets
+        window-based strategies skip recomputing rolling statistics.
+        """
         from advanced_strategies import AdvancedStrategies
         
+        if index is not None and len(index) != len(df):
+            raise ValueError(f"BarIndex covers {len(index)} bars but the frame has {len(df)}")
+        
         # Make a copy and normalize columns to lowercase
         df_copy = df.copy()
         df_copy.columns = [c.lower() for c in df_copy.columns]
@@ -155,7 +203,7 @@ class EATester:
         if strategy_name == 'bollinger_bands':
             period = int(strategy_params.get('period', 20))
             std_dev = float(strategy_params.get('std_dev', 2.0))
-            res = AdvancedStrategies.bollinger_bands_strategy(df_copy, period, std_dev)
+            res = AdvancedStrategies.bollinger_bands_strategy(df_copy, period, std_dev, index=index)
         elif strategy_name == 'macd':
             fast = int(strategy_params.get('fast', 12))
             slow = int(strategy_params.get('slow', 26))
@@ -166,32 +214,40 @@ class EATester:
             d_period = int(strategy_params.get('d_period', 3))
             oversold = int(strategy_params.get('oversold', 20))
             overbought = int(strategy_params.get('overbought', 80))
-            res = AdvancedStrategies.stochastic_strategy(df_copy, k_period, d_period, oversold, overbought)
+            res = AdvancedStrategies.stochastic_strategy(df_copy, k_period, d_period, oversold, overbought, index=index)
         elif strategy_name == 'ichimoku':
             tenkan = int(strategy_params.get('tenkan', 9))
             kijun = int(strategy_params.get('kijun', 26))
             senkou_b = int(strategy_params.get('senkou_b', 52))
-            res = AdvancedStrategies.ichimoku_strategy(df_copy, tenkan, kijun, senkou_b)
+            res = AdvancedStrategies.ichimoku_strategy(df_copy, tenkan, kijun, senkou_b, index=index)
         elif strategy_name == 'vwap':
             period = int(strategy_params.get('period', 20))
-            res = AdvancedStrategies.volume_weighted_strategy(df_copy, period)
+            res = AdvancedStrategies.volume_weighted_strategy(df_copy, period, index=index)
         elif strategy_name == 'breakout':
             lookback = int(strategy_params.get('lookback', 20))
             volume_threshold = float(strategy_params.get('volume_threshold', 1.5))
-            res = AdvancedStrategies.breakout_strategy(df_copy, lookback, volume_threshold)
+            res = AdvancedStrategies.breakout_strategy(df_copy, lookback, volume_threshold, index=index)
         elif strategy_name == 'mean_reversion':
             period = int(strategy_params.get('period', 20))
             std_threshold = float(strategy_params.get('std_threshold', 2.0))
-            res = AdvancedStrategies.mean_reversion_strategy(df_copy, period, std_threshold)
+            res = AdvancedStrategies.mean_reversion_strategy(df_copy, period, std_threshold, index=index)
+        elif strategy_name == 'multi_timeframe_trend':
+            ma_period = int(strategy_params.get('ma_period', 50))
+            base_timeframe = strategy_params.get('base_timeframe') or infer_timeframe(df_copy['time'])
+            higher_timeframes = list(strategy_params.get('higher_timeframes', ['H4', 'D1']))
+            session_offset = int(strategy_params.get('session_offset_minutes', 0)) * 60
+            res = AdvancedStrategies.multi_timeframe_from_base(
+                df_copy, base_timeframe, higher_timeframes, ma_period, session_offset
+            )
         elif strategy_name == 'simple_ma_crossover':
             fast = int(strategy_params.get('fast_period', 10))
             slow = int(strategy_params.get('slow_period', 20))
-            res = self.simple_ma_crossover_strategy(df_copy, fast, slow)
+            res = self.simple_ma_crossover_strategy(df_copy, fast, slow, index=index)
         elif strategy_name == 'rsi':
             rsi_period = int(strategy_params.get('rsi_period', 14))
             oversold = int(strategy_params.get('oversold', 30))
             overbought = int(strategy_params.get('overbought', 70))
-            res = self.rsi_strategy(df_copy, rsi_period, oversold, overbought)
+            res = self.rsi_strategy(df_copy, rsi_period, oversold, overbought, index=index)
         else:
             raise ValueError(f"Unknown strategy name: {strategy_name}")
             
@@ -200,45 +256,95 @@ class EATester:
             res['signal'] = res['Signal']
         return res
         
+    def signals(self, df: pd.DataFrame, strategy_name: str, strategy_params: Dict,
+                index: Optional[BarIndex] = None, bars: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """
+        int8 signal array for a strategy, without building its indicator frame.
+
+        Uses the lean NumPy implementation when one exists and falls back to
+        run_strategy() otherwise. bars, from signals.bar_arrays(df), can be
+        passed to skip re-extracting the columns on every call.
+        """
+        if strategy_name in LEAN_STRATEGIES:
+            return strategy_signals(strategy_name, bars if bars is not None else bar_arrays(df),
+                                    strategy_params, index=index)
+        res = self.run_strategy(df, strategy_name, strategy_params, index=index)
+        return res['signal'].fillna(0).to_numpy(dtype=np.int8)
+    
     def backtest(self, df: pd.DataFrame, initial_balance: float = 10000.0, 
                  lot_size: float = 0.1, stop_loss_pips: float = 0.0, 
-                 take_profit_pips: float = 0.0, exit_on_opposite_signal: bool = True) -> Dict[str, Any]:
+                 take_profit_pips: float = 0.0, exit_on_opposite_signal: bool = True,
+                 progress_callback: Optional[Callable[[float], None]] = None,
+                 timer=NULL_TIMER, spec: Optional[SymbolSpec] = None) -> Dict[str, Any]:
+        """Backtest a strategy frame; reads its time, close, high, low and signal columns (any case)."""
+        # First column of each lower-cased name wins, so a 'Signal'/'signal' pair reads 'Signal'
+        positions = {}
+        for position, column in enumerate(df.columns):
+            positions.setdefault(str(column).lower(), position)
+        
+        def column(name):
+            return df.iloc[:, positions[name]].to_numpy() if name in positions else None
+        
+        if 'signal' in positions:
+            signal = df.iloc[:, positions['signal']].fillna(0).astype(int).to_numpy()
+        else:
+            signal = np.zeros(len(df), dtype=int)
+        
+        return self.backtest_arrays(
+            column('time'), column('close'), signal, high=column('high'), low=column('low'),
+            initial_balance=initial_balance, lot_size=lot_size, stop_loss_pips=stop_loss_pips,
+            take_profit_pips=take_profit_pips, exit_on_opposite_signal=exit_on_opposite_signal,
+            progress_callback=progress_callback, timer=timer, spec=spec
+        )
+    
+    def backtest_arrays(self, times: np.ndarray, close: np.ndarray, signal: np.ndarray,
+                        high: Optional[np.ndarray] = None, low: Optional[np.ndarray] = None,
+                        initial_balance: float = 10000.0, lot_size: float = 0.1,
+                        stop_loss_pips: float = 0.0, take_profit_pips: float = 0.0,
+                        exit_on_opposite_signal: bool = True,
+                        progress_callback: Optional[Callable[[float], None]] = None,
+                        timer=NULL_TIMER, risk: bool = True,
+                        spec: Optional[SymbolSpec] = None) -> Dict[str, Any]:
+        """
+        Simulation core shared by backtest() and the lean optimizer path.
+
+        Takes plain arrays (signal as produced by signals.strategy_signals) and
+        iterates over Python lists, which is far cheaper than indexing a frame
+        row by row. Missing high/low fall back to close. risk=False skips the
+        per-curve risk_metrics for callers that score many curves in one batch.
+        spec, the symbol's SymbolSpec, sets the pip size and P&L per price move.
+        """
+        started = time.perf_counter()
+        n = len(close)
+        timer.start('simulation', bars=n)
         balance = initial_balance
         trades = []
         open_position = None
         
-        # Ensure column names are lowercase
-        df = df.copy()
-        df.columns = [c.lower() for c in df.columns]
-        
-        # Default signal handling (fill na with 0)
-        if 'signal' not in df.columns:
-            df['signal'] = 0
-        df['signal'] = df['signal'].fillna(0).astype(int)
+        closes = np.asarray(close, dtype=np.float64).tolist()
+        highs = closes if high is None else np.asarray(high, dtype=np.float64).tolist()
+        lows = closes if low is None else np.asarray(low, dtype=np.float64).tolist()
+        signals = np.asarray(signal).tolist()
+        times = np.asarray(times)
         
         equity_curve = []
-        timestamps = []
-        
-        # Multiplier depending on symbol
-        pip_size = 0.0001
-        contract_size = 100000.0
-        
-        # Simple heuristic to identify currency scale (e.g. JPY, Gold, Cryptos)
-        if len(df) > 0:
-            first_close = df.iloc[0]['close']
-            if first_close > 1000:  # Gold, BTC, etc.
-                pip_size = 0.1
-                contract_size = 100.0  # Gold standard contract
-            elif first_close > 50:  # USDJPY, etc.
-                pip_size = 0.01
-                contract_size = 1000.0
+        
+        # Pip size and P&L per lot per 1.0 price move; guessed from the price level when the symbol is unknown
+        if spec is None:
+            spec = SymbolSpec.guess(closes[0] if n > 0 else 0.0)
+        pip_size = spec.pip_size
+        price_value = spec.price_value
+        
+        # Report progress roughly every 1% of bars to keep callback overhead low
+        progress_step = max(1, n // 100)
                 
-        for i in range(len(df)):
-            row = df.iloc[i]
-            current_price = row['close']
-            current_high = row.get('high', current_price)
-            current_low = row.get('low', current_price)
-            current_time = row['time']
+        for i in range(n):
+            if progress_callback is not None and i % progress_step == 0:
+                progress_callback(i / n)
+            current_price = closes[i]
+            current_high = highs[i]
+            current_low = lows[i]
+            current_signal = signals[i]
             
             # Check open position first
             if open_position:
@@ -260,7 +366,7 @@ class EATester:
                         exit_price = tp
                         exit_reason = "TP"
                         closed = True
-                    elif exit_on_opposite_signal and (row['signal'] == -1 or row['signal'] == 0):
+                    elif exit_on_opposite_signal and (current_signal == -1 or current_signal == 0):
                         exit_price = current_price
                         exit_reason = "Signal"
                         closed = True
@@ -274,24 +380,26 @@ class EATester:
                         exit_price = tp
                         exit_reason = "TP"
                         closed = True
-                    elif exit_on_opposite_signal and (row['signal'] == 1 or row['signal'] == 0):
+                    elif exit_on_opposite_signal and (current_signal == 1 or current_signal == 0):
                         exit_price = current_price
                         exit_reason = "Signal"
                         closed = True
                 
                 if closed:
                     if pos_type == 'BUY':
-                        profit = (exit_price - entry_price) * contract_size * lot_size
+                        profit = (exit_price - entry_price) * price_value * lot_size
                     else:
-                        profit = (entry_price - exit_price) * contract_size * lot_size
+                        profit = (entry_price - exit_price) * price_value * lot_size
                         
                     balance += profit
                     trades.append({
                         'type': pos_type,
                         'entry_price': float(entry_price),
                         'exit_price': float(exit_price),
-                        'entry_time': str(open_position['entry_time']),
-                        'exit_time': str(current_time),
+                        'entry_time': _trade_time(times[open_position['entry_index']]),
+                        'exit_time': _trade_time(times[i]),
+                        'entry_index': open_position['entry_index'],
+                        'exit_index': i,
                         'profit': float(profit),
                         'balance': float(balance),
                         'reason': exit_reason
@@ -300,28 +408,27 @@ class EATester:
             
             # Open position if signal changed and we have no active position
             if not open_position and i > 0:
-                prev_signal = df.iloc[i-1]['signal']
-                curr_signal = row['signal']
+                prev_signal = signals[i - 1]
                 
                 # Check for new active signal
-                if curr_signal == 1 and prev_signal != 1:
+                if current_signal == 1 and prev_signal != 1:
                     sl = current_price - (stop_loss_pips * pip_size) if stop_loss_pips > 0 else None
                     tp = current_price + (take_profit_pips * pip_size) if take_profit_pips > 0 else None
                     open_position = {
                         'type': 'BUY',
                         'entry_price': current_price,
-                        'entry_time': current_time,
+                        'entry_index': i,
                         'lot_size': lot_size,
                         'sl': sl,
                         'tp': tp
                     }
-                elif curr_signal == -1 and prev_signal != -1:
+                elif current_signal == -1 and prev_signal != -1:
                     sl = current_price + (stop_loss_pips * pip_size) if stop_loss_pips > 0 else None
                     tp = current_price - (take_profit_pips * pip_size) if take_profit_pips > 0 else None
                     open_position = {
                         'type': 'SELL',
                         'entry_price': current_price,
-                        'entry_time': current_time,
+                        'entry_index': i,
                         'lot_size': lot_size,
                         'sl': sl,
                         'tp': tp
@@ -333,18 +440,29 @@ class EATester:
                 pos_type = open_position['type']
                 entry_price = open_position['entry_price']
                 if pos_type == 'BUY':
-                    current_equity += (current_price - entry_price) * contract_size * lot_size
+                    current_equity += (current_price - entry_price) * price_value * lot_size
                 else:
-                    current_equity += (entry_price - current_price) * contract_size * lot_size
+                    current_equity += (entry_price - current_price) * price_value * lot_size
             
             equity_curve.append(float(current_equity))
-            if isinstance(current_time, datetime):
-                timestamps.append(current_time.isoformat())
-            else:
-                timestamps.append(str(current_time))
+        
+        timestamps = _format_timestamps(times)
+        
+        elapsed = time.perf_counter() - started
+        metrics.BACKTEST_BARS.inc(n)
+        metrics.BACKTEST_DURATION.observe(elapsed)
+        if elapsed > 0:
+            metrics.BACKTEST_BARS_PER_SECOND.set(n / elapsed)
                 
         # Calculate final stats
+        timer.start('statistics', bars=n)
+        risk_summary = None
+        if risk and n > 1:
+            risk_summary = metrics_row(batch_risk_metrics(
+                np.array(equity_curve), periods_per_year=periods_per_year(times)
+            ), 0)
         if len(trades) == 0:
+            timer.stop()
             return {
                 'initial_balance': float(initial_balance),
                 'final_balance': float(balance),
@@ -358,23 +476,28 @@ class EATester:
                 'max_drawdown': 0.0,
                 'trades': [],
                 'equity_curve': equity_curve,
-                'timestamps': timestamps
+                'timestamps': timestamps,
+                'risk_metrics': risk_summary
             }
             
-        trades_df = pd.DataFrame(trades)
-        winning_trades = int(len(trades_df[trades_df['profit'] > 0]))
-        losing_trades = int(len(trades_df[trades_df['profit'] < 0]))
-        total_profit = float(trades_df[trades_df['profit'] > 0]['profit'].sum() if winning_trades > 0 else 0)
-        total_loss = float(abs(trades_df[trades_df['profit'] < 0]['profit'].sum()) if losing_trades > 0 else 0)
+        profits = np.array([trade['profit'] for trade in trades])
+        winning_trades = int((profits > 0).sum())
+        losing_trades = int((profits < 0).sum())
+        total_profit = float(profits[profits > 0].sum())
+        total_loss = float(abs(profits[profits < 0].sum()))
         
         profit_factor = total_profit / total_loss if total_loss > 0 else float('inf')
         if profit_factor == float('inf'):
             profit_factor = 99.9  # Clean representation for JSON
             
-        equity_series = pd.Series(equity_curve)
-        running_max = equity_series.expanding().max()
-        drawdown = (equity_series - running_max) / running_max * 100
-        max_drawdown = float(abs(drawdown.min())) if not drawdown.empty else 0.0
+        equity = np.array(equity_curve)
+        running_max = np.maximum.accumulate(equity)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = (equity - running_max) / running_max * 100
+        # NaN where the running max is 0 is skipped, as Series.min() does
+        drawdown = drawdown[~np.isnan(drawdown)]
+        max_drawdown = float(abs(drawdown.min())) if len(drawdown) else float('nan')
+        timer.stop()
         
         return {
             'initial_balance': float(initial_balance),
@@ -389,37 +512,117 @@ class EATester:
             'max_drawdown': max_drawdown,
             'trades': trades,
             'equity_curve': equity_curve,
-            'timestamps': timestamps
+            'timestamps': timestamps,
+            'risk_metrics': risk_summary
         }
     
     def optimize_parameters(self, df: pd.DataFrame, strategy_name: str,
-                           param_ranges: Dict[str, Any]) -> Dict[str, Any]:
+                           param_ranges: Dict[str, Any],
+                           progress_callback: Optional[Callable[[float], None]] = None,
+                           timer=NULL_TIMER, index: Optional[BarIndex] = None,
+                           objective: str = 'final_balance', top_k: Optional[int] = None,
+                           keep_results: int = 1,
+                           pareto_objectives: Optional[List[str]] = None,
+                           spec: Optional[SymbolSpec] = None) -> Dict[str, Any]:
         """
         Optimizes a strategy's parameters over a given DataFrame.
         param_ranges expects keys matching the strategy's parameters with a list of values to search.
+        progress_callback, if given, is called with the completed fraction after each permutation.
+        timer, a timings.PhaseTimer, accumulates signal/simulation/statistics time across permutations.
+        index, a BarIndex over df, is built once here when not supplied and shared by every permutation.
+        Permutations run on the lean path: NumPy signals straight into backtest_arrays, no frame copies.
+        Every candidate's equity curve is scored with batch_risk_metrics, a chunk of curves at a time.
+        
+        Candidates are ranked by objective (a leaderboard.OBJECTIVES name); 'candidates' holds the best
+        top_k summaries (all of them when None), best first. Only summaries are kept during the sweep: the
+        full backtests of the best keep_results candidates are replayed at the end into 'top_results',
+        the first of which is 'best_result'. pareto_objectives, e.g. ['total_return', 'max_drawdown'],
+        adds the non-dominated candidates of the same sweep as 'pareto_front'.
         """
         import itertools
         
         keys, values = zip(*param_ranges.items())
         permutations = [dict(zip(keys, v)) for v in itertools.product(*values)]
         
-        best_result = None
-        best_params = None
-        best_profit = float('-inf')
+        board = Leaderboard(objective, top_k)
+        front = ParetoFront(pareto_objectives) if pareto_objectives else None
+        if keep_results < 0:
+            raise ValueError("keep_results must not be negative")
+        pending = []
+        started = time.perf_counter()
         
-        for params in permutations:
+        with timer.phase('index', bars=len(df)):
+            bars = bar_arrays(df)
+            if index is None:
+                index = BarIndex(bars)
+        annual_periods = periods_per_year(bars.get('time'))
+        chunk_rows = max(1, RISK_BATCH_BYTES // (8 * max(len(df), 1)))
+        
+        def run(params, timer=timer):
+            with timer.phase(f'signals:{strategy_name}', bars=len(df)):
+                signal = self.signals(df, strategy_name, params, index=index, bars=bars)
+            return self.backtest_arrays(
+                bars.get('time'), bars['close'], signal, high=bars.get('high'), low=bars.get('low'),
+                timer=timer, risk=False, spec=spec
+            )
+        
+        def score_pending():
+            with timer.phase('risk_metrics', bars=len(df) * len(pending)):
+                batch = None
+                if len(df) > 1:
+                    batch = batch_risk_metrics(np.array([curve for _, curve in pending]),
+                                               periods_per_year=annual_periods)
+                for row, (candidate, _) in enumerate(pending):
+                    candidate['risk_metrics'] = None if batch is None else metrics_row(batch, row)
+                    board.push(candidate)
+                    if front is not None:
+                        front.push(candidate)
+            pending.clear()
+        
+        for done, params in enumerate(permutations, start=1):
             try:
-                test_df = self.run_strategy(df, strategy_name, params)
-                result = self.backtest(test_df)
-                
-                if result['final_balance'] > best_profit:
-                    best_profit = result['final_balance']
-                    best_result = result
-                    best_params = params
+                result = run(params)
+                candidate = {
+                    'params': params,
+                    'final_balance': result['final_balance'],
+                    'total_trades': result['total_trades'],
+                    'win_rate': result['win_rate'],
+                    'profit_factor': result['profit_factor'],
+                }
+                pending.append((candidate, result['equity_curve']))
+                if len(pending) >= chunk_rows:
+                    score_pending()
             except Exception as e:
                 logger.error(f"Error evaluating params {params} for {strategy_name}: {e}")
-                
-        return {
-            'best_params': best_params,
-            'best_result': best_result
+            
+            metrics.OPTIMIZER_EVALUATIONS.inc()
+            if progress_callback is not None:
+                progress_callback(done / len(permutations))
+        
+        if pending:
+            score_pending()
+        
+        elapsed = time.perf_counter() - started
+        if elapsed > 0:
+            metrics.OPTIMIZER_EVALUATIONS_PER_SECOND.set(len(permutations) / elapsed)
+        
+        ranked = board.ranked()
+        top_results = []
+        with timer.phase('replay', bars=len(df) * min(keep_results, len(ranked))):
+            for candidate in ranked[:keep_results]:
+                # Deterministic replay, so only the summaries had to be held during the sweep
+                result = run(candidate['params'], timer=NULL_TIMER)
+                result['risk_metrics'] = candidate['risk_metrics']
+                top_results.append(result)
+        
+        optimization = {
+            'objective': objective,
+            'best_params': ranked[0]['params'] if ranked else None,
+            'best_result': top_results[0] if top_results else None,
+            'top_results': top_results,
+            'candidates': ranked
         }
+        if front is not None:
+            optimization['pareto_objectives'] = list(pareto_objectives)
+            optimization['pareto_front'] = front.ranked()
+        return optimization
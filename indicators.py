@@ -0,0 +1,189 @@
+"""
+Shared indicator primitives.
+
+``rolling_extremes`` gives the highest high and lowest low for several window
+lengths in one call. Channel-style strategies (stochastic, ichimoku,
+breakout, fibonacci) use it instead of separate pandas
+``rolling().max()``/``.min()`` passes.
+
+The extremes are built by doubling. Level ``k`` holds the extreme of every
+``2**k``-bar span and is one vectorised ``maximum``/``minimum`` of the
+previous level against itself, shifted. A window of ``w`` bars is the
+combination of two overlapping spans of the largest power of two not above
+``w``. Windows are processed in ascending order, so every requested length
+reuses the same levels, and only the current level is kept in memory.
+
+That is O(n log w) element operations, all inside NumPy. It beats both
+pandas' per-window C loops and a Python-level monotonic deque.
+
+Results match pandas exactly, including NaN handling: a window ending before
+the ``window``-th bar, or containing a NaN, yields NaN.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+def _rolling_extreme(values: np.ndarray, windows: Iterable[int], ufunc: np.ufunc) -> Dict[int, np.ndarray]:
+    n = len(values)
+    result = {}
+    level, span = values, 1  # level[i] is the extreme of values[i:i + span]
+    for window in sorted(set(windows)):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        out = np.full(n, np.nan)
+        if window <= n:
+            while span * 2 <= window:
+                level = ufunc(level[:-span], level[span:])
+                span *= 2
+            # Window ending at i = span starting at i - window + 1 combined with span ending at i
+            out[window - 1:] = ufunc(level[:n - window + 1], level[window - span:n - span + 1])
+        result[window] = out
+    return result
+
+
+def rolling_max(values, window: int) -> np.ndarray:
+    """Maximum over the trailing ``window`` values; same result as ``Series.rolling(window).max()``."""
+    return _rolling_extreme(np.asarray(values, dtype=np.float64), [window], np.maximum)[window]
+
+
+def rolling_min(values, window: int) -> np.ndarray:
+    """Minimum over the trailing ``window`` values; same result as ``Series.rolling(window).min()``."""
+    return _rolling_extreme(np.asarray(values, dtype=np.float64), [window], np.minimum)[window]
+
+
+def rolling_extremes(high, low, windows: Iterable[int]) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Highest high and lowest low for each window length.
+
+    Returns ``{window: (highest_high, lowest_low)}`` as float64 arrays the
+    length of the input.
+    """
+    windows = list(windows)
+    highest = _rolling_extreme(np.asarray(high, dtype=np.float64), windows, np.maximum)
+    lowest = _rolling_extreme(np.asarray(low, dtype=np.float64), windows, np.minimum)
+    return {window: (highest[window], lowest[window]) for window in highest}
+
+
+def channels(df, windows: Iterable[int], index: Optional["BarIndex"] = None) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """``rolling_extremes`` of ``df``'s high/low, served from ``index`` when one is given."""
+    if index is not None:
+        return index.channels(windows)
+    return rolling_extremes(df['high'], df['low'], windows)
+
+
+class BarIndex:
+    """
+    Precomputed per-dataset index answering rolling queries for any window.
+
+    Prefix sums of close, close², tick volume, close·volume and the RSI
+    gain/loss series turn every rolling sum into a single vectorised
+    difference. Sparse-table levels of high/low (extended lazily, up to the
+    largest window asked for) turn every channel query into one combine. A
+    parameter sweep builds the index once per fetched dataset and then pays
+    O(n) per window length, independent of the window.
+
+    Close is centred on its first value before summing, so flat prices give
+    an exact zero deviation. Means agree with pandas to ~1e-14 relative; the
+    standard deviation agrees to within ~1e-8 absolute, which only shows for
+    near-constant windows. Windows containing a NaN yield NaN, as pandas
+    rolling does.
+    """
+
+    def __init__(self, df):
+        # Any column mapping works: a DataFrame or signals.bar_arrays() output
+        columns = {str(c).lower(): c for c in df.keys()}
+        close = np.asarray(df[columns['close']], dtype=np.float64)
+        self.length = len(close)
+        finite = close[np.isfinite(close)]
+        self.shift = float(finite[0]) if len(finite) else 0.0
+        centred = close - self.shift
+
+        delta = np.diff(close, prepend=np.nan)
+        # Matches delta.where(delta > 0, 0): NaN differences count as 0
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+
+        self._sums = {'close': centred, 'close_sq': centred * centred, 'gain': gain, 'loss': loss}
+        if 'tick_volume' in columns:
+            volume = np.asarray(df[columns['tick_volume']], dtype=np.float64)
+            self._sums['volume'] = volume
+            self._sums['close_volume'] = close * volume
+        self._nans = {}
+        for name, values in self._sums.items():
+            missing = np.isnan(values)
+            if missing.any():
+                self._nans[name] = np.concatenate(([0], np.cumsum(missing)))
+                values = np.where(missing, 0.0, values)
+            self._sums[name] = np.concatenate(([0.0], np.cumsum(values)))
+
+        self._levels = {
+            'high': [np.asarray(df[columns['high']], dtype=np.float64)],
+            'low': [np.asarray(df[columns['low']], dtype=np.float64)],
+        }
+
+    def __len__(self) -> int:
+        return self.length
+
+    def window_sum(self, name: str, window: int) -> np.ndarray:
+        """Rolling sum of one indexed series; NaN until ``window`` values are available."""
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if name not in self._sums:
+            raise KeyError(f"BarIndex has no series '{name}'")
+        out = np.full(self.length, np.nan)
+        if window <= self.length:
+            prefix = self._sums[name]
+            out[window - 1:] = prefix[window:] - prefix[:-window]
+            nans = self._nans.get(name)
+            if nans is not None:
+                out[window - 1:][nans[window:] - nans[:-window] > 0] = np.nan
+        return out
+
+    def sma(self, window: int) -> np.ndarray:
+        return self.window_sum('close', window) / window + self.shift
+
+    def std(self, window: int) -> np.ndarray:
+        """Sample standard deviation (ddof=1) of close, like ``rolling().std()``."""
+        if window == 1:
+            return np.full(self.length, np.nan)
+        total = self.window_sum('close', window)
+        variance = (self.window_sum('close_sq', window) - total * total / window) / (window - 1)
+        return np.sqrt(np.maximum(variance, 0.0))
+
+    def volume_ma(self, window: int) -> np.ndarray:
+        return self.window_sum('volume', window) / window
+
+    def vwap(self, window: int) -> np.ndarray:
+        return self.window_sum('close_volume', window) / self.window_sum('volume', window)
+
+    def rsi(self, window: int, epsilon: float = 1e-9) -> np.ndarray:
+        """RSI from simple averages of gains and losses, as ``EATester.rsi_strategy`` computes it."""
+        gain = self.window_sum('gain', window) / window
+        loss = self.window_sum('loss', window) / window
+        return 100 - (100 / (1 + gain / (loss + epsilon)))
+
+    def _extreme(self, side: str, window: int) -> np.ndarray:
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        out = np.full(self.length, np.nan)
+        if window > self.length:
+            return out
+        levels = self._levels[side]
+        ufunc = np.maximum if side == 'high' else np.minimum
+        k = window.bit_length() - 1
+        while len(levels) <= k:
+            span = 1 << (len(levels) - 1)
+            levels.append(ufunc(levels[-1][:-span], levels[-1][span:]))
+        level, span = levels[k], 1 << k
+        out[window - 1:] = ufunc(level[:self.length - window + 1], level[window - span:self.length - span + 1])
+        return out
+
+    def highest(self, window: int) -> np.ndarray:
+        return self._extreme('high', window)
+
+    def lowest(self, window: int) -> np.ndarray:
+        return self._extreme('low', window)
+
+    def channels(self, windows: Iterable[int]) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        return {window: (self.highest(window), self.lowest(window)) for window in windows}
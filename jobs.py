@@ -0,0 +1,351 @@
+"""
+Background job queue for backtest and optimization runs.
+
+Long simulations are executed in a worker process pool instead of inside the
+request handler, so they neither block the API event loop nor run into client
+or proxy timeouts. Clients submit a job, poll its status and progress, and
+fetch the result once it has completed.
+"""
+import logging
+import multiprocessing
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ea_tester import EATester
+from symbol_specs import SymbolSpec
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobQueueFull(Exception):
+    """Raised when the bounded job queue cannot accept another submission."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+
+# Shared state handed to every worker process by the pool initializer
+_worker_progress = None
+_worker_cancelled = None
+
+
+def _init_worker(progress, cancelled):
+    global _worker_progress, _worker_cancelled
+    _worker_progress = progress
+    _worker_cancelled = cancelled
+
+
+def _progress_reporter(job_id: str) -> Callable[[float], None]:
+    """Build a progress callback that publishes progress and honours cancellation."""
+    def report(fraction: float):
+        if _worker_cancelled is not None and _worker_cancelled.get(job_id):
+            raise JobCancelled(f"Job {job_id} was cancelled")
+        if _worker_progress is not None:
+            _worker_progress[job_id] = round(fraction * 100, 1)
+    return report
+
+
+def _rates_to_frame(rates: np.ndarray) -> pd.DataFrame:
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df
+
+
+def _spec(params: Dict[str, Any]) -> Optional[SymbolSpec]:
+    spec = params.get('symbol_spec')
+    return SymbolSpec.from_dict(spec) if spec else None
+
+
+def run_backtest_job(job_id: str, rates: np.ndarray, params: Dict[str, Any]) -> Dict[str, Any]:
+    report = _progress_reporter(job_id)
+    tester = EATester()
+    df = _rates_to_frame(rates)
+    df_processed = tester.run_strategy(df, params['strategy_name'], params['strategy_params'])
+    return tester.backtest(
+        df_processed,
+        initial_balance=params['initial_balance'],
+        lot_size=params['lot_size'],
+        stop_loss_pips=params['stop_loss_pips'],
+        take_profit_pips=params['take_profit_pips'],
+        exit_on_opposite_signal=params['exit_on_opposite_signal'],
+        progress_callback=report,
+        spec=_spec(params)
+    )
+
+
+def run_optimize_job(job_id: str, rates: np.ndarray, params: Dict[str, Any]) -> Dict[str, Any]:
+    report = _progress_reporter(job_id)
+    tester = EATester()
+    df = _rates_to_frame(rates)
+    return tester.optimize_parameters(
+        df,
+        strategy_name=params['strategy_name'],
+        param_ranges=params['param_ranges'],
+        progress_callback=report,
+        objective=params.get('objective', 'final_balance'),
+        top_k=params.get('top_k'),
+        keep_results=params.get('keep_results', 1),
+        pareto_objectives=params.get('pareto_objectives'),
+        spec=_spec(params)
+    )
+
+
+JOB_RUNNERS = {
+    'backtest': run_backtest_job,
+    'optimize': run_optimize_job,
+}
+
+
+class Job:
+    def __init__(self, kind: str, rates: np.ndarray, params: Dict[str, Any], cache_key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.cache_key = cache_key
+        self.rates = rates
+        self.bars = len(rates) if rates is not None else None
+        self.status = JobStatus.QUEUED
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.future = None
+        self.submitted_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+    def to_dict(self, queue_position: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status.value,
+            'progress': self.progress,
+            'queue_position': queue_position,
+            'strategy_name': self.params.get('strategy_name'),
+            'bars': self.bars,
+            'submitted_at': self.submitted_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'error': self.error,
+        }
+
+
+class JobManager:
+    """
+    Bounded job queue in front of a process pool.
+
+    At most ``max_workers`` jobs run at once; up to ``max_queue`` further jobs
+    wait in FIFO order and expose their queue position. Finished jobs are kept
+    for result retrieval until ``max_history`` newer ones have completed.
+    ``on_complete``, if given, is called with each successfully completed job.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 16, max_history: int = 100,
+                 on_complete: Optional[Callable[[Job], None]] = None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_history = max_history
+        self.on_complete = on_complete
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending = deque()
+        self._running = set()
+        self._lock = threading.RLock()
+        self._executor = None
+        self._manager = None
+        self._progress = None
+        self._cancelled = None
+
+    def _ensure_pool(self):
+        # Spawned workers match the Windows behaviour MT5 deployments rely on
+        # and avoid forking a parent that already runs threads.
+        if self._executor is None:
+            ctx = multiprocessing.get_context("spawn")
+            if self._manager is None:
+                self._manager = ctx.Manager()
+                self._progress = self._manager.dict()
+                self._cancelled = self._manager.dict()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(self._progress, self._cancelled)
+            )
+
+    def submit(self, kind: str, rates: np.ndarray, params: Dict[str, Any],
+               cache_key: Optional[str] = None) -> Job:
+        if kind not in JOB_RUNNERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with self._lock:
+            if len(self._pending) >= self.max_queue:
+                raise JobQueueFull(f"Job queue is full ({self.max_queue} jobs waiting)")
+            job = Job(kind, rates, params, cache_key=cache_key)
+            self._jobs[job.id] = job
+            self._pending.append(job.id)
+            self._dispatch()
+            return job
+
+    def add_completed(self, kind: str, params: Dict[str, Any], result: Dict[str, Any],
+                      bars: Optional[int] = None) -> Job:
+        """Record a job whose result is already known, e.g. served from the backtest cache."""
+        with self._lock:
+            job = Job(kind, None, params)
+            job.bars = bars
+            job.result = result
+            job.started_at = job.submitted_at
+            self._jobs[job.id] = job
+            self._finish(job, JobStatus.COMPLETED)
+            return job
+
+    def _dispatch(self):
+        with self._lock:
+            while self._pending and len(self._running) < self.max_workers:
+                job = self._jobs[self._pending.popleft()]
+                self._ensure_pool()
+                job.status = JobStatus.RUNNING
+                job.started_at = datetime.now()
+                self._running.add(job.id)
+                try:
+                    job.future = self._executor.submit(JOB_RUNNERS[job.kind], job.id, job.rates, job.params)
+                except BrokenProcessPool as e:
+                    self._executor = None
+                    self._finish(job, JobStatus.FAILED, error=f"Worker pool unavailable: {e}")
+                    continue
+                job.future.add_done_callback(lambda fut, job_id=job.id: self._on_done(job_id, fut))
+
+    def _on_done(self, job_id: str, future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return
+            try:
+                job.result = future.result()
+                self._finish(job, JobStatus.COMPLETED)
+                if self.on_complete is not None:
+                    try:
+                        self.on_complete(job)
+                    except Exception as e:
+                        logger.warning(f"Job {job_id} completion hook failed: {e}")
+            except (JobCancelled, CancelledError):
+                self._finish(job, JobStatus.CANCELLED)
+            except BrokenProcessPool as e:
+                self._executor = None
+                self._finish(job, JobStatus.FAILED, error=f"Worker process died: {e}")
+            except Exception as e:
+                logger.error(f"Job {job_id} ({job.kind}) failed: {e}")
+                self._finish(job, JobStatus.FAILED, error=str(e))
+            self._dispatch()
+
+    def _finish(self, job: Job, status: JobStatus, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        job.finished_at = datetime.now()
+        job.rates = None  # Release the input bars as soon as they are no longer needed
+        if status == JobStatus.COMPLETED:
+            job.progress = 100.0
+        self._running.discard(job.id)
+        if self._progress is not None:
+            self._progress.pop(job.id, None)
+            self._cancelled.pop(job.id, None)
+        self._prune_history()
+
+    def _prune_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def _refresh_progress(self, job: Job):
+        if job.status == JobStatus.RUNNING and self._progress is not None:
+            job.progress = self._progress.get(job.id, job.progress)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._refresh_progress(job)
+            return job
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        with self._lock:
+            try:
+                return self._pending.index(job_id) + 1
+            except ValueError:
+                return None
+
+    def describe(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                return None
+            return job.to_dict(self.queue_position(job_id))
+
+    def list_jobs(self, include_finished: bool = False) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = []
+            for job in self._jobs.values():
+                if job.finished and not include_finished:
+                    continue
+                self._refresh_progress(job)
+                jobs.append(job.to_dict(self.queue_position(job.id)))
+            return jobs
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            if job.status == JobStatus.QUEUED:
+                self._pending.remove(job_id)
+                self._finish(job, JobStatus.CANCELLED)
+            elif job.future is not None and job.future.cancel():
+                pass  # The done callback has already recorded the cancellation
+            else:
+                # Running jobs notice the flag at their next progress report
+                self._cancelled[job_id] = True
+            return job
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'queued': len(self._pending),
+                'running': len(self._running),
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            for job_id in list(self._pending):
+                self.cancel(job_id)
+            for job_id in list(self._running):
+                self.cancel(job_id)
+            executor, manager = self._executor, self._manager
+            self._executor = None
+            self._manager = None
+            self._progress = None
+            self._cancelled = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        if manager is not None:
+            manager.shutdown()
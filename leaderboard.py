@@ -0,0 +1,113 @@
+"""
+Ranking of optimizer candidates within a single sweep.
+
+A candidate is the summary the optimizer keeps for each permutation: params,
+final_balance, total_trades, win_rate, profit_factor and risk_metrics (see
+:mod:`risk_metrics`). An objective is a name from :data:`OBJECTIVES`: a getter
+on that summary plus a direction.
+
+- :class:`Leaderboard` keeps the best ``k`` candidates of one objective in a
+  heap, so memory stays bounded however large the grid is.
+- :class:`ParetoFront` keeps every candidate that no other candidate beats on
+  all of several objectives at once, e.g. ``['total_return', 'max_drawdown']``.
+
+Undefined values (a None risk metric, such as Calmar without a drawdown) rank
+below every defined value. Ties keep the earlier permutation.
+"""
+import heapq
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+Candidate = Dict[str, Any]
+
+
+def _summary(field: str) -> Callable[[Candidate], Optional[float]]:
+    return lambda candidate: candidate.get(field)
+
+
+def _risk(field: str) -> Callable[[Candidate], Optional[float]]:
+    return lambda candidate: (candidate.get('risk_metrics') or {}).get(field)
+
+
+# name -> (getter, maximize)
+OBJECTIVES: Dict[str, Tuple[Callable[[Candidate], Optional[float]], bool]] = {
+    'final_balance': (_summary('final_balance'), True),
+    'win_rate': (_summary('win_rate'), True),
+    'profit_factor': (_summary('profit_factor'), True),
+    'total_return': (_risk('total_return'), True),
+    'cagr': (_risk('cagr'), True),
+    'sharpe': (_risk('sharpe'), True),
+    'sortino': (_risk('sortino'), True),
+    'calmar': (_risk('calmar'), True),
+    'max_drawdown': (_risk('max_drawdown'), False),
+    'var': (_risk('var'), True),
+    'cvar': (_risk('cvar'), True),
+}
+
+
+def objective_score(name: str, candidate: Candidate) -> float:
+    """Objective value oriented so that larger is better; -inf when undefined."""
+    if name not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {name}. Choose from {sorted(OBJECTIVES)}")
+    getter, maximize = OBJECTIVES[name]
+    value = getter(candidate)
+    if value is None or value != value:
+        return float('-inf')
+    return float(value) if maximize else -float(value)
+
+
+class Leaderboard:
+    def __init__(self, objective: str = 'final_balance', k: Optional[int] = None):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective: {objective}. Choose from {sorted(OBJECTIVES)}")
+        if k is not None and k < 1:
+            raise ValueError("k must be at least 1")
+        self.objective = objective
+        self.k = k
+        # Min-heap of (score, -sequence, candidate): the root is the entry to evict next
+        self._heap: List[Tuple[float, int, Candidate]] = []
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, candidate: Candidate) -> None:
+        entry = (objective_score(self.objective, candidate), -next(self._sequence), candidate)
+        if self.k is None or len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def ranked(self) -> List[Candidate]:
+        """Best first."""
+        return [candidate for _, _, candidate in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+class ParetoFront:
+    def __init__(self, objectives: Sequence[str]):
+        if len(objectives) < 2:
+            raise ValueError("A Pareto front needs at least two objectives")
+        for name in objectives:
+            if name not in OBJECTIVES:
+                raise ValueError(f"Unknown objective: {name}. Choose from {sorted(OBJECTIVES)}")
+        self.objectives = list(objectives)
+        self._front: List[Tuple[Tuple[float, ...], Candidate]] = []
+
+    def __len__(self) -> int:
+        return len(self._front)
+
+    @staticmethod
+    def _dominates(a: Tuple[float, ...], b: Tuple[float, ...]) -> bool:
+        return all(x >= y for x, y in zip(a, b)) and a != b
+
+    def push(self, candidate: Candidate) -> None:
+        scores = tuple(objective_score(name, candidate) for name in self.objectives)
+        # Equal scores are not dominated, so the first candidate with them stays and later ones are dropped
+        if any(self._dominates(kept, scores) or kept == scores for kept, _ in self._front):
+            return
+        self._front = [(kept, other) for kept, other in self._front if not self._dominates(scores, kept)]
+        self._front.append((scores, candidate))
+
+    def ranked(self) -> List[Candidate]:
+        """Front members ordered by the first objective, best first."""
+        return [candidate for _, candidate in sorted(self._front, key=lambda entry: entry[0], reverse=True)]
@@ -0,0 +1,109 @@
+"""
+Filtering, field projection and cursor pagination for list endpoints.
+
+List endpoints filter rows that are already in memory (the symbol catalog and
+the positions snapshot), sorted by a unique key. A cursor is the last key the
+client saw. The next page starts right after it, found by bisection, so a
+page stays stable when rows are added or removed elsewhere in the list.
+Name-prefix filters are also bisected on the sorted names. Only the page is
+copied, and each row is cut down to the requested ``fields`` before
+serialisation.
+
+:class:`SymbolCatalog` caches ``symbols_get`` for ``ttl`` seconds. It keeps
+the static contract fields only, because quotes go stale in the cache; live
+prices come from the tick endpoint.
+"""
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Quote and session statistics change every tick; they are not cached in the catalog
+LIVE_SYMBOL_FIELDS = frozenset((
+    'bid', 'bidhigh', 'bidlow', 'ask', 'askhigh', 'asklow', 'last', 'lasthigh', 'lastlow', 'time', 'time_msc',
+    'volume', 'volumehigh', 'volumelow', 'volume_real', 'volumehigh_real', 'volumelow_real', 'spread',
+    'price_change', 'price_volatility', 'price_theoretical', 'session_deals', 'session_buy_orders',
+    'session_sell_orders', 'session_volume', 'session_turnover', 'session_interest', 'session_buy_orders_volume',
+    'session_sell_orders_volume', 'session_open', 'session_close', 'session_aw', 'session_price_settlement',
+    'session_price_limit_min', 'session_price_limit_max',
+))
+DEFAULT_SYMBOL_FIELDS = ('name', 'description', 'path', 'currency_base', 'currency_profit', 'currency_margin',
+                         'digits', 'trade_mode')
+
+
+def parse_fields(fields: Optional[str], available: Iterable[str]) -> Optional[List[str]]:
+    """Comma separated field names checked against ``available``; None (all fields) when not given."""
+    if not fields:
+        return None
+    available = set(available)
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def project(rows: Iterable[Dict[str, Any]], fields: Optional[Sequence[str]]) -> List[Dict[str, Any]]:
+    if fields is None:
+        return list(rows)
+    return [{field: row.get(field) for field in fields} for row in rows]
+
+
+def prefix_range(keys: Sequence[str], prefix: str) -> Tuple[int, int]:
+    """Index range of the sorted ``keys`` that start with ``prefix``."""
+    return bisect.bisect_left(keys, prefix), bisect.bisect_left(keys, prefix + '\U0010ffff')
+
+
+def paginate(rows: Sequence[Dict[str, Any]], keys: Sequence[Any], limit: int, cursor: Optional[str] = None,
+             parse: Callable[[str], Any] = str) -> Tuple[Sequence[Dict[str, Any]], Optional[str]]:
+    """The page of ``rows`` (sorted by ``keys``) after ``cursor``, and the cursor of the following page."""
+    start = 0
+    if cursor:
+        try:
+            start = bisect.bisect_right(keys, parse(cursor))
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
+    page = rows[start:start + limit]
+    next_cursor = str(keys[start + limit - 1]) if start + limit < len(rows) else None
+    return page, next_cursor
+
+
+class SymbolCatalog:
+    def __init__(self, loader: Callable[[], Any], ttl: float = 300.0):
+        """loader returns MT5 symbols_get(); the sorted result is reused for ``ttl`` seconds."""
+        self.loader = loader
+        self.ttl = ttl
+        self._rows: List[Dict[str, Any]] = []
+        self._names: List[str] = []
+        self._fields: Tuple[str, ...] = DEFAULT_SYMBOL_FIELDS
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return self._fields
+
+    @property
+    def fresh(self) -> bool:
+        """True while get() can answer from the cache without calling MT5."""
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def get(self, refresh: bool = False) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Symbols sorted by name and the matching list of names."""
+        with self._lock:
+            if not refresh and self.fresh:
+                return self._rows, self._names
+            symbols = self.loader()
+            if symbols is None:
+                return [], []
+            rows = sorted(({k: v for k, v in s._asdict().items() if k not in LIVE_SYMBOL_FIELDS} for s in symbols),
+                          key=lambda row: row['name'])
+            self._rows, self._names = rows, [row['name'] for row in rows]
+            if rows:
+                self._fields = tuple(rows[0])
+            self._loaded_at = time.monotonic()
+            return self._rows, self._names
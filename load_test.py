@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the MT5 TradeBot API.
+
+Drives a weighted mix of read, trade and backtest traffic at a fixed target
+request rate and reports p50/p95/p99 latency, error rate and event-loop lag
+per endpoint. Arrivals are open-loop: requests are launched on schedule even
+when earlier ones are still running, and latency is measured from the
+scheduled start, so a saturated server shows up as growing latency instead of
+a silently reduced request rate.
+
+By default the app runs in-process (ASGI transport) against the deterministic
+MT5 simulator, so no terminal or server is needed and event-loop lag reflects
+the app's own blocking work:
+
+    python load_test.py --rps 50 --duration 30
+    python load_test.py --mix read=70,trade=20,backtest=10 --mt5-latency-ms 2
+    python load_test.py --url http://localhost:8001 --rps 20   # external server
+
+Against an external server the event-loop lag column measures the load
+generator's loop only.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+API_PREFIX = "/api/v1"
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "XAUUSD"]
+STRATEGIES = [
+    ("simple_ma_crossover", {"fast_period": 10, "slow_period": 30}),
+    ("rsi", {}),
+    ("bollinger_bands", {}),
+    ("macd", {}),
+]
+DEFAULT_MIX = {"read": 80, "trade": 15, "backtest": 5}
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.statuses: Dict[str, int] = defaultdict(int)
+        self.lag_samples: List[float] = []
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        latencies = np.array(self.latencies) * 1000
+        lags = np.array(self.lag_samples) * 1000
+        count = len(latencies)
+        return {
+            "requests": count,
+            "rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2) if count else None,
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2) if count else None,
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2) if count else None,
+            "max_ms": round(float(latencies.max()), 2) if count else None,
+            "loop_lag_p99_ms": round(float(np.percentile(lags, 99)), 2) if len(lags) else 0.0,
+            "loop_lag_max_ms": round(float(lags.max()), 2) if len(lags) else 0.0,
+            "statuses": dict(self.statuses),
+        }
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, rps: float, duration: float,
+                 mix: Optional[Dict[str, float]] = None, seed: int = 42,
+                 max_in_flight: int = 1000, lag_interval: float = 0.01):
+        self.client = client
+        self.rps = rps
+        self.duration = duration
+        self.mix = mix or DEFAULT_MIX
+        self.rng = random.Random(seed)
+        self.max_in_flight = max_in_flight
+        self.lag_interval = lag_interval
+
+        self.stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.loop_lags: List[float] = []
+        self.dropped = 0
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._started: Dict[str, int] = defaultdict(int)
+        self._open_positions: deque = deque()
+        self._elapsed = 0.0
+
+    # ------------------------------------------------------------------ requests
+
+    async def _request(self, name: str, method: str, path: str, scheduled: float, **kwargs) -> Optional[httpx.Response]:
+        self._in_flight[name] += 1
+        self._started[name] += 1
+        stats = self.stats[name]
+        try:
+            response = await self.client.request(method, API_PREFIX + path, **kwargs)
+            stats.statuses[str(response.status_code)] += 1
+            if response.status_code >= 400:
+                stats.errors += 1
+            return response
+        except Exception as e:
+            stats.statuses[type(e).__name__] += 1
+            stats.errors += 1
+            return None
+        finally:
+            stats.latencies.append(time.perf_counter() - scheduled)
+            self._in_flight[name] -= 1
+
+    async def _read(self, scheduled: float):
+        choice = self.rng.random()
+        if choice < 0.35:
+            await self._request("GET /account", "GET", "/account", scheduled)
+        elif choice < 0.7:
+            await self._request("GET /positions", "GET", "/positions", scheduled)
+        elif choice < 0.8:
+            await self._request("GET /orders", "GET", "/orders", scheduled)
+        else:
+            symbol = self.rng.choice(SYMBOLS)
+            await self._request("GET /symbol/{symbol}/tick", "GET", f"/symbol/{symbol}/tick", scheduled)
+
+    async def _trade(self, scheduled: float):
+        # Keep a handful of positions open: close the oldest once there are enough
+        if len(self._open_positions) >= 5:
+            ticket = self._open_positions.popleft()
+            await self._request("POST /position/close/{id}", "POST", f"/position/close/{ticket}", scheduled)
+            return
+        order = {"symbol": self.rng.choice(SYMBOLS[:3]), "order_type": self.rng.choice(["BUY", "SELL"]),
+                 "volume": 0.01, "comment": "load test"}
+        response = await self._request("POST /order/place", "POST", "/order/place", scheduled, json=order)
+        if response is not None and response.status_code == 200:
+            self._open_positions.append(response.json()["order_id"])
+
+    async def _backtest(self, scheduled: float):
+        strategy, params = self.rng.choice(STRATEGIES)
+        end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        body = {
+            "symbol": self.rng.choice(SYMBOLS),
+            "timeframe": "H1",
+            "start_date": (end - timedelta(days=60)).isoformat(),
+            "end_date": end.isoformat(),
+            "strategy_name": strategy,
+            "strategy_params": params,
+        }
+        await self._request("POST /backtest", "POST", "/backtest", scheduled, json=body)
+
+    # ------------------------------------------------------------------ driver
+
+    async def _monitor_loop_lag(self, stop: asyncio.Event):
+        while not stop.is_set():
+            active = {name for name, count in self._in_flight.items() if count}
+            started = dict(self._started)
+            start = time.perf_counter()
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, time.perf_counter() - start - self.lag_interval)
+            self.loop_lags.append(lag)
+            # Attribute the stall to every endpoint with work in flight at any point of the window
+            active.update(name for name, count in self._started.items() if count != started.get(name))
+            for name in active:
+                self.stats[name].lag_samples.append(lag)
+
+    async def run(self) -> Dict[str, Any]:
+        scenarios = {"read": self._read, "trade": self._trade, "backtest": self._backtest}
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        interval = 1.0 / self.rps
+        total = int(self.rps * self.duration)
+
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(self._monitor_loop_lag(stop))
+        tasks = set()
+        started = time.perf_counter()
+        for i in range(total):
+            scheduled = started + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= self.max_in_flight:
+                self.dropped += 1
+                continue
+            scenario = scenarios[self.rng.choices(names, weights)[0]]
+            task = asyncio.create_task(scenario(scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        self._elapsed = time.perf_counter() - started
+        stop.set()
+        await monitor
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        lags = np.array(self.loop_lags) * 1000
+        requests = sum(len(s.latencies) for s in self.stats.values())
+        errors = sum(s.errors for s in self.stats.values())
+        return {
+            "target_rps": self.rps,
+            "achieved_rps": round(requests / self._elapsed, 2) if self._elapsed else 0.0,
+            "duration_s": round(self._elapsed, 2),
+            "requests": requests,
+            "errors": errors,
+            "dropped": self.dropped,
+            "loop_lag_p99_ms": round(float(np.percentile(lags, 99)), 2) if len(lags) else 0.0,
+            "loop_lag_max_ms": round(float(lags.max()), 2) if len(lags) else 0.0,
+            "endpoints": {name: stats.summary(self._elapsed) for name, stats in sorted(self.stats.items())},
+        }
+
+
+def in_process_client(seed: int = 42, latency_ms: float = 0.0, use_cache: bool = False) -> httpx.AsyncClient:
+    """Client wired straight into the ASGI app, with a fresh simulator as the MT5 backend."""
+    import main
+    from metrics import InstrumentedMT5
+    from mt5_sim import SimulatedMT5
+
+    simulator = SimulatedMT5(seed=seed, latency={'*': latency_ms / 1000.0} if latency_ms else None)
+    # Keep MT5 call metrics when the app instruments its backend
+    main.mt5 = InstrumentedMT5(simulator) if isinstance(main.mt5, InstrumentedMT5) else simulator
+    if not use_cache:
+        main.backtest_cache = None
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest", timeout=60.0)
+
+
+def print_report(report: Dict[str, Any]):
+    print("=" * 118)
+    print(f"Target {report['target_rps']} rps, achieved {report['achieved_rps']} rps over {report['duration_s']}s "
+          f"- {report['requests']} requests, {report['errors']} errors, {report['dropped']} dropped")
+    print(f"Event-loop lag: p99 {report['loop_lag_p99_ms']} ms, max {report['loop_lag_max_ms']} ms")
+    print("=" * 118)
+    print(f"{'endpoint':<28}{'reqs':>7}{'rps':>8}{'err%':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'max ms':>10}{'lag p99':>10}{'lag max':>10}")
+    for name, s in report["endpoints"].items():
+        print(f"{name:<28}{s['requests']:>7}{s['rps']:>8}{s['error_rate'] * 100:>7.1f}{s['p50_ms']:>10}"
+              f"{s['p95_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}{s['loop_lag_p99_ms']:>10}{s['loop_lag_max_ms']:>10}")
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown workload '{name}', expected one of {list(DEFAULT_MIX)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def run_scenario(args) -> Dict[str, Any]:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url.rstrip("/"), timeout=60.0)
+    else:
+        client = in_process_client(args.seed, args.mt5_latency_ms, args.use_cache)
+    async with client:
+        if not args.url or args.connect:
+            # Credentials are ignored by the simulator
+            connect = await client.post(f"{API_PREFIX}/connect",
+                                        json={"login": 1, "password": "", "server": "Simulator"})
+            if connect.status_code != 200:
+                raise SystemExit(f"Connect failed: {connect.text}")
+        load_test = LoadTest(client, args.rps, args.duration, args.mix, args.seed, args.max_in_flight)
+        return await load_test.run()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the MT5 TradeBot API")
+    parser.add_argument("--rps", type=float, default=20.0, help="target request rate")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of traffic to generate")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. read=80,trade=15,backtest=5")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="drop arrivals beyond this many open requests")
+    parser.add_argument("--mt5-latency-ms", type=float, default=0.0, help="simulated MT5 call latency (in-process)")
+    parser.add_argument("--use-cache", action="store_true", help="keep the backtest result cache enabled")
+    parser.add_argument("--url", help="test a running server instead of the in-process app")
+    parser.add_argument("--connect", action="store_true", help="call /connect first when using --url")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    # Per-request client logging would dominate the generator's own loop
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    report = asyncio.run(run_scenario(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
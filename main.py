@@ -1,6 +1,7 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
@@ -27,8 +28,10 @@ except ImportError:
         ORDER_TYPE_SELL_STOP = 5
         
         TRADE_ACTION_DEAL = 1
+        TRADE_ACTION_PENDING = 5
         ORDER_TIME_GTC = 0
         ORDER_FILLING_IOC = 1
+        TRADE_RETCODE_PLACED = 10008
         TRADE_RETCODE_DONE = 10009
         
         POSITION_TYPE_BUY = 0
@@ -43,6 +46,9 @@ except ImportError:
         def last_error(self):
             return (1, "MetaTrader5 is not supported on Linux")
             
+        def terminal_info(self):
+            return None
+            
         def account_info(self):
             return None
             
@@ -89,10 +95,32 @@ import uvicorn
 import logging
 import asyncio
 import os
+import time
 from contextlib import asynccontextmanager
 
 from config import settings
+if settings.MT5_BACKEND == "simulator":
+    from mt5_sim import get_simulator
+    mt5 = get_simulator()
+import metrics
+if settings.METRICS_ENABLED:
+    mt5 = metrics.instrument_mt5(mt5)
 from ea_tester import EATester
+from jobs import JobManager, JobQueueFull, JobStatus
+from backtest_cache import BacktestCache
+from resample import BarCache, timeframe_seconds
+from portfolio import PortfolioBacktester
+from advanced_strategies import AdvancedStrategies, higher_timeframe_cache
+from profiler import ProfileStore, ProfilingMiddleware, is_admin
+from timings import PhaseTimer, timed_json_response
+from symbol_specs import SymbolSpec, SymbolSpecRegistry
+from mt5_worker import MT5QueueFull, MT5Worker
+from snapshots import SnapshotPoller
+from supervisor import ConnectionSupervisor
+from deals_store import COLUMNS as DEALS_COLUMNS, DealsStore, DealsSync, query_deals, to_epoch
+from listing import SymbolCatalog, DEFAULT_SYMBOL_FIELDS, paginate, parse_fields, prefix_range, project
+import monte_carlo
+from monte_carlo import DEFAULT_PERCENTILES
 
 logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL, logging.INFO))
 logger = logging.getLogger(__name__)
@@ -116,12 +144,34 @@ class TimeFrame(str, Enum):
     W1 = "W1"
     MN1 = "MN1"
 
+TIMEFRAME_MAP = {
+    TimeFrame.M1: mt5.TIMEFRAME_M1,
+    TimeFrame.M5: mt5.TIMEFRAME_M5,
+    TimeFrame.M15: mt5.TIMEFRAME_M15,
+    TimeFrame.M30: mt5.TIMEFRAME_M30,
+    TimeFrame.H1: mt5.TIMEFRAME_H1,
+    TimeFrame.H4: mt5.TIMEFRAME_H4,
+    TimeFrame.D1: mt5.TIMEFRAME_D1,
+    TimeFrame.W1: mt5.TIMEFRAME_W1,
+    TimeFrame.MN1: mt5.TIMEFRAME_MN1,
+}
+
 class MT5ConnectionRequest(BaseModel):
     login: int
     password: str
     server: str
     path: Optional[str] = None
 
+class PositionSide(str, Enum):
+    BUY = "BUY"
+    SELL = "SELL"
+
+class BulkCloseRequest(BaseModel):
+    # Every filter is optional; an empty request closes all open positions
+    symbol: Optional[str] = None
+    magic: Optional[int] = None
+    side: Optional[PositionSide] = None
+
 class OrderRequest(BaseModel):
     symbol: str
     order_type: OrderType
@@ -163,6 +213,39 @@ class OptimizeRequest(BaseModel):
     lot_size: float = 0.1
     stop_loss_pips: float = 0.0
     take_profit_pips: float = 0.0
+    # Ranking: a leaderboard.OBJECTIVES name, how many summaries and full backtests to return
+    objective: str = 'final_balance'
+    top_k: int = Field(default=20, ge=1)
+    keep_results: int = Field(default=1, ge=0)
+    pareto_objectives: Optional[List[str]] = None
+
+class BatchOrderRequest(BaseModel):
+    orders: List[OrderRequest] = Field(min_length=1, max_length=settings.ORDER_BATCH_MAX_ORDERS)
+
+class PortfolioLeg(BaseModel):
+    symbol: str
+    strategy_name: str
+    strategy_params: Dict[str, Any] = Field(default_factory=dict)
+    lot_size: float = 0.1
+    stop_loss_pips: float = 0.0
+    take_profit_pips: float = 0.0
+    exit_on_opposite_signal: bool = True
+
+class PortfolioBacktestRequest(BaseModel):
+    timeframe: TimeFrame
+    start_date: datetime
+    end_date: datetime
+    initial_balance: float = 10000.0
+    legs: List[PortfolioLeg] = Field(min_length=1)
+
+class MonteCarloRequest(BaseModel):
+    # Per-trade P&L in close order, i.e. [t['profit'] for t in backtest['trades']]
+    profits: List[float] = Field(min_length=1)
+    initial_balance: float = Field(default=10000.0, gt=0)
+    paths: int = Field(default=10000, ge=1, le=settings.MONTE_CARLO_MAX_PATHS)
+    method: str = 'bootstrap'
+    seed: Optional[int] = None
+    percentiles: List[float] = Field(default_factory=lambda: list(DEFAULT_PERCENTILES))
 
 class AutoTradeStartRequest(BaseModel):
     symbol: str
@@ -180,6 +263,8 @@ class MT5Manager:
         self.account_info = None
         self.login = None
         self.server = None
+        # Kept from the last successful connect so the supervisor can reconnect after a drop
+        self.credentials: Optional[Dict[str, Any]] = None
     
     def connect(self, login: int, password: str, server: str, path: Optional[str] = None):
         if path:
@@ -192,15 +277,30 @@ class MT5Manager:
         self.connected = True
         self.login = login
         self.server = server
+        self.credentials = {"login": login, "password": password, "server": server, "path": path}
         self.account_info = mt5.account_info()
         logger.info(f"Connected to MT5 account: {login}")
         return True
     
+    def reconnect(self):
+        """Re-initialise the terminal session with the stored credentials"""
+        if self.credentials is None:
+            raise Exception("No stored MT5 credentials to reconnect with")
+        # Drop the dead IPC session first; initialize() on top of it can keep failing
+        mt5.shutdown()
+        return self.connect(**self.credentials)
+    
+    def probe(self) -> bool:
+        """Cheap health check: the terminal answers and is connected to the trade server"""
+        info = mt5.terminal_info()
+        return info is not None and bool(info.connected)
+    
     def disconnect(self):
         mt5.shutdown()
         self.connected = False
         self.login = None
         self.server = None
+        self.credentials = None
         logger.info("Disconnected from MT5")
     
     def get_account_info(self):
@@ -229,6 +329,130 @@ class MT5Manager:
 
 
 mt5_manager = MT5Manager()
+mt5_worker = MT5Worker(max_queue=settings.MT5_WORKER_QUEUE_SIZE)
+snapshot_poller = SnapshotPoller(
+    {
+        'account': lambda: mt5_manager.get_account_info(),
+        'positions': lambda: mt5_manager.get_positions(),
+        'orders': lambda: mt5_manager.get_orders(),
+    },
+    interval=settings.SNAPSHOT_POLL_INTERVAL_MS / 1000,
+    runner=mt5_worker.call
+)
+
+
+# Opened at startup (when DEALS_STORE_PATH is set) so importing the app never touches the disk
+deals_store: Optional[DealsStore] = None
+deals_sync: Optional[DealsSync] = None
+
+
+async def read_positions(refresh: bool = False) -> List[Dict[str, Any]]:
+    """Open positions from the shared snapshot (refreshed first on request), or from MT5 when it is stale"""
+    if snapshot_poller.running:
+        if refresh:
+            await snapshot_poller.refresh()
+        section = snapshot_poller.get('positions')
+        if section is not None:
+            return section.data
+    return await mt5_worker.call(mt5_manager.get_positions)
+
+
+backtest_cache = BacktestCache(
+    settings.BACKTEST_CACHE_DIR,
+    max_bytes=settings.BACKTEST_CACHE_MAX_MB * 1024 * 1024
+) if settings.BACKTEST_CACHE_ENABLED else None
+
+
+def _store_job_result(job):
+    if backtest_cache is not None and job.cache_key:
+        backtest_cache.put(job.cache_key, job.result)
+
+
+portfolio_backtester = PortfolioBacktester(max_workers=settings.PORTFOLIO_WORKERS)
+job_manager = JobManager(
+    max_workers=settings.JOB_WORKERS,
+    max_queue=settings.JOB_QUEUE_SIZE,
+    max_history=settings.JOB_HISTORY_SIZE,
+    on_complete=_store_job_result
+)
+
+
+symbol_specs = SymbolSpecRegistry(lambda symbol: mt5.symbol_info(symbol), path=settings.SYMBOL_SPECS_FILE,
+                                  ttl=settings.SYMBOL_SPECS_TTL_SECONDS)
+
+
+async def resolve_spec(symbol: str) -> Optional[SymbolSpec]:
+    """Cached contract spec; a miss reads symbol_info on the MT5 worker like every other terminal call"""
+    return await mt5_worker.call(symbol_specs.get, symbol)
+
+
+symbol_catalog = SymbolCatalog(lambda: mt5.symbols_get(), ttl=settings.SYMBOL_CATALOG_TTL_SECONDS)
+
+
+def spec_dict(spec: Optional[SymbolSpec]) -> Optional[Dict[str, Any]]:
+    return spec.to_dict() if spec is not None else None
+
+
+bar_cache = BarCache(
+    lambda symbol, timeframe, start, end: mt5.copy_rates_range(symbol, TIMEFRAME_MAP[TimeFrame(timeframe)], start, end),
+    base_timeframe=settings.RESAMPLE_BASE_TIMEFRAME,
+    max_symbols=settings.RESAMPLE_CACHE_SYMBOLS,
+    compact=settings.RESAMPLE_CACHE_COMPACT
+) if settings.RESAMPLE_BASE_TIMEFRAME else None
+
+
+def _cache_counts(attribute: str) -> Dict[tuple, float]:
+    caches = {'backtest': backtest_cache, 'bars': bar_cache, 'higher_timeframe': higher_timeframe_cache,
+              'symbol_specs': symbol_specs}
+    return {(name,): getattr(cache, attribute) for name, cache in caches.items() if cache is not None}
+
+
+def _cache_hit_ratios() -> Dict[tuple, float]:
+    hits, misses = _cache_counts('hits'), _cache_counts('misses')
+    return {key: hits[key] / (hits[key] + misses[key]) if hits[key] + misses[key] else 0.0 for key in hits}
+
+
+metrics.Counter('cache_hits_total', 'Cache lookups served from cache', ['cache'],
+                function=lambda: _cache_counts('hits'))
+metrics.Counter('cache_misses_total', 'Cache lookups that had to compute or fetch', ['cache'],
+                function=lambda: _cache_counts('misses'))
+metrics.Gauge('cache_hit_ratio', 'Fraction of cache lookups served from cache', ['cache'],
+              function=_cache_hit_ratios)
+metrics.Gauge('jobs_in_flight', 'Background jobs by state', ['state'],
+              function=lambda: {(state,): job_manager.stats[state] for state in ('queued', 'running')})
+
+
+def derives_from_base(timeframe: TimeFrame) -> bool:
+    """Whether bars for this timeframe can be resampled from the cached base series."""
+    if bar_cache is None:
+        return False
+    period = timeframe_seconds(timeframe)
+    base_period = timeframe_seconds(bar_cache.base_timeframe)
+    return period is None or (period >= base_period and period % base_period == 0)
+
+
+def fetch_rates(symbol: str, timeframe: TimeFrame, start_date: datetime, end_date: datetime,
+                not_found_detail: str = "No historical data found to run simulation"):
+    if not mt5_manager.connected:
+        raise HTTPException(status_code=400, detail="Not connected to MT5")
+    if derives_from_base(timeframe):
+        rates = bar_cache.get_rates(
+            symbol, timeframe.value, start_date, end_date,
+            session_offset=settings.RESAMPLE_SESSION_OFFSET_MINUTES * 60
+        )
+    else:
+        rates = mt5.copy_rates_range(symbol, TIMEFRAME_MAP[timeframe], start_date, end_date)
+    if rates is None or len(rates) == 0:
+        raise HTTPException(status_code=404, detail=not_found_detail)
+    return rates
+
+
+def backtest_cache_key(request: "BacktestRequest", rates, spec: Optional[SymbolSpec] = None) -> Optional[str]:
+    if backtest_cache is None:
+        return None
+    # Specs change P&L, so a refreshed spec must not hit results computed with the old one
+    params = dict(request.model_dump(mode='json'), symbol_spec=spec_dict(spec))
+    return BacktestCache.make_key(params, BacktestCache.fingerprint(rates))
 
 
 class AutoTrader:
@@ -241,12 +465,15 @@ class AutoTrader:
         self.lot_size = 0.01
         self.stop_loss_pips = 10.0
         self.take_profit_pips = 20.0
+        self.spec: Optional[SymbolSpec] = None
         self.task = None
         self.last_run = None
         self.last_signal = 0
         self.log = []
+        self._iteration_started = None
+        self._next_run = None
 
-    def start(self, symbol: str, timeframe: TimeFrame, strategy_name: str, strategy_params: Dict[str, Any], lot_size: float, sl_pips: float, tp_pips: float):
+    async def start(self, symbol: str, timeframe: TimeFrame, strategy_name: str, strategy_params: Dict[str, Any], lot_size: float, sl_pips: float, tp_pips: float):
         if self.active:
             raise Exception("Auto-Trader is already running")
         self.symbol = symbol
@@ -256,6 +483,8 @@ class AutoTrader:
         self.lot_size = lot_size
         self.stop_loss_pips = sl_pips
         self.take_profit_pips = tp_pips
+        # Resolved once per session so order sizing never looks the symbol up again
+        self.spec = await resolve_spec(symbol)
         self.active = True
         self.log = [f"[{datetime.now().isoformat()}] Auto-Trader initialized on {symbol} using {strategy_name}"]
         self.task = asyncio.create_task(self.run_loop())
@@ -273,10 +502,13 @@ class AutoTrader:
         tester = EATester()
         
         while self.active:
+            self._iteration_started = time.perf_counter()
+            if self._next_run is not None:
+                metrics.AUTOTRADER_LOOP_DRIFT.set(self._iteration_started - self._next_run)
             try:
                 if not mt5_manager.connected:
                     self.log.append(f"[{datetime.now().isoformat()}] Waiting for MT5 connection...")
-                    await asyncio.sleep(10)
+                    await self._pause(10)
                     continue
                     
                 timeframe_map = {
@@ -291,52 +523,52 @@ class AutoTrader:
                     TimeFrame.MN1: mt5.TIMEFRAME_MN1,
                 }
                 
-                # Fetch enough bars to calculate technical metrics
-                rates = mt5.copy_rates_from_pos(
+                # Fetch enough bars to calculate technical metrics; higher timeframes are fetched on their own
+                multi_timeframe = self.strategy_name == 'multi_timeframe_trend'
+                bar_count = max(150, int(self.strategy_params.get('ma_period', 50)) + 2 if multi_timeframe else 0)
+                rates = await mt5_worker.call(
+                    mt5.copy_rates_from_pos,
                     self.symbol,
                     timeframe_map[self.timeframe],
                     0,
-                    150
+                    bar_count
                 )
                 
                 if rates is None or len(rates) == 0:
                     self.log.append(f"[{datetime.now().isoformat()}] Error: Could not copy rates for {self.symbol}")
-                    await asyncio.sleep(10)
+                    await self._pause(10)
                     continue
                     
                 df = pd.DataFrame(rates)
                 df['time'] = pd.to_datetime(df['time'], unit='s')
                 
-                df_with_signal = tester.run_strategy(df, self.strategy_name, self.strategy_params)
+                if multi_timeframe:
+                    signals = await self._multi_timeframe_signals(df, timeframe_map)
+                else:
+                    signals = tester.signals(df, self.strategy_name, self.strategy_params)
                 
                 # Select the second to last row as the last completed bar
-                latest_bar = df_with_signal.iloc[-2]
-                signal = int(latest_bar['signal'])
-                close_price = float(latest_bar['close'])
+                signal = int(signals[-2])
+                close_price = float(df['close'].iloc[-2])
                 
                 self.last_run = datetime.now().isoformat()
                 
                 if signal != self.last_signal:
                     self.log.append(f"[{self.last_run}] Signal Alert! Previous: {self.last_signal} | Current: {signal} at Price {close_price}")
                     
-                    # Manage open positions for this bot (magic number 888999)
-                    positions = mt5_manager.get_positions()
-                    bot_positions = [p for p in positions if p.get('symbol') == self.symbol and p.get('magic') == 888999]
-                    
-                    for pos in bot_positions:
-                        should_close = False
-                        if pos['type'] == mt5.POSITION_TYPE_BUY and signal <= 0:
-                            should_close = True
-                        elif pos['type'] == mt5.POSITION_TYPE_SELL and signal >= 0:
-                            should_close = True
-                            
-                        if should_close:
-                            self.log.append(f"[{datetime.now().isoformat()}] Closing position {pos['ticket']}")
-                            await self.close_live_position(pos)
+                    # Close this bot's (magic number 888999) positions against the signal in one bulk pass
+                    close_side = None if signal == 0 else PositionSide.SELL if signal > 0 else PositionSide.BUY
+                    report = await close_positions(symbol=self.symbol, magic=888999, side=close_side,
+                                                   comment="AutoTrader Close")
+                    for outcome in report["results"]:
+                        if outcome["status"] == "success":
+                            self.log.append(f"[{datetime.now().isoformat()}] Position {outcome['ticket']} closed! Deal Ticket: {outcome['order_id']}")
+                        else:
+                            self.log.append(f"[{datetime.now().isoformat()}] Close of {outcome['ticket']} rejected: {outcome['error']}")
                             
                     # Enter new position if signal is active (1 or -1)
-                    # Fetch positions again to check count
-                    positions = mt5_manager.get_positions()
+                    # Check the count on the shared snapshot, refreshed first if we just closed something
+                    positions = await read_positions(refresh=report["closed"] > 0)
                     bot_positions = [p for p in positions if p.get('symbol') == self.symbol and p.get('magic') == 888999]
                     
                     if len(bot_positions) == 0:
@@ -355,22 +587,43 @@ class AutoTrader:
                 self.log.append(f"[{datetime.now().isoformat()}] Error: {str(e)}")
                 logger.error(f"AutoTrader Loop Error: {e}")
                 
-            await asyncio.sleep(10)
+            await self._pause(10)
+    
+    async def _multi_timeframe_signals(self, df: pd.DataFrame, timeframe_map: Dict[TimeFrame, int]):
+        """multi_timeframe_trend on ma_period + 2 bars of each higher timeframe rather than a resampled base history"""
+        ma_period = int(self.strategy_params.get('ma_period', 50))
+        higher_frames = {}
+        for tf in self.strategy_params.get('higher_timeframes', ['H4', 'D1']):
+            rates = await mt5_worker.call(mt5.copy_rates_from_pos, self.symbol, timeframe_map[TimeFrame(tf)], 0,
+                                          ma_period + 2)
+            if rates is None or len(rates) == 0:
+                raise ValueError(f"Could not copy {tf} rates for {self.symbol}")
+            higher_frames[tf] = pd.DataFrame(rates)
+            higher_frames[tf]['time'] = pd.to_datetime(higher_frames[tf]['time'], unit='s')
+        session_offset = int(self.strategy_params.get('session_offset_minutes', 0)) * 60
+        result = AdvancedStrategies.multi_timeframe_from_frames(df.copy(), self.timeframe.value, higher_frames,
+                                                                ma_period, session_offset)
+        return result['Signal'].to_numpy()
+    
+    async def _pause(self, seconds: float):
+        """Sleep until the next iteration, recording this iteration's work time and the next deadline."""
+        now = time.perf_counter()
+        metrics.AUTOTRADER_LOOP_DURATION.observe(now - self._iteration_started)
+        self._next_run = now + seconds
+        await asyncio.sleep(seconds)
             
     async def open_live_position(self, order_type: OrderType):
-        tick = mt5.symbol_info_tick(self.symbol)
-        if not tick:
-            self.log.append(f"[{datetime.now().isoformat()}] Error: Tick data unavailable for {self.symbol}")
+        resolved = await mt5_worker.call(_resolve_symbol, self.symbol)
+        if "error" in resolved:
+            self.log.append(f"[{datetime.now().isoformat()}] Error: {resolved['error']}")
             return
+        tick = resolved["tick"]
             
         price = tick.ask if order_type == OrderType.BUY else tick.bid
         
         # Calculate SL/TP in pips
-        pip_size = 0.0001
-        if price > 1000:
-            pip_size = 0.1
-        elif price > 50:
-            pip_size = 0.01
+        spec = self.spec or SymbolSpec.guess(price)
+        pip_size = spec.pip_size
             
         sl = None
         tp = None
@@ -378,11 +631,9 @@ class AutoTrader:
             sl = price - (self.stop_loss_pips * pip_size) if order_type == OrderType.BUY else price + (self.stop_loss_pips * pip_size)
         if self.take_profit_pips > 0:
             tp = price + (self.take_profit_pips * pip_size) if order_type == OrderType.BUY else price - (self.take_profit_pips * pip_size)
-            
-        # Ensure symbol is active
-        if not mt5.symbol_select(self.symbol, True):
-            self.log.append(f"[{datetime.now().isoformat()}] Error: Failed to select symbol {self.symbol}")
-            return
+        if spec.digits is not None:
+            sl = round(sl, spec.digits) if sl is not None else None
+            tp = round(tp, spec.digits) if tp is not None else None
             
         order_request = {
             "action": mt5.TRADE_ACTION_DEAL,
@@ -402,65 +653,95 @@ class AutoTrader:
         if tp:
             order_request["tp"] = tp
             
-        result = mt5.order_send(order_request)
+        result = await mt5_worker.call(mt5.order_send, order_request)
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             self.log.append(f"[{datetime.now().isoformat()}] Order rejected: {result.comment}")
         else:
             self.log.append(f"[{datetime.now().isoformat()}] Order executed! Deal Ticket: {result.order}")
-            
-    async def close_live_position(self, position):
-        order_type = mt5.ORDER_TYPE_SELL if position['type'] == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
-        tick = mt5.symbol_info_tick(position['symbol'])
-        if not tick:
-            self.log.append(f"[{datetime.now().isoformat()}] Error: Tick data unavailable during close")
-            return
-            
-        price = tick.bid if position['type'] == mt5.ORDER_TYPE_BUY else tick.ask
-        
-        close_request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": position['symbol'],
-            "volume": position['volume'],
-            "type": order_type,
-            "position": position['ticket'],
-            "price": price,
-            "deviation": 20,
-            "magic": 888999,
-            "comment": "AutoTrader Close",
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_IOC,
-        }
-        
-        result = mt5.order_send(close_request)
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            self.log.append(f"[{datetime.now().isoformat()}] Close rejected: {result.comment}")
-        else:
-            self.log.append(f"[{datetime.now().isoformat()}] Position closed! Deal Ticket: {result.order}")
 
 
 auto_trader = AutoTrader()
 
 
+def mark_disconnected():
+    # Endpoints answer "Not connected" and the Auto-Trader waits instead of failing on every MT5 call
+    mt5_manager.connected = False
+
+
+async def warm_caches():
+    """Reload what may have gone stale while the terminal was unreachable"""
+    if bar_cache is not None:
+        bar_cache.invalidate()
+    symbol_catalog.invalidate()
+    await mt5_worker.call(symbol_catalog.get)
+    await mt5_worker.call(symbol_specs.refresh)
+    if snapshot_poller.running:
+        await snapshot_poller.refresh()
+    if deals_sync is not None:
+        await deals_sync.sync_now()
+
+
+connection_supervisor = ConnectionSupervisor(
+    probe=lambda: mt5_manager.probe(),
+    reconnect=lambda: mt5_manager.reconnect(),
+    interval=settings.MT5_PROBE_INTERVAL_MS / 1000,
+    timeout=settings.MT5_PROBE_TIMEOUT_MS / 1000,
+    backoff=settings.MT5_RECONNECT_BACKOFF_MS / 1000,
+    max_backoff=settings.MT5_RECONNECT_MAX_BACKOFF_MS / 1000,
+    runner=mt5_worker.call,
+    enabled=lambda: mt5_manager.credentials is not None,
+    on_down=mark_disconnected,
+    on_up=warm_caches,
+)
+metrics.Gauge('mt5_up', 'Whether the API is connected to the MT5 terminal', function=lambda: int(mt5_manager.connected))
+metrics.Counter('mt5_downtime_seconds_total', 'Time the MT5 connection has been down, including the current outage',
+                function=lambda: connection_supervisor.downtime)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Auto-connect on startup if configured
-    if settings.MT5_LOGIN and settings.MT5_PASSWORD and settings.MT5_SERVER:
-        logger.info("MT5 credentials found in configuration. Auto-connecting...")
+    if settings.MT5_BACKEND == "simulator" or (settings.MT5_LOGIN and settings.MT5_PASSWORD and settings.MT5_SERVER):
+        logger.info(f"MT5 {settings.MT5_BACKEND} backend configured. Auto-connecting...")
         try:
-            mt5_manager.connect(
+            await mt5_worker.call(
+                mt5_manager.connect,
                 login=settings.MT5_LOGIN,
                 password=settings.MT5_PASSWORD,
                 server=settings.MT5_SERVER,
                 path=settings.MT5_PATH
             )
             logger.info("Auto-connection successful!")
+            # Persisted specs carry the tick values of their last session
+            await mt5_worker.call(symbol_specs.refresh)
         except Exception as e:
             logger.error(f"Auto-connection failed: {e}")
+            # Configured credentials: let the supervisor keep trying with backoff
+            mt5_manager.credentials = {"login": settings.MT5_LOGIN, "password": settings.MT5_PASSWORD,
+                                       "server": settings.MT5_SERVER, "path": settings.MT5_PATH}
+    if settings.SNAPSHOT_POLL_INTERVAL_MS > 0:
+        snapshot_poller.start()
+    global deals_store, deals_sync
+    if settings.DEALS_STORE_PATH:
+        deals_store = DealsStore(settings.DEALS_STORE_PATH)
+        deals_sync = DealsSync(deals_store, lambda start, end: mt5.history_deals_get(start, end),
+                               interval=settings.DEALS_SYNC_INTERVAL_MS / 1000, runner=mt5_worker.call)
+        if settings.DEALS_SYNC_INTERVAL_MS > 0:
+            deals_sync.start()
+    if settings.MT5_PROBE_INTERVAL_MS > 0:
+        connection_supervisor.start()
     yield
     # Shutdown logic
+    connection_supervisor.stop()
+    snapshot_poller.stop()
+    if deals_sync is not None:
+        deals_sync.stop()
     auto_trader.stop()
+    job_manager.shutdown()
+    portfolio_backtester.shutdown()
     if mt5_manager.connected:
-        mt5_manager.disconnect()
+        await mt5_worker.call(mt5_manager.disconnect)
+    mt5_worker.shutdown()
 
 
 app = FastAPI(
@@ -470,6 +751,18 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+profile_store = ProfileStore(settings.PROFILER_MAX_PROFILES)
+
+app.add_middleware(
+    ProfilingMiddleware,
+    store=profile_store,
+    admin_key=lambda: settings.ADMIN_API_KEY,
+    interval_ms=settings.PROFILER_SAMPLE_INTERVAL_MS,
+)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -492,50 +785,114 @@ async def get_dashboard():
 @app.post("/api/v1/connect")
 async def connect_mt5(request: MT5ConnectionRequest):
     try:
-        mt5_manager.connect(
+        await mt5_worker.call(
+            mt5_manager.connect,
             login=request.login,
             password=request.password,
             server=request.server,
             path=request.path
         )
-        account_info = mt5_manager.get_account_info()
+        # Another login may see another symbol set, and tick values in another account currency
+        symbol_catalog.invalidate()
+        await mt5_worker.call(symbol_specs.refresh)
+        account_info = await mt5_worker.call(mt5_manager.get_account_info)
         return {
             "status": "success",
             "message": "Connected to MT5",
             "account_info": account_info
         }
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/disconnect")
 async def disconnect_mt5():
     try:
-        mt5_manager.disconnect()
+        await mt5_worker.call(mt5_manager.disconnect)
+        if bar_cache is not None:
+            bar_cache.invalidate()
         return {"status": "success", "message": "Disconnected from MT5"}
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def snapshot_response(name: str, fetch, if_none_match: Optional[str], version: Optional[int], count: bool = True,
+                      view=None):
+    """Serve a snapshot section with its ETag (304 when the client's tag or version is current)
+
+    view turns the section data into the body's data/count/next_cursor; the ETag still names the whole
+    section, which is correct per URL because a filtered page only changes when the section does.
+    """
+    section = snapshot_poller.get(name)
+    if section is None:
+        data = await mt5_worker.call(fetch)
+        body = {"status": "success", **view(data)} if view else {"status": "success", "data": data}
+        if count and not view:
+            body["count"] = len(data)
+        return body
+    
+    tags = {tag[2:] if tag.startswith('W/') else tag for tag in (t.strip() for t in (if_none_match or '').split(','))}
+    if section.etag in tags or '*' in tags or version == section.version:
+        return Response(status_code=304, headers={"ETag": section.etag})
+    body = {"status": "success", **(view(section.data) if view else {"data": section.data}),
+            "version": section.version, "changed_at": section.changed_at}
+    if count and not view:
+        body["count"] = len(section.data)
+    return JSONResponse(body, headers={"ETag": section.etag})
+
+
+def position_view(symbol: Optional[str], prefix: Optional[str], magic: Optional[int],
+                  start_date: Optional[datetime], end_date: Optional[datetime], fields: Optional[str],
+                  limit: Optional[int], cursor: Optional[str]):
+    """Filter positions, order them by ticket and cut one page of the requested fields"""
+    start, end = to_epoch(start_date), to_epoch(end_date)
+    
+    def view(positions):
+        selected = parse_fields(fields, positions[0] if positions else ())
+        rows = sorted(
+            (p for p in positions
+             if (symbol is None or p['symbol'] == symbol)
+             and (not prefix or p['symbol'].startswith(prefix))
+             and (magic is None or p['magic'] == magic)
+             and (start is None or p['time'] >= start)
+             and (end is None or p['time'] <= end)),
+            key=lambda p: p['ticket']
+        )
+        page, next_cursor = paginate(rows, [p['ticket'] for p in rows], limit or len(rows), cursor, parse=int)
+        return {"data": project(page, selected), "count": len(page), "total": len(rows), "next_cursor": next_cursor}
+    
+    return view
+
 @app.get("/api/v1/account")
-async def get_account():
+async def get_account(version: Optional[int] = None, if_none_match: Optional[str] = Header(default=None)):
     try:
-        account_info = mt5_manager.get_account_info()
-        return {"status": "success", "data": account_info}
+        return await snapshot_response('account', mt5_manager.get_account_info, if_none_match, version, count=False)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/positions")
-async def get_positions():
+async def get_positions(version: Optional[int] = None, if_none_match: Optional[str] = Header(default=None),
+                        symbol: Optional[str] = None, prefix: Optional[str] = None, magic: Optional[int] = None,
+                        start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                        fields: Optional[str] = None, limit: Optional[int] = Query(default=None, ge=1),
+                        cursor: Optional[str] = None):
+    """Open positions, optionally filtered (opened between start_date and end_date) and paginated by ticket"""
     try:
-        positions = mt5_manager.get_positions()
-        return {"status": "success", "data": positions, "count": len(positions)}
+        view = None
+        if any(value is not None for value in (symbol, prefix, magic, start_date, end_date, fields, limit, cursor)):
+            view = position_view(symbol, prefix, magic, start_date, end_date, fields, limit, cursor)
+        return await snapshot_response('positions', mt5_manager.get_positions, if_none_match, version, view=view)
+    except ValueError as val_err:
+        raise HTTPException(status_code=400, detail=str(val_err))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/orders")
-async def get_orders():
+async def get_orders(version: Optional[int] = None, if_none_match: Optional[str] = Header(default=None)):
     try:
-        orders = mt5_manager.get_orders()
-        return {"status": "success", "data": orders, "count": len(orders)}
+        return await snapshot_response('orders', mt5_manager.get_orders, if_none_match, version)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -545,13 +902,9 @@ async def place_order(request: OrderRequest):
         if not mt5_manager.connected:
             raise HTTPException(status_code=400, detail="Not connected to MT5")
         
-        symbol_info = mt5.symbol_info(request.symbol)
-        if symbol_info is None:
-            raise HTTPException(status_code=404, detail=f"Symbol {request.symbol} not found")
-        
-        if not symbol_info.visible:
-            if not mt5.symbol_select(request.symbol, True):
-                raise HTTPException(status_code=400, detail=f"Failed to select symbol {request.symbol}")
+        resolved = await mt5_worker.call(_resolve_symbol, request.symbol)
+        if "error" in resolved:
+            raise HTTPException(status_code=resolved["status_code"], detail=resolved["error"])
         
         order_type_map = {
             OrderType.BUY: mt5.ORDER_TYPE_BUY,
@@ -562,7 +915,7 @@ async def place_order(request: OrderRequest):
             OrderType.SELL_STOP: mt5.ORDER_TYPE_SELL_STOP,
         }
         
-        price = request.price if request.price else mt5.symbol_info_tick(request.symbol).ask
+        price = request.price if request.price else resolved["tick"].ask
         
         order_request = {
             "action": mt5.TRADE_ACTION_DEAL,
@@ -582,11 +935,12 @@ async def place_order(request: OrderRequest):
         if request.tp:
             order_request["tp"] = request.tp
         
-        result = mt5.order_send(order_request)
+        result = await mt5_worker.call(mt5.order_send, order_request)
         
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             raise HTTPException(status_code=400, detail=f"Order failed: {result.comment}")
         
+        snapshot_poller.poke()
         return {
             "status": "success",
             "message": "Order placed successfully",
@@ -595,6 +949,201 @@ async def place_order(request: OrderRequest):
         }
     except HTTPException:
         raise
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _resolve_symbol(symbol: str) -> Dict[str, Any]:
+    """symbol_info, symbol_select and symbol_info_tick for one symbol, run as a single worker call"""
+    info = mt5.symbol_info(symbol)
+    if info is None:
+        return {"error": f"Symbol {symbol} not found", "status_code": 404}
+    if not info.visible and not mt5.symbol_select(symbol, True):
+        return {"error": f"Failed to select symbol {symbol}", "status_code": 400}
+    tick = mt5.symbol_info_tick(symbol)
+    if tick is None:
+        return {"error": f"Tick data unavailable for {symbol}", "status_code": 400}
+    return {"tick": tick}
+
+
+@app.post("/api/v1/orders/batch")
+async def place_orders_batch(request: BatchOrderRequest):
+    """Place N orders: symbols and ticks are resolved once, then all order_send calls run back to back"""
+    try:
+        if not mt5_manager.connected:
+            raise HTTPException(status_code=400, detail="Not connected to MT5")
+        started = time.perf_counter()
+        
+        symbols = list(dict.fromkeys(order.symbol for order in request.orders))
+        resolved = await mt5_worker.gather(mt5_worker.submit_many([(_resolve_symbol, (symbol,)) for symbol in symbols]))
+        quotes = {}
+        for symbol, outcome in zip(symbols, resolved):
+            quotes[symbol] = {"error": str(outcome.error)} if outcome.error is not None else outcome.value
+        
+        order_type_map = {
+            OrderType.BUY: mt5.ORDER_TYPE_BUY,
+            OrderType.SELL: mt5.ORDER_TYPE_SELL,
+            OrderType.BUY_LIMIT: mt5.ORDER_TYPE_BUY_LIMIT,
+            OrderType.SELL_LIMIT: mt5.ORDER_TYPE_SELL_LIMIT,
+            OrderType.BUY_STOP: mt5.ORDER_TYPE_BUY_STOP,
+            OrderType.SELL_STOP: mt5.ORDER_TYPE_SELL_STOP,
+        }
+        results = [None] * len(request.orders)
+        calls, call_indices = [], []
+        for i, order in enumerate(request.orders):
+            quote = quotes[order.symbol]
+            market = order.order_type in (OrderType.BUY, OrderType.SELL)
+            if "error" in quote:
+                results[i] = {"index": i, "symbol": order.symbol, "status": "error", "error": quote["error"]}
+                continue
+            if not market and not order.price:
+                results[i] = {"index": i, "symbol": order.symbol, "status": "error",
+                              "error": "price is required for pending orders"}
+                continue
+            
+            tick = quote["tick"]
+            order_request = {
+                "action": mt5.TRADE_ACTION_DEAL if market else mt5.TRADE_ACTION_PENDING,
+                "symbol": order.symbol,
+                "volume": order.volume,
+                "type": order_type_map[order.order_type],
+                "price": order.price or (tick.ask if order.order_type == OrderType.BUY else tick.bid),
+                "deviation": order.deviation,
+                "magic": order.magic,
+                "comment": order.comment,
+                "type_time": mt5.ORDER_TIME_GTC,
+                "type_filling": mt5.ORDER_FILLING_IOC,
+            }
+            if order.sl:
+                order_request["sl"] = order.sl
+            if order.tp:
+                order_request["tp"] = order.tp
+            calls.append((mt5.order_send, (order_request,)))
+            call_indices.append(i)
+        
+        sent = await mt5_worker.gather(mt5_worker.submit_many(calls)) if calls else []
+        for i, outcome in zip(call_indices, sent):
+            order = request.orders[i]
+            entry = {"index": i, "symbol": order.symbol, "queued_ms": round(outcome.queued_ms, 3),
+                     "latency_ms": round(outcome.latency_ms, 3)}
+            result = outcome.value
+            if outcome.error is not None or result is None:
+                error = str(outcome.error) if outcome.error is not None else "order_send returned no result"
+                entry.update(status="error", error=error)
+            elif result.retcode not in (mt5.TRADE_RETCODE_DONE, mt5.TRADE_RETCODE_PLACED):
+                entry.update(status="error", retcode=result.retcode, error=f"Order failed: {result.comment}")
+            else:
+                entry.update(status="success", retcode=result.retcode, order_id=result.order, result=result._asdict())
+            results[i] = entry
+        
+        succeeded = sum(1 for entry in results if entry["status"] == "success")
+        if succeeded:
+            snapshot_poller.poke()
+        return {
+            "status": "success" if succeeded == len(results) else "partial" if succeeded else "error",
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "total_ms": round((time.perf_counter() - started) * 1000, 3),
+            "results": results
+        }
+    except HTTPException:
+        raise
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def close_positions(symbol: Optional[str] = None, magic: Optional[int] = None,
+                          side: Optional[PositionSide] = None, comment: str = "Bulk close") -> Dict[str, Any]:
+    """Close every position matching the filters: one snapshot, one tick per symbol, pipelined order_send"""
+    started = time.perf_counter()
+    snapshot = await mt5_worker.call(mt5.positions_get, **({"symbol": symbol} if symbol else {}))
+    side_type = {PositionSide.BUY: mt5.POSITION_TYPE_BUY, PositionSide.SELL: mt5.POSITION_TYPE_SELL}.get(side)
+    positions = [
+        position for position in (snapshot or ())
+        if (magic is None or position.magic == magic) and (side_type is None or position.type == side_type)
+    ]
+    
+    symbols = list(dict.fromkeys(position.symbol for position in positions))
+    ticks = await mt5_worker.gather(mt5_worker.submit_many([(mt5.symbol_info_tick, (name,)) for name in symbols]))
+    ticks = {name: outcome.value for name, outcome in zip(symbols, ticks)}
+    
+    results, calls = [], []
+    for position in positions:
+        entry = {"ticket": position.ticket, "symbol": position.symbol, "volume": position.volume,
+                 "side": PositionSide.BUY.value if position.type == mt5.POSITION_TYPE_BUY else PositionSide.SELL.value}
+        results.append(entry)
+        tick = ticks[position.symbol]
+        if tick is None:
+            entry.update(status="error", error=f"Tick data unavailable for {position.symbol}")
+            continue
+        buy = position.type == mt5.POSITION_TYPE_BUY
+        close_request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": position.symbol,
+            "volume": position.volume,
+            "type": mt5.ORDER_TYPE_SELL if buy else mt5.ORDER_TYPE_BUY,
+            "position": position.ticket,
+            "price": tick.bid if buy else tick.ask,
+            "deviation": 20,
+            "magic": position.magic,
+            "comment": comment,
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+        calls.append((entry, (mt5.order_send, (close_request,))))
+    
+    sent = await mt5_worker.gather(mt5_worker.submit_many([call for _, call in calls])) if calls else []
+    for (entry, _), outcome in zip(calls, sent):
+        entry.update(queued_ms=round(outcome.queued_ms, 3), latency_ms=round(outcome.latency_ms, 3))
+        result = outcome.value
+        if outcome.error is not None or result is None:
+            error = str(outcome.error) if outcome.error is not None else "order_send returned no result"
+            entry.update(status="error", error=error)
+        elif result.retcode != mt5.TRADE_RETCODE_DONE:
+            entry.update(status="error", retcode=result.retcode, error=f"Close failed: {result.comment}")
+        else:
+            entry.update(status="success", retcode=result.retcode, order_id=result.order)
+    
+    closed = sum(1 for entry in results if entry["status"] == "success")
+    if closed:
+        snapshot_poller.poke()
+    return {
+        "status": "success" if closed == len(results) else "partial" if closed else "error",
+        "matched": len(results),
+        "closed": closed,
+        "failed": len(results) - closed,
+        "total_ms": round((time.perf_counter() - started) * 1000, 3),
+        "results": results
+    }
+
+
+@app.post("/api/v1/positions/close")
+async def close_positions_bulk(request: BulkCloseRequest):
+    """Close all positions matching symbol, magic and/or side"""
+    try:
+        if not mt5_manager.connected:
+            raise HTTPException(status_code=400, detail="Not connected to MT5")
+        return await close_positions(symbol=request.symbol, magic=request.magic, side=request.side)
+    except HTTPException:
+        raise
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/v1/positions/flatten")
+async def flatten_positions():
+    """Close every open position"""
+    try:
+        if not mt5_manager.connected:
+            raise HTTPException(status_code=400, detail="Not connected to MT5")
+        return await close_positions(comment="Flatten")
+    except HTTPException:
+        raise
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -604,14 +1153,17 @@ async def close_position(position_id: int):
         if not mt5_manager.connected:
             raise HTTPException(status_code=400, detail="Not connected to MT5")
         
-        positions = mt5.positions_get(ticket=position_id)
+        positions = await mt5_worker.call(mt5.positions_get, ticket=position_id)
         if not positions:
             raise HTTPException(status_code=404, detail=f"Position {position_id} not found")
         
         position = positions[0]
         
         order_type = mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
-        price = mt5.symbol_info_tick(position.symbol).bid if position.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(position.symbol).ask
+        tick = await mt5_worker.call(mt5.symbol_info_tick, position.symbol)
+        if tick is None:
+            raise HTTPException(status_code=400, detail=f"Tick data unavailable for {position.symbol}")
+        price = tick.bid if position.type == mt5.ORDER_TYPE_BUY else tick.ask
         
         close_request = {
             "action": mt5.TRADE_ACTION_DEAL,
@@ -627,11 +1179,12 @@ async def close_position(position_id: int):
             "type_filling": mt5.ORDER_FILLING_IOC,
         }
         
-        result = mt5.order_send(close_request)
+        result = await mt5_worker.call(mt5.order_send, close_request)
         
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             raise HTTPException(status_code=400, detail=f"Close failed: {result.comment}")
         
+        snapshot_poller.poke()
         return {
             "status": "success",
             "message": "Position closed successfully",
@@ -639,36 +1192,16 @@ async def close_position(position_id: int):
         }
     except HTTPException:
         raise
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/historical-data")
 async def get_historical_data(request: HistoricalDataRequest):
     try:
-        if not mt5_manager.connected:
-            raise HTTPException(status_code=400, detail="Not connected to MT5")
-        
-        timeframe_map = {
-            TimeFrame.M1: mt5.TIMEFRAME_M1,
-            TimeFrame.M5: mt5.TIMEFRAME_M5,
-            TimeFrame.M15: mt5.TIMEFRAME_M15,
-            TimeFrame.M30: mt5.TIMEFRAME_M30,
-            TimeFrame.H1: mt5.TIMEFRAME_H1,
-            TimeFrame.H4: mt5.TIMEFRAME_H4,
-            TimeFrame.D1: mt5.TIMEFRAME_D1,
-            TimeFrame.W1: mt5.TIMEFRAME_W1,
-            TimeFrame.MN1: mt5.TIMEFRAME_MN1,
-        }
-        
-        rates = mt5.copy_rates_range(
-            request.symbol,
-            timeframe_map[request.timeframe],
-            request.start_date,
-            request.end_date
-        )
-        
-        if rates is None or len(rates) == 0:
-            raise HTTPException(status_code=404, detail="No data found for the specified parameters")
+        rates = await mt5_worker.call(fetch_rates, request.symbol, request.timeframe, request.start_date,
+                                      request.end_date, "No data found for the specified parameters")
         
         df = pd.DataFrame(rates)
         df['time'] = pd.to_datetime(df['time'], unit='s')
@@ -682,45 +1215,38 @@ async def get_historical_data(request: HistoricalDataRequest):
         }
     except HTTPException:
         raise
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/v1/backtest")
-async def backtest_strategy(request: BacktestRequest):
+async def backtest_strategy(request: BacktestRequest, trace_memory: bool = False):
+    """Run a backtest; the response carries per-phase `timings` (trace_memory adds allocated bytes)"""
+    timer = PhaseTimer(trace_memory=trace_memory)
     try:
-        if not mt5_manager.connected:
-            raise HTTPException(status_code=400, detail="Not connected to MT5")
-            
-        timeframe_map = {
-            TimeFrame.M1: mt5.TIMEFRAME_M1,
-            TimeFrame.M5: mt5.TIMEFRAME_M5,
-            TimeFrame.M15: mt5.TIMEFRAME_M15,
-            TimeFrame.M30: mt5.TIMEFRAME_M30,
-            TimeFrame.H1: mt5.TIMEFRAME_H1,
-            TimeFrame.H4: mt5.TIMEFRAME_H4,
-            TimeFrame.D1: mt5.TIMEFRAME_D1,
-            TimeFrame.W1: mt5.TIMEFRAME_W1,
-            TimeFrame.MN1: mt5.TIMEFRAME_MN1,
-        }
-        
-        # Fetch data
-        rates = mt5.copy_rates_range(
-            request.symbol,
-            timeframe_map[request.timeframe],
-            request.start_date,
-            request.end_date
-        )
+        timer.start('fetch')
+        rates = await mt5_worker.call(fetch_rates, request.symbol, request.timeframe, request.start_date,
+                                      request.end_date)
+        timer.stop(bars=len(rates))
+        spec = await resolve_spec(request.symbol)
         
-        if rates is None or len(rates) == 0:
-            raise HTTPException(status_code=404, detail="No historical data found to run simulation")
+        cache_key = backtest_cache_key(request, rates, spec)
+        if cache_key is not None:
+            with timer.phase('cache_lookup'):
+                cached = backtest_cache.get(cache_key)
+            if cached is not None:
+                return timed_json_response(cached, timer, headers={"X-Cache": "HIT"})
             
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
+        with timer.phase('dataframe', bars=len(rates)):
+            df = pd.DataFrame(rates)
+            df['time'] = pd.to_datetime(df['time'], unit='s')
         
         tester = EATester()
         # Process indicator strategy
-        df_processed = tester.run_strategy(df, request.strategy_name, request.strategy_params)
+        with timer.phase(f'signals:{request.strategy_name}', bars=len(df)):
+            df_processed = tester.run_strategy(df, request.strategy_name, request.strategy_params)
         
         # Execute backtest
         results = tester.backtest(
@@ -729,57 +1255,194 @@ async def backtest_strategy(request: BacktestRequest):
             lot_size=request.lot_size,
             stop_loss_pips=request.stop_loss_pips,
             take_profit_pips=request.take_profit_pips,
-            exit_on_opposite_signal=request.exit_on_opposite_signal
+            exit_on_opposite_signal=request.exit_on_opposite_signal,
+            timer=timer,
+            spec=spec
         )
         
-        return results
+        if cache_key is not None:
+            backtest_cache.put(cache_key, results)
+        return timed_json_response(results, timer, headers={"X-Cache": "MISS"} if cache_key is not None else None)
+    except HTTPException:
+        raise
     except ValueError as val_err:
         raise HTTPException(status_code=400, detail=str(val_err))
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        timer.close()
 
 
 @app.post("/api/v1/optimize")
-async def optimize_strategy(request: OptimizeRequest):
+async def optimize_strategy(request: OptimizeRequest, trace_memory: bool = False):
+    """Grid-search strategy parameters; `timings` phases are summed over all permutations"""
+    timer = PhaseTimer(trace_memory=trace_memory)
     try:
-        if not mt5_manager.connected:
-            raise HTTPException(status_code=400, detail="Not connected to MT5")
-            
-        timeframe_map = {
-            TimeFrame.M1: mt5.TIMEFRAME_M1,
-            TimeFrame.M5: mt5.TIMEFRAME_M5,
-            TimeFrame.M15: mt5.TIMEFRAME_M15,
-            TimeFrame.M30: mt5.TIMEFRAME_M30,
-            TimeFrame.H1: mt5.TIMEFRAME_H1,
-            TimeFrame.H4: mt5.TIMEFRAME_H4,
-            TimeFrame.D1: mt5.TIMEFRAME_D1,
-            TimeFrame.W1: mt5.TIMEFRAME_W1,
-            TimeFrame.MN1: mt5.TIMEFRAME_MN1,
-        }
-        
-        rates = mt5.copy_rates_range(
-            request.symbol,
-            timeframe_map[request.timeframe],
-            request.start_date,
-            request.end_date
-        )
-        
-        if rates is None or len(rates) == 0:
-            raise HTTPException(status_code=404, detail="No historical data found for optimization")
+        timer.start('fetch')
+        rates = await mt5_worker.call(fetch_rates, request.symbol, request.timeframe, request.start_date,
+                                      request.end_date, "No historical data found for optimization")
+        timer.stop(bars=len(rates))
             
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
+        with timer.phase('dataframe', bars=len(rates)):
+            df = pd.DataFrame(rates)
+            df['time'] = pd.to_datetime(df['time'], unit='s')
         
         tester = EATester()
         optimization_results = tester.optimize_parameters(
             df,
             strategy_name=request.strategy_name,
-            param_ranges=request.param_ranges
+            param_ranges=request.param_ranges,
+            timer=timer,
+            objective=request.objective,
+            top_k=request.top_k,
+            keep_results=request.keep_results,
+            pareto_objectives=request.pareto_objectives,
+            spec=await resolve_spec(request.symbol)
         )
         
-        return optimization_results
+        return timed_json_response(optimization_results, timer)
+    except HTTPException:
+        raise
+    except ValueError as val_err:
+        raise HTTPException(status_code=400, detail=str(val_err))
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        timer.close()
+
+
+@app.post("/api/v1/backtest/portfolio")
+async def backtest_portfolio(request: PortfolioBacktestRequest):
+    """Sum of each leg's P&L over one balance; no margin is modelled and legs keep trading past a stop-out"""
+    try:
+        rates_by_symbol = {}
+        for leg in request.legs:
+            if leg.symbol not in rates_by_symbol:
+                rates_by_symbol[leg.symbol] = await mt5_worker.call(
+                    fetch_rates, leg.symbol, request.timeframe, request.start_date, request.end_date,
+                    f"No historical data found for {leg.symbol}"
+                )
+        
+        specs = {symbol: await resolve_spec(symbol) for symbol in rates_by_symbol}
+        # Leg simulations run in worker processes; wait for them off the event loop
+        return await run_in_threadpool(
+            portfolio_backtester.run,
+            [dict(leg.model_dump(), symbol_spec=spec_dict(specs[leg.symbol])) for leg in request.legs],
+            rates_by_symbol,
+            request.initial_balance
+        )
+    except HTTPException:
+        raise
+    except ValueError as val_err:
+        raise HTTPException(status_code=400, detail=str(val_err))
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/v1/backtest/monte-carlo")
+async def backtest_monte_carlo(request: MonteCarloRequest):
+    """Percentile bands of final equity and max drawdown over resampled trade sequences"""
+    try:
+        return await run_in_threadpool(
+            monte_carlo.simulate,
+            request.profits,
+            initial_balance=request.initial_balance,
+            paths=request.paths,
+            method=request.method,
+            seed=request.seed,
+            percentiles=request.percentiles
+        )
+    except HTTPException:
+        raise
+    except ValueError as val_err:
+        raise HTTPException(status_code=400, detail=str(val_err))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _submit_job(kind: str, rates, request: BaseModel, cache_key: Optional[str] = None,
+                spec: Optional[SymbolSpec] = None):
+    params = dict(request.model_dump(mode='json'), symbol_spec=spec_dict(spec))
+    try:
+        job = job_manager.submit(kind, rates, params, cache_key=cache_key)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"status": "success", "job": job_manager.describe(job.id)}
+
+
+@app.post("/api/v1/jobs/backtest", status_code=202)
+async def submit_backtest_job(request: BacktestRequest):
+    try:
+        rates = await mt5_worker.call(fetch_rates, request.symbol, request.timeframe, request.start_date,
+                                      request.end_date)
+        spec = await resolve_spec(request.symbol)
+        cache_key = backtest_cache_key(request, rates, spec)
+        if cache_key is not None:
+            cached = backtest_cache.get(cache_key)
+            if cached is not None:
+                job = job_manager.add_completed("backtest", request.model_dump(mode='json'), cached, bars=len(rates))
+                return {"status": "success", "cached": True, "job": job_manager.describe(job.id)}
+        return _submit_job("backtest", rates, request, cache_key=cache_key, spec=spec)
+    except HTTPException:
+        raise
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/v1/jobs/optimize", status_code=202)
+async def submit_optimize_job(request: OptimizeRequest):
+    try:
+        rates = await mt5_worker.call(fetch_rates, request.symbol, request.timeframe, request.start_date,
+                                      request.end_date, "No historical data found for optimization")
+        return _submit_job("optimize", rates, request, spec=await resolve_spec(request.symbol))
+    except HTTPException:
+        raise
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/v1/jobs")
+async def list_jobs(include_finished: bool = False):
+    jobs = job_manager.list_jobs(include_finished=include_finished)
+    return {"status": "success", "data": jobs, "count": len(jobs), "queue": job_manager.stats}
+
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.describe(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {"status": "success", "data": job}
+
+
+@app.get("/api/v1/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=f"Job failed: {job.error}")
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}, no result available yet")
+    return job.result
+
+
+@app.post("/api/v1/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {"status": "success", "data": job_manager.describe(job_id)}
 
 
 @app.post("/api/v1/autotrade/start")
@@ -788,7 +1451,7 @@ async def start_autotrade(request: AutoTradeStartRequest):
         if not mt5_manager.connected:
             raise HTTPException(status_code=400, detail="MT5 is not connected. Connect first.")
         
-        auto_trader.start(
+        await auto_trader.start(
             symbol=request.symbol,
             timeframe=request.timeframe,
             strategy_name=request.strategy_name,
@@ -824,32 +1487,35 @@ async def get_autotrade_status():
 
 
 @app.get("/api/v1/symbols")
-async def get_symbols():
+async def get_symbols(prefix: Optional[str] = None, path: Optional[str] = None, fields: Optional[str] = None,
+                      limit: Optional[int] = Query(default=None, ge=1), cursor: Optional[str] = None,
+                      refresh: bool = False):
+    """Symbols from the cached catalog, ordered by name; prefix matches names, path matches the group path"""
     try:
         if not mt5_manager.connected:
             raise HTTPException(status_code=400, detail="Not connected to MT5")
         
-        symbols = mt5.symbols_get()
-        if symbols is None:
-            return {"status": "success", "data": [], "count": 0}
-        
-        symbol_list = [
-            {
-                "name": s.name,
-                "description": s.description,
-                "path": s.path,
-                "currency_base": s.currency_base,
-                "currency_profit": s.currency_profit,
-                "currency_margin": s.currency_margin,
-                "digits": s.digits,
-                "trade_mode": s.trade_mode,
-            }
-            for s in symbols
-        ]
+        if symbol_catalog.fresh and not refresh:
+            rows, names = symbol_catalog.get()
+        else:
+            rows, names = await mt5_worker.call(symbol_catalog.get, refresh)
+        selected = parse_fields(fields, symbol_catalog.fields) or list(DEFAULT_SYMBOL_FIELDS)
+        if prefix:
+            lo, hi = prefix_range(names, prefix)
+            rows, names = rows[lo:hi], names[lo:hi]
+        if path:
+            rows = [row for row in rows if row['path'].startswith(path)]
+            names = [row['name'] for row in rows]
         
-        return {"status": "success", "data": symbol_list, "count": len(symbol_list)}
+        page, next_cursor = paginate(rows, names, limit or len(rows), cursor)
+        return {"status": "success", "data": project(page, selected), "count": len(page), "total": len(rows),
+                "next_cursor": next_cursor}
     except HTTPException:
         raise
+    except ValueError as val_err:
+        raise HTTPException(status_code=400, detail=str(val_err))
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -859,7 +1525,7 @@ async def get_symbol_tick(symbol: str):
         if not mt5_manager.connected:
             raise HTTPException(status_code=400, detail="Not connected to MT5")
         
-        tick = mt5.symbol_info_tick(symbol)
+        tick = await mt5_worker.call(mt5.symbol_info_tick, symbol)
         if tick is None:
             raise HTTPException(status_code=404, detail=f"Symbol {symbol} not found")
         
@@ -870,24 +1536,81 @@ async def get_symbol_tick(symbol: str):
         }
     except HTTPException:
         raise
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/symbol/{symbol}/spec")
+async def get_symbol_spec(symbol: str, refresh: bool = False):
+    """Cached contract spec used by backtests and live orders; refresh=true reloads it from the terminal"""
+    try:
+        if refresh:
+            symbol_specs.invalidate(symbol)
+        spec = await resolve_spec(symbol)
+        if spec is None:
+            raise HTTPException(status_code=404, detail=f"No contract spec for {symbol}")
+        return {"status": "success", "symbol": symbol, "data": spec.to_dict()}
+    except HTTPException:
+        raise
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/history/deals")
-async def get_deals_history(start_date: datetime, end_date: datetime):
+async def get_deals_history(start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                            symbol: Optional[str] = None, magic: Optional[int] = None,
+                            position: Optional[int] = None, limit: int = Query(default=1000, ge=1, le=10000),
+                            cursor: Optional[str] = None, sync: bool = False, prefix: Optional[str] = None,
+                            fields: Optional[str] = None):
+    """Deals from the local store (filtered, paginated via next_cursor); sync=true pulls new deals first
+
+    Until the store has synced, the same filters and paging apply to history_deals_get over start/end_date.
+    """
     try:
+        if deals_store is not None and deals_sync is not None:
+            if sync and mt5_manager.connected:
+                await deals_sync.sync_now()
+            if deals_store.watermark is not None:
+                page = await run_in_threadpool(deals_store.query, start_date, end_date, symbol, magic, position,
+                                               limit, cursor, prefix, parse_fields(fields, DEALS_COLUMNS))
+                return {"status": "success", **page, "synced_through": deals_store.watermark}
+        
         if not mt5_manager.connected:
             raise HTTPException(status_code=400, detail="Not connected to MT5")
+        if start_date is None or end_date is None:
+            raise HTTPException(status_code=400, detail="start_date and end_date are required until the deals store has synced")
         
-        deals = mt5.history_deals_get(start_date, end_date)
-        if deals is None:
-            return {"status": "success", "data": [], "count": 0}
-        
-        deals_list = [deal._asdict() for deal in deals]
-        
-        return {"status": "success", "data": deals_list, "count": len(deals_list)}
+        deals = await mt5_worker.call(mt5.history_deals_get, start_date, end_date)
+        # Same filters, projection and paging as the store, applied to the terminal's answer
+        page = query_deals(deals or (), symbol, magic, position, limit, cursor, prefix,
+                           parse_fields(fields, DEALS_COLUMNS))
+        return {"status": "success", **page}
     except HTTPException:
         raise
+    except ValueError as val_err:
+        raise HTTPException(status_code=400, detail=str(val_err))
+    except MT5QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/v1/history/deals/summary")
+async def get_deals_summary(group_by: str = 'magic', start_date: Optional[datetime] = None,
+                            end_date: Optional[datetime] = None, symbol: Optional[str] = None,
+                            magic: Optional[int] = None, prefix: Optional[str] = None):
+    """Deal count, volume and profit/commission/swap/fee/net per magic, symbol or day from the local store"""
+    try:
+        if deals_store is None or deals_store.watermark is None:
+            raise HTTPException(status_code=503, detail="Deals store has not synced yet")
+        rows = await run_in_threadpool(deals_store.aggregate, group_by, start_date, end_date, symbol, magic, prefix)
+        return {"status": "success", "group_by": group_by, "data": rows, "count": len(rows),
+                "synced_through": deals_store.watermark}
+    except HTTPException:
+        raise
+    except ValueError as val_err:
+        raise HTTPException(status_code=400, detail=str(val_err))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -896,8 +1619,39 @@ async def health_check():
     return {
         "status": "healthy",
         "mt5_connected": mt5_manager.connected,
+        "mt5_connection": connection_supervisor.status(),
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+def require_admin(admin_key: Optional[str]):
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not is_admin(admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+
+@app.get("/api/v1/profiles")
+async def list_profiles(x_admin_key: Optional[str] = Header(None)):
+    require_admin(x_admin_key)
+    return {"profiles": [profile.to_dict() for profile in profile_store.list()]}
+
+@app.get("/api/v1/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = "speedscope", x_admin_key: Optional[str] = Header(None)):
+    """Download a request profile as speedscope JSON or collapsed stacks (format=collapsed)"""
+    require_admin(x_admin_key)
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    if format == "speedscope":
+        return profile.speedscope()
+    raise HTTPException(status_code=400, detail="format must be 'speedscope' or 'collapsed'")
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host=settings.API_HOST, port=settings.API_PORT, reload=True)
@@ -0,0 +1,356 @@
+"""
+Lightweight Prometheus-compatible metrics.
+
+A dependency-free registry of counters, gauges and histograms rendered in the
+Prometheus text exposition format (version 0.0.4) by the ``/metrics``
+endpoint. Updates take one uncontended lock and a dict lookup, so the hot-path
+instrumentation below is cheap enough to leave on in production:
+
+- ``MetricsMiddleware``: per-route request latency, counts and in-flight gauge,
+  labelled by the route template rather than the raw path to bound cardinality;
+- ``InstrumentedMT5``: a transparent proxy around the MT5 module (real,
+  stubbed or simulated) timing every call and counting failed ones;
+- module-level metrics that ``ea_tester`` and ``main`` update directly.
+
+Gauges and counters may also be backed by a callback evaluated at scrape time,
+which is how cache and job queue statistics are exported without touching
+their hot paths.
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + '}'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def get(self, name: str) -> Optional["_Metric"]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for suffix, names, values, value in metric.samples():
+                lines.append(f'{metric.name}{suffix}{_format_labels(names, values)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class _Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = registry,
+                 function: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Callback metrics return a number, or {label values tuple: number} when labelled
+        self.function = function
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames and function is None:
+            # Unlabelled metrics are exported as 0 before their first update
+            self.labels()
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} is labelled; use .labels(...)")
+        return self.labels()
+
+    def _callback_samples(self) -> Iterable[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        value = self.function()
+        if isinstance(value, dict):
+            for label_values, v in value.items():
+                yield '', self.labelnames, tuple(label_values), float(v)
+        else:
+            yield '', self.labelnames, (), float(value)
+
+    def samples(self):
+        if self.function is not None:
+            return list(self._callback_samples())
+        with self._lock:
+            children = list(self._children.items())
+        return [sample for key, child in children for sample in self._child_samples(key, child)]
+
+    def _child_samples(self, key, child):
+        yield '', self.labelnames, key, child.value
+
+
+class _Value:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('_target', '_start')
+
+    def __init__(self, target):
+        self._target = target
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._target.observe(time.perf_counter() - self._start)
+        return False
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional[Registry] = registry):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self) -> _Timer:
+        return self._default().time()
+
+    def _child_samples(self, key, child):
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        names = self.labelnames + ('le',)
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            yield '_bucket', names, key + (_format_value(bound),), cumulative
+        yield '_sum', self.labelnames, key, total
+        yield '_count', self.labelnames, key, count
+
+
+# ---------------------------------------------------------------------- hot-path metrics
+
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route template', ['method', 'route'])
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by route template and status code', ['method', 'route', 'status'])
+HTTP_IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests currently being served')
+
+MT5_CALL_DURATION = Histogram(
+    'mt5_call_duration_seconds', 'Latency of MetaTrader5 API calls', ['function'],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+MT5_CALL_ERRORS = Counter(
+    'mt5_call_errors_total', 'MetaTrader5 API calls that raised or returned None/False', ['function'])
+
+MT5_WORKER_QUEUE_WAIT = Histogram(
+    'mt5_worker_queue_wait_seconds', 'Time MetaTrader5 calls spent queued for the single MT5 worker thread')
+
+MT5_PROBE_DURATION = Histogram(
+    'mt5_probe_duration_seconds', 'Latency of connection supervisor health probes, including timeouts')
+MT5_RECONNECTS = Counter('mt5_reconnects_total', 'Successful automatic reconnects to the MT5 terminal')
+MT5_RECONNECT_FAILURES = Counter('mt5_reconnect_failures_total', 'Failed automatic reconnect attempts')
+
+BACKTEST_BARS = Counter('backtest_bars_total', 'Bars simulated by in-process backtests')
+BACKTEST_DURATION = Histogram('backtest_duration_seconds', 'Duration of in-process backtests')
+BACKTEST_BARS_PER_SECOND = Gauge('backtest_bars_per_second', 'Throughput of the most recent backtest')
+OPTIMIZER_EVALUATIONS = Counter('optimizer_evaluations_total', 'Parameter sets evaluated by in-process optimizations')
+OPTIMIZER_EVALUATIONS_PER_SECOND = Gauge(
+    'optimizer_evaluations_per_second', 'Evaluation rate of the most recent optimization')
+
+AUTOTRADER_LOOP_DURATION = Histogram('autotrader_loop_duration_seconds', 'Work time of one AutoTrader iteration')
+AUTOTRADER_LOOP_DRIFT = Gauge(
+    'autotrader_loop_drift_seconds', 'How late the latest AutoTrader iteration started versus its schedule')
+
+
+class InstrumentedMT5:
+    """
+    Proxy for the MetaTrader5 module that records call latency and failures.
+
+    Constants and other non-callable attributes pass straight through; wrapped
+    functions are created once per name and cached on the proxy.
+    """
+
+    def __init__(self, module: Any):
+        object.__setattr__(self, '_module', module)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._module, name)
+        if name.startswith('_') or name.isupper() or not callable(attr):
+            return attr
+        duration = MT5_CALL_DURATION.labels(name)
+        errors = MT5_CALL_ERRORS.labels(name)
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                duration.observe(time.perf_counter() - start)
+            if result is None or result is False:
+                errors.inc()
+            return result
+
+        call.__name__ = name
+        object.__setattr__(self, name, call)
+        return call
+
+
+def instrument_mt5(module: Any) -> Any:
+    """Wrap ``module`` in an :class:`InstrumentedMT5` unless it already is one."""
+    return module if isinstance(module, InstrumentedMT5) else InstrumentedMT5(module)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (cheaper than BaseHTTPMiddleware) recording per-route latency."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            method = scope['method']
+            HTTP_REQUEST_DURATION.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
@@ -0,0 +1,88 @@
+"""
+Monte Carlo robustness analysis of a backtest's closed trades.
+
+Each path replays the trade P&L sequence in a different order and tracks
+equity at trade closes:
+
+- ``bootstrap`` draws the trades with replacement, so both the final equity
+  and the drawdown vary between paths;
+- ``shuffle`` permutes the actual trades. The final equity is then the same on
+  every path, and only the order (and so the drawdown) changes.
+
+Paths are simulated as (paths, trades) matrices, a chunk of rows at a time, so
+memory stays bounded by ``MONTE_CARLO_BATCH_BYTES`` however many paths are
+requested. Drawdowns are in percent, as in ``EATester.backtest``.
+"""
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+METHODS = ('bootstrap', 'shuffle')
+DEFAULT_PERCENTILES = (5.0, 25.0, 50.0, 75.0, 95.0)
+# Memory cap for one chunk of simulated equity paths
+MONTE_CARLO_BATCH_BYTES = 32 * 1024 * 1024
+
+
+def trade_profits(backtest_result: Dict[str, Any]) -> np.ndarray:
+    """Per-trade P&L of an ``EATester.backtest`` result, in close order."""
+    return np.array([trade['profit'] for trade in backtest_result.get('trades', [])], dtype=np.float64)
+
+
+def _bands(values: np.ndarray, percentiles: Sequence[float]) -> Dict[str, float]:
+    return {f"p{q:g}": float(v) for q, v in zip(percentiles, np.percentile(values, percentiles))}
+
+
+def simulate(profits: Iterable[float], initial_balance: float = 10000.0, paths: int = 10000,
+             method: str = 'bootstrap', seed: Optional[int] = None,
+             percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+    """Percentile bands of final equity, total return and max drawdown over ``paths`` resampled trade sequences."""
+    profits = np.asarray(list(profits), dtype=np.float64)
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    if len(profits) == 0:
+        raise ValueError("Need at least one trade to resample")
+    if not np.all(np.isfinite(profits)):
+        raise ValueError("Trade profits must be finite")
+    if paths < 1:
+        raise ValueError("paths must be at least 1")
+    if initial_balance <= 0:
+        raise ValueError("initial_balance must be positive")
+    percentiles = [float(q) for q in percentiles]
+    if any(not 0 <= q <= 100 for q in percentiles):
+        raise ValueError("percentiles must be between 0 and 100")
+
+    rng = np.random.default_rng(seed)
+    trades = len(profits)
+    # cumsum, running max and drawdown each hold one float64 matrix
+    chunk = max(1, MONTE_CARLO_BATCH_BYTES // (3 * 8 * trades))
+    final_equity = np.empty(paths)
+    max_drawdown = np.empty(paths)
+    for lo in range(0, paths, chunk):
+        rows = min(chunk, paths - lo)
+        if method == 'bootstrap':
+            sampled = profits[rng.integers(0, trades, size=(rows, trades))]
+        else:
+            sampled = rng.permuted(np.broadcast_to(profits, (rows, trades)), axis=1)
+        equity = np.cumsum(sampled, axis=1)
+        equity += initial_balance
+        # The starting balance is the first peak
+        running_max = np.maximum(np.maximum.accumulate(equity, axis=1), initial_balance)
+        drawdown = (running_max - equity) / running_max * 100
+        # Equity below zero is a blown account: cap at a total loss
+        np.minimum(drawdown, 100.0, out=drawdown)
+        final_equity[lo:lo + rows] = equity[:, -1]
+        max_drawdown[lo:lo + rows] = drawdown.max(axis=1)
+
+    total_return = (final_equity / initial_balance - 1) * 100
+    return {
+        'method': method,
+        'paths': paths,
+        'trades': trades,
+        'initial_balance': float(initial_balance),
+        'final_equity': _bands(final_equity, percentiles),
+        'total_return': _bands(total_return, percentiles),
+        'max_drawdown': _bands(max_drawdown, percentiles),
+        'probability_of_loss': float(np.mean(final_equity < initial_balance)),
+        'mean_final_equity': float(final_equity.mean()),
+        'mean_max_drawdown': float(max_drawdown.mean()),
+    }
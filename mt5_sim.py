@@ -0,0 +1,876 @@
+"""
+Deterministic, in-process MetaTrader 5 simulator.
+
+Implements the subset of the ``MetaTrader5`` package API used by this project
+so the real request paths can be exercised, profiled and load tested on Linux
+and in CI without a Windows terminal:
+
+- seeded synthetic M1 price paths per symbol, from which every timeframe is
+  resampled, plus ticks derived from the same path;
+- a matching engine for ``order_send`` (market deals, pending orders, SL/TP
+  modification, removal and position closing) that maintains positions,
+  orders, deals and the account balance;
+- configurable per-call latency to mimic terminal IPC round-trips.
+
+Prices are a deterministic function of (seed, symbol, time): daily anchor
+prices follow a mean-reverting walk and each trading day is filled in with a
+Brownian bridge of one-minute steps, so any range can be generated without
+simulating everything before it. Pass ``start_time`` to freeze the clock for
+fully reproducible runs and move it with :meth:`SimulatedMT5.advance`.
+"""
+import calendar
+import fnmatch
+import hashlib
+import threading
+import time as _time
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from resample import resample_rates, timeframe_seconds
+
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+TICKS_DTYPE = np.dtype([
+    ('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<u8'),
+    ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8'),
+])
+
+AccountInfo = namedtuple('AccountInfo', [
+    'login', 'trade_mode', 'leverage', 'limit_orders', 'margin_so_mode', 'trade_allowed', 'trade_expert',
+    'margin_mode', 'currency_digits', 'fifo_close', 'balance', 'credit', 'profit', 'equity', 'margin',
+    'margin_free', 'margin_level', 'margin_so_call', 'margin_so_so', 'margin_initial', 'margin_maintenance',
+    'assets', 'liabilities', 'commission_blocked', 'name', 'server', 'currency', 'company',
+])
+TerminalInfo = namedtuple('TerminalInfo', [
+    'community_account', 'community_connection', 'connected', 'dlls_allowed', 'trade_allowed',
+    'tradeapi_disabled', 'email_enabled', 'ftp_enabled', 'notifications_enabled', 'mqid', 'build',
+    'maxbars', 'codepage', 'ping_last', 'community_balance', 'retransmission', 'company', 'name',
+    'language', 'path', 'data_path', 'commondata_path',
+])
+SymbolInfo = namedtuple('SymbolInfo', [
+    'name', 'description', 'path', 'currency_base', 'currency_profit', 'currency_margin', 'digits',
+    'point', 'spread', 'trade_mode', 'trade_contract_size', 'trade_tick_value', 'trade_tick_size',
+    'volume_min', 'volume_max', 'volume_step', 'trade_stops_level', 'visible', 'select', 'bid', 'ask',
+    'time',
+])
+Tick = namedtuple('Tick', ['time', 'bid', 'ask', 'last', 'volume', 'time_msc', 'flags', 'volume_real'])
+TradePosition = namedtuple('TradePosition', [
+    'ticket', 'time', 'time_msc', 'time_update', 'time_update_msc', 'type', 'magic', 'identifier',
+    'reason', 'volume', 'price_open', 'sl', 'tp', 'price_current', 'swap', 'profit', 'symbol',
+    'comment', 'external_id',
+])
+TradeOrder = namedtuple('TradeOrder', [
+    'ticket', 'time_setup', 'time_setup_msc', 'time_done', 'time_done_msc', 'time_expiration', 'type',
+    'type_time', 'type_filling', 'state', 'magic', 'position_id', 'position_by_id', 'reason',
+    'volume_initial', 'volume_current', 'price_open', 'sl', 'tp', 'price_current', 'price_stoplimit',
+    'symbol', 'comment', 'external_id',
+])
+TradeDeal = namedtuple('TradeDeal', [
+    'ticket', 'order', 'time', 'time_msc', 'type', 'entry', 'magic', 'position_id', 'reason', 'volume',
+    'price', 'commission', 'swap', 'profit', 'fee', 'symbol', 'comment', 'external_id',
+])
+OrderSendResult = namedtuple('OrderSendResult', [
+    'retcode', 'deal', 'order', 'volume', 'price', 'bid', 'ask', 'comment', 'request_id',
+    'retcode_external', 'request',
+])
+
+# name, description, path, base, profit, digits, contract size, base price, daily vol, spread points, trades weekends
+DEFAULT_SYMBOLS = [
+    ('EURUSD', 'Euro vs US Dollar', 'Forex\\Majors\\EURUSD', 'EUR', 'USD', 5, 100000.0, 1.0850, 0.005, 10, False),
+    ('GBPUSD', 'Great Britain Pound vs US Dollar', 'Forex\\Majors\\GBPUSD', 'GBP', 'USD', 5, 100000.0, 1.2650, 0.006, 12, False),
+    ('USDJPY', 'US Dollar vs Japanese Yen', 'Forex\\Majors\\USDJPY', 'USD', 'JPY', 3, 100000.0, 148.50, 0.006, 12, False),
+    ('USDCHF', 'US Dollar vs Swiss Franc', 'Forex\\Majors\\USDCHF', 'USD', 'CHF', 5, 100000.0, 0.8850, 0.005, 14, False),
+    ('AUDUSD', 'Australian Dollar vs US Dollar', 'Forex\\Majors\\AUDUSD', 'AUD', 'USD', 5, 100000.0, 0.6550, 0.007, 12, False),
+    ('USDCAD', 'US Dollar vs Canadian Dollar', 'Forex\\Majors\\USDCAD', 'USD', 'CAD', 5, 100000.0, 1.3550, 0.005, 14, False),
+    ('NZDUSD', 'New Zealand Dollar vs US Dollar', 'Forex\\Majors\\NZDUSD', 'NZD', 'USD', 5, 100000.0, 0.6100, 0.007, 16, False),
+    ('EURGBP', 'Euro vs Great Britain Pound', 'Forex\\Crosses\\EURGBP', 'EUR', 'GBP', 5, 100000.0, 0.8580, 0.004, 15, False),
+    ('EURJPY', 'Euro vs Japanese Yen', 'Forex\\Crosses\\EURJPY', 'EUR', 'JPY', 3, 100000.0, 161.20, 0.007, 18, False),
+    ('XAUUSD', 'Gold vs US Dollar', 'Metals\\XAUUSD', 'XAU', 'USD', 2, 100.0, 2050.00, 0.010, 25, False),
+    ('BTCUSD', 'Bitcoin vs US Dollar', 'Crypto\\BTCUSD', 'BTC', 'USD', 2, 1.0, 43000.00, 0.030, 1500, True),
+]
+
+_TIMEFRAMES = {
+    1: 'M1', 5: 'M5', 15: 'M15', 30: 'M30', 16385: 'H1', 16388: 'H4', 16408: 'D1', 32769: 'W1', 49153: 'MN1',
+}
+
+_PENDING_TYPES = (2, 3, 4, 5)
+_DAY = 86400
+_MINUTES = 1440
+
+
+class _SymbolModel:
+    """Deterministic price path for one symbol."""
+
+    def __init__(self, spec: Tuple, seed: int, day_cache: int = 256):
+        (self.name, self.description, self.path, self.base, self.profit_currency, self.digits,
+         self.contract_size, self.base_price, self.daily_vol, self.spread, self.trades_weekends) = spec
+        self.point = 10.0 ** -self.digits
+        self.seed = seed
+        self.key = int.from_bytes(hashlib.blake2b(self.name.encode(), digest_size=4).digest(), 'little')
+        self._log_anchors = np.empty(0)
+        self._days: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._day_cache = day_cache
+
+    def _anchors(self, last_day: int) -> np.ndarray:
+        # Mean-reverting daily walk in log space keeps prices near their base for decades
+        if len(self._log_anchors) <= last_day + 1:
+            size = (last_day // 4096 + 1) * 4096 + 1
+            shocks = np.random.default_rng([self.seed, self.key, 0]).normal(0, self.daily_vol, size)
+            anchors = np.empty(size)
+            level = 0.0
+            for i in range(size):
+                level = 0.995 * level + shocks[i]
+                anchors[i] = level
+            self._log_anchors = anchors
+        return self._log_anchors
+
+    def is_trading_day(self, day: int) -> bool:
+        return self.trades_weekends or (day + 3) % 7 < 5
+
+    def day_bars(self, day: int) -> np.ndarray:
+        """All M1 bars of one calendar day (empty on weekends for FX and metals)."""
+        cached = self._days.get(day)
+        if cached is not None:
+            self._days.move_to_end(day)
+            return cached
+        if not self.is_trading_day(day):
+            bars = np.empty(0, dtype=RATES_DTYPE)
+        else:
+            anchors = self._anchors(day + 1)
+            rng = np.random.default_rng([self.seed, self.key, 1, day])
+            sigma = self.daily_vol / np.sqrt(_MINUTES)
+            walk = np.cumsum(rng.normal(0, sigma, _MINUTES))
+            frac = np.arange(1, _MINUTES + 1) / _MINUTES
+            log_close = anchors[day] + frac * (anchors[day + 1] - anchors[day]) + walk - frac * walk[-1]
+            close = np.round(self.base_price * np.exp(log_close), self.digits)
+            open_ = np.r_[np.round(self.base_price * np.exp(anchors[day]), self.digits), close[:-1]]
+            wick = np.abs(rng.normal(0, sigma * 0.5, (2, _MINUTES))) * close
+            bars = np.empty(_MINUTES, dtype=RATES_DTYPE)
+            bars['time'] = day * _DAY + np.arange(_MINUTES) * 60
+            bars['open'] = open_
+            bars['close'] = close
+            bars['high'] = np.round(np.maximum(open_, close) + wick[0], self.digits)
+            bars['low'] = np.round(np.minimum(open_, close) - wick[1], self.digits)
+            bars['tick_volume'] = rng.poisson(60, _MINUTES) + 1
+            bars['spread'] = self.spread
+            bars['real_volume'] = 0
+        self._days[day] = bars
+        while len(self._days) > self._day_cache:
+            self._days.popitem(last=False)
+        return bars
+
+    def m1_range(self, start: int, end: int) -> np.ndarray:
+        """M1 bars with open time in [start, end]."""
+        if end < start:
+            return np.empty(0, dtype=RATES_DTYPE)
+        days = [self.day_bars(day) for day in range(start // _DAY, end // _DAY + 1)]
+        bars = np.concatenate(days) if days else np.empty(0, dtype=RATES_DTYPE)
+        lo, hi = np.searchsorted(bars['time'], [start, end + 1])
+        return bars[lo:hi]
+
+    def price_at(self, ts: float) -> Tuple[float, int]:
+        """Bid price at a moment in time and the time of the last tick (market may be closed)."""
+        minute = int(ts // 60) * 60
+        bars = self.m1_range(minute - 7 * _DAY, minute)
+        if len(bars) == 0:
+            return round(self.base_price, self.digits), int(ts)
+        last = bars[-1]
+        if int(last['time']) == minute:
+            frac = (ts - minute) / 60.0
+            return round(float(last['open'] + (last['close'] - last['open']) * frac), self.digits), int(ts)
+        return float(last['close']), int(last['time']) + 59
+
+
+class SimulatedMT5:
+    # Timeframes
+    TIMEFRAME_M1 = 1
+    TIMEFRAME_M5 = 5
+    TIMEFRAME_M15 = 15
+    TIMEFRAME_M30 = 30
+    TIMEFRAME_H1 = 16385
+    TIMEFRAME_H4 = 16388
+    TIMEFRAME_D1 = 16408
+    TIMEFRAME_W1 = 32769
+    TIMEFRAME_MN1 = 49153
+
+    # Order types
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    ORDER_TYPE_BUY_LIMIT = 2
+    ORDER_TYPE_SELL_LIMIT = 3
+    ORDER_TYPE_BUY_STOP = 4
+    ORDER_TYPE_SELL_STOP = 5
+
+    # Trade actions
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_PENDING = 5
+    TRADE_ACTION_SLTP = 6
+    TRADE_ACTION_MODIFY = 7
+    TRADE_ACTION_REMOVE = 8
+
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_FOK = 0
+    ORDER_FILLING_IOC = 1
+    ORDER_FILLING_RETURN = 2
+
+    ORDER_STATE_STARTED = 0
+    ORDER_STATE_PLACED = 1
+    ORDER_STATE_CANCELED = 2
+    ORDER_STATE_FILLED = 4
+
+    POSITION_TYPE_BUY = 0
+    POSITION_TYPE_SELL = 1
+
+    DEAL_TYPE_BUY = 0
+    DEAL_TYPE_SELL = 1
+    DEAL_TYPE_BALANCE = 2
+    DEAL_ENTRY_IN = 0
+    DEAL_ENTRY_OUT = 1
+
+    DEAL_REASON_CLIENT = 0
+    DEAL_REASON_EXPERT = 3
+    DEAL_REASON_SL = 4
+    DEAL_REASON_TP = 5
+
+    TRADE_RETCODE_REQUOTE = 10004
+    TRADE_RETCODE_REJECT = 10006
+    TRADE_RETCODE_PLACED = 10008
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_INVALID = 10013
+    TRADE_RETCODE_INVALID_VOLUME = 10014
+    TRADE_RETCODE_INVALID_PRICE = 10015
+    TRADE_RETCODE_INVALID_STOPS = 10016
+    TRADE_RETCODE_NO_MONEY = 10019
+    TRADE_RETCODE_CONNECTION = 10031
+    TRADE_RETCODE_POSITION_CLOSED = 10036
+
+    RES_S_OK = 1
+    RES_E_FAIL = -1
+    RES_E_INVALID_PARAMS = -2
+    RES_E_NOT_FOUND = -4
+    RES_E_INTERNAL_FAIL_INIT = -10003
+
+    COPY_TICKS_ALL = -1
+
+    def __init__(self, seed: int = 42, balance: float = 10000.0, leverage: int = 100,
+                 latency: Optional[Dict[str, float]] = None, start_time: Optional[datetime] = None,
+                 symbols: Optional[List[Tuple]] = None, execution: str = 'market'):
+        self.seed = seed
+        # 'market' fills at the current price like most retail servers; 'instant' requotes beyond the deviation
+        self.execution = execution
+        self.initial_balance = balance
+        self.leverage = leverage
+        self.latency = dict(latency or {})
+        self._symbols = {spec[0]: _SymbolModel(spec, seed) for spec in (symbols or DEFAULT_SYMBOLS)}
+        self._selected = {name for name in self._symbols if not self._symbols[name].trades_weekends}
+        self._clock = None if start_time is None else float(_to_epoch(start_time))
+        self._lock = threading.RLock()
+        self._initialized = False
+        self._last_error = (self.RES_S_OK, 'Success')
+        self.login = None
+        self.server = None
+        self.reset()
+
+    # ------------------------------------------------------------------ control
+
+    def reset(self):
+        """Clear all trading state and restore the starting balance."""
+        with self._lock:
+            self.balance = float(self.initial_balance)
+            self._positions: Dict[int, Dict[str, Any]] = {}
+            self._orders: Dict[int, Dict[str, Any]] = {}
+            self._history_orders: List[Dict[str, Any]] = []
+            self._deals: List[Dict[str, Any]] = []
+            self._next_ticket = 100000001
+
+    def set_latency(self, function: str, seconds: float):
+        """Delay every call to ``function`` (or all calls for ``'*'``) by ``seconds``."""
+        self.latency[function] = seconds
+
+    def advance(self, seconds: float):
+        """Move a frozen clock forward and let the matching engine react to the new prices."""
+        with self._lock:
+            if self._clock is None:
+                raise RuntimeError("advance() requires a simulator created with start_time")
+            self._clock += seconds
+            self._match()
+
+    def simulate_disconnect(self):
+        """Drop the terminal connection as if the terminal had been closed."""
+        with self._lock:
+            self._initialized = False
+            self._last_error = (self.RES_E_INTERNAL_FAIL_INIT, 'Terminal connection lost')
+
+    def now(self) -> float:
+        return _time.time() if self._clock is None else self._clock
+
+    def _delay(self, function: str):
+        # Called before taking the lock, so a slow call never stalls the others
+        seconds = self.latency.get(function, self.latency.get('*', 0.0))
+        if seconds > 0:
+            _time.sleep(seconds)
+
+    def _call(self, function: str) -> bool:
+        if not self._initialized:
+            self._last_error = (self.RES_E_INTERNAL_FAIL_INIT, 'IPC initialize failed, terminal is not running')
+            return False
+        self._last_error = (self.RES_S_OK, 'Success')
+        return True
+
+    def _ticket(self) -> int:
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        return ticket
+
+    # ------------------------------------------------------------------ session
+
+    def initialize(self, path: Optional[str] = None, login: Optional[int] = None,
+                   password: Optional[str] = None, server: Optional[str] = None, **kwargs) -> bool:
+        self._delay('initialize')
+        with self._lock:
+            self._initialized = True
+            self.login = login or 10000001
+            self.server = server or 'Simulator-Demo'
+            self._last_error = (self.RES_S_OK, 'Success')
+            return True
+
+    def shutdown(self):
+        self._delay('shutdown')
+        with self._lock:
+            self._initialized = False
+
+    def last_error(self) -> Tuple[int, str]:
+        return self._last_error
+
+    def version(self):
+        return (500, 4000, '01 Jan 2024') if self._initialized else None
+
+    def terminal_info(self) -> Optional[TerminalInfo]:
+        self._delay('terminal_info')
+        if not self._call('terminal_info'):
+            return None
+        return TerminalInfo(
+            False, False, True, False, True, False, False, False, False, False, 4000, 100000, 0,
+            1500, 0.0, 0.0, 'MT5 Simulator', 'MetaTrader 5 Simulator', 'English', '', '', ''
+        )
+
+    def account_info(self) -> Optional[AccountInfo]:
+        self._delay('account_info')
+        with self._lock:
+            if not self._call('account_info'):
+                return None
+            self._match()
+            return self._account_info()
+
+    def _account_info(self) -> AccountInfo:
+        profit = sum(self._position_profit(p) for p in self._positions.values())
+        margin = sum(self._margin(p['symbol'], p['volume'], p['price_open']) for p in self._positions.values())
+        equity = self.balance + profit
+        return AccountInfo(
+            self.login, 0, self.leverage, 200, 0, True, True, 2, 2, False, round(self.balance, 2), 0.0,
+            round(profit, 2), round(equity, 2), round(margin, 2), round(equity - margin, 2),
+            round(equity / margin * 100, 2) if margin else 0.0, 50.0, 30.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+            'Simulated Account', self.server, 'USD', 'MT5 Simulator'
+        )
+
+    # ------------------------------------------------------------------ symbols
+
+    def _symbol_info(self, model: _SymbolModel) -> SymbolInfo:
+        bid, tick_time = model.price_at(self.now())
+        return SymbolInfo(
+            model.name, model.description, model.path, model.base, model.profit_currency, 'USD',
+            model.digits, model.point, model.spread, 4, model.contract_size,
+            self._tick_value(model, bid), model.point, 0.01, 100.0, 0.01, 0,
+            model.name in self._selected, model.name in self._selected,
+            bid, round(bid + model.spread * model.point, model.digits), tick_time
+        )
+
+    def symbols_total(self) -> int:
+        self._delay('symbols_total')
+        return len(self._symbols) if self._call('symbols_total') else 0
+
+    def symbols_get(self, group: Optional[str] = None) -> Optional[Tuple[SymbolInfo, ...]]:
+        self._delay('symbols_get')
+        with self._lock:
+            if not self._call('symbols_get'):
+                return None
+            models = [m for m in self._symbols.values() if _matches_group(m.name, group)]
+            return tuple(self._symbol_info(m) for m in models)
+
+    def symbol_info(self, symbol: str) -> Optional[SymbolInfo]:
+        self._delay('symbol_info')
+        with self._lock:
+            if not self._call('symbol_info'):
+                return None
+            model = self._symbols.get(symbol)
+            if model is None:
+                self._last_error = (self.RES_E_NOT_FOUND, f'Symbol {symbol} not found')
+                return None
+            return self._symbol_info(model)
+
+    def symbol_select(self, symbol: str, enable: bool = True) -> bool:
+        self._delay('symbol_select')
+        with self._lock:
+            if not self._call('symbol_select') or symbol not in self._symbols:
+                return False
+            if enable:
+                self._selected.add(symbol)
+            else:
+                self._selected.discard(symbol)
+            return True
+
+    def symbol_info_tick(self, symbol: str) -> Optional[Tick]:
+        self._delay('symbol_info_tick')
+        with self._lock:
+            if not self._call('symbol_info_tick'):
+                return None
+            model = self._symbols.get(symbol)
+            if model is None:
+                return None
+            bid, tick_time = model.price_at(self.now())
+            ask = round(bid + model.spread * model.point, model.digits)
+            return Tick(tick_time, bid, ask, 0.0, 0, int(tick_time * 1000), 6, 0.0)
+
+    # ------------------------------------------------------------------ market data
+
+    def _bars(self, model: _SymbolModel, timeframe: int, start: int, end: int) -> np.ndarray:
+        name = _TIMEFRAMES.get(timeframe)
+        if name is None:
+            raise ValueError(f"Unsupported timeframe {timeframe}")
+        end = min(end, int(self.now()))
+        if name == 'M1':
+            return model.m1_range(start, end)
+        # Generate from the first M1 bar of the target bucket so edge bars are complete
+        span_start = start - (start % _DAY) - (31 * _DAY if name in ('W1', 'MN1') else 0)
+        bars = resample_rates(model.m1_range(span_start, end), name)
+        return bars[(bars['time'] >= start) & (bars['time'] <= end)]
+
+    def copy_rates_range(self, symbol: str, timeframe: int, date_from, date_to) -> Optional[np.ndarray]:
+        self._delay('copy_rates_range')
+        with self._lock:
+            if not self._call('copy_rates_range'):
+                return None
+            model = self._symbols.get(symbol)
+            if model is None:
+                self._last_error = (self.RES_E_NOT_FOUND, f'Symbol {symbol} not found')
+                return None
+            return self._bars(model, timeframe, _to_epoch(date_from), _to_epoch(date_to))
+
+    def copy_rates_from(self, symbol: str, timeframe: int, date_from, count: int) -> Optional[np.ndarray]:
+        self._delay('copy_rates_from')
+        with self._lock:
+            if not self._call('copy_rates_from'):
+                return None
+            return self._last_bars(symbol, timeframe, _to_epoch(date_from), 0, count)
+
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int) -> Optional[np.ndarray]:
+        self._delay('copy_rates_from_pos')
+        with self._lock:
+            if not self._call('copy_rates_from_pos'):
+                return None
+            return self._last_bars(symbol, timeframe, int(self.now()), start_pos, count)
+
+    def _last_bars(self, symbol: str, timeframe: int, end: int, start_pos: int, count: int) -> Optional[np.ndarray]:
+        model = self._symbols.get(symbol)
+        if model is None:
+            self._last_error = (self.RES_E_NOT_FOUND, f'Symbol {symbol} not found')
+            return None
+        name = _TIMEFRAMES.get(timeframe)
+        if name is None:
+            raise ValueError(f"Unsupported timeframe {timeframe}")
+        period = timeframe_seconds(name) or 31 * _DAY
+        wanted = start_pos + count
+        span = wanted * period * 7 // 5 + 3 * _DAY
+        while True:
+            bars = self._bars(model, timeframe, end - span, end)
+            if len(bars) >= wanted or span > 40 * 365 * _DAY:
+                break
+            span *= 2
+        stop = len(bars) - start_pos
+        return bars[max(0, stop - count):max(0, stop)]
+
+    def copy_ticks_range(self, symbol: str, date_from, date_to, flags: int = -1) -> Optional[np.ndarray]:
+        """Four synthetic ticks per M1 bar (open, high/low in path order, close)."""
+        self._delay('copy_ticks_range')
+        with self._lock:
+            if not self._call('copy_ticks_range'):
+                return None
+            model = self._symbols.get(symbol)
+            if model is None:
+                return None
+            bars = model.m1_range(_to_epoch(date_from), min(_to_epoch(date_to), int(self.now())))
+            up = bars['close'] >= bars['open']
+            path = np.stack([bars['open'], np.where(up, bars['low'], bars['high']),
+                             np.where(up, bars['high'], bars['low']), bars['close']], axis=1).ravel()
+            ticks = np.zeros(len(path), dtype=TICKS_DTYPE)
+            ticks['time_msc'] = (np.repeat(bars['time'], 4) * 1000 + np.tile([0, 15000, 30000, 59000], len(bars)))
+            ticks['time'] = ticks['time_msc'] // 1000
+            ticks['bid'] = path
+            ticks['ask'] = np.round(path + model.spread * model.point, model.digits)
+            ticks['flags'] = 6
+            return ticks
+
+    # ------------------------------------------------------------------ trading state
+
+    def _tick_value(self, model: _SymbolModel, price: float) -> float:
+        return self._to_account_currency(model, model.point * model.contract_size, price)
+
+    def _to_account_currency(self, model: _SymbolModel, amount: float, price: float) -> float:
+        if model.profit_currency == 'USD':
+            return amount
+        if model.base == 'USD' and price:
+            return amount / price
+        return amount
+
+    def _margin(self, symbol: str, volume: float, price: float) -> float:
+        model = self._symbols[symbol]
+        if model.base == 'USD':
+            return volume * model.contract_size / self.leverage
+        notional = self._to_account_currency(model, volume * model.contract_size * price, price)
+        return notional / self.leverage
+
+    def _position_profit(self, position: Dict[str, Any], price: Optional[float] = None) -> float:
+        model = self._symbols[position['symbol']]
+        if price is None:
+            price = self._close_price(position)
+        direction = 1 if position['type'] == self.POSITION_TYPE_BUY else -1
+        raw = (price - position['price_open']) * direction * position['volume'] * model.contract_size
+        return self._to_account_currency(model, raw, price)
+
+    def _quote(self, symbol: str) -> Tuple[float, float]:
+        model = self._symbols[symbol]
+        bid, _ = model.price_at(self.now())
+        return bid, round(bid + model.spread * model.point, model.digits)
+
+    def _close_price(self, position: Dict[str, Any]) -> float:
+        bid, ask = self._quote(position['symbol'])
+        return bid if position['type'] == self.POSITION_TYPE_BUY else ask
+
+    def _match(self):
+        """Trigger pending orders and SL/TP levels at the current prices."""
+        now = self.now()
+        for ticket, order in list(self._orders.items()):
+            bid, ask = self._quote(order['symbol'])
+            price, level = (ask if order['type'] in (2, 4) else bid), order['price_open']
+            triggered = {
+                self.ORDER_TYPE_BUY_LIMIT: price <= level,
+                self.ORDER_TYPE_SELL_LIMIT: price >= level,
+                self.ORDER_TYPE_BUY_STOP: price >= level,
+                self.ORDER_TYPE_SELL_STOP: price <= level,
+            }[order['type']]
+            if triggered:
+                del self._orders[ticket]
+                side = self.ORDER_TYPE_BUY if order['type'] in (2, 4) else self.ORDER_TYPE_SELL
+                self._open_position(order, side, price, now, order_ticket=ticket)
+        for ticket, position in list(self._positions.items()):
+            price = self._close_price(position)
+            is_buy = position['type'] == self.POSITION_TYPE_BUY
+            sl, tp = position['sl'], position['tp']
+            if sl and (price <= sl if is_buy else price >= sl):
+                self._close_position(position, position['volume'], sl, now, self.DEAL_REASON_SL, 'sl')
+            elif tp and (price >= tp if is_buy else price <= tp):
+                self._close_position(position, position['volume'], tp, now, self.DEAL_REASON_TP, 'tp')
+
+    def _record_order(self, request: Dict[str, Any], order_type: int, price: float, now: float,
+                      state: int, ticket: Optional[int] = None, position_id: int = 0) -> int:
+        ticket = ticket or self._ticket()
+        self._history_orders.append({
+            'ticket': ticket, 'time_setup': int(now), 'time_setup_msc': int(now * 1000),
+            'time_done': int(now), 'time_done_msc': int(now * 1000), 'time_expiration': 0,
+            'type': order_type, 'type_time': request.get('type_time', 0),
+            'type_filling': request.get('type_filling', 0), 'state': state,
+            'magic': request.get('magic', 0), 'position_id': position_id, 'position_by_id': 0,
+            'reason': self.DEAL_REASON_EXPERT, 'volume_initial': request['volume'], 'volume_current': 0.0,
+            'price_open': price, 'sl': request.get('sl', 0.0) or 0.0, 'tp': request.get('tp', 0.0) or 0.0,
+            'price_current': price, 'price_stoplimit': 0.0, 'symbol': request['symbol'],
+            'comment': request.get('comment', ''), 'external_id': '',
+        })
+        return ticket
+
+    def _record_deal(self, order_ticket: int, position: Dict[str, Any], deal_type: int, entry: int,
+                     volume: float, price: float, profit: float, now: float, reason: int, comment: str) -> int:
+        ticket = self._ticket()
+        self._deals.append({
+            'ticket': ticket, 'order': order_ticket, 'time': int(now), 'time_msc': int(now * 1000),
+            'type': deal_type, 'entry': entry, 'magic': position['magic'], 'position_id': position['ticket'],
+            'reason': reason, 'volume': volume, 'price': price, 'commission': 0.0, 'swap': 0.0,
+            'profit': round(profit, 2), 'fee': 0.0, 'symbol': position['symbol'], 'comment': comment,
+            'external_id': '',
+        })
+        return ticket
+
+    def _open_position(self, request: Dict[str, Any], side: int, price: float, now: float,
+                       order_ticket: Optional[int] = None) -> Tuple[int, int]:
+        order_ticket = self._record_order(request, side, price, now, self.ORDER_STATE_FILLED, ticket=order_ticket)
+        position = {
+            'ticket': order_ticket, 'time': int(now), 'time_msc': int(now * 1000),
+            'type': side, 'magic': request.get('magic', 0), 'volume': float(request['volume']),
+            'price_open': price, 'sl': float(request.get('sl') or 0.0), 'tp': float(request.get('tp') or 0.0),
+            'symbol': request['symbol'], 'comment': request.get('comment', ''),
+        }
+        self._history_orders[-1]['position_id'] = order_ticket
+        self._positions[order_ticket] = position
+        deal = self._record_deal(order_ticket, position, side, self.DEAL_ENTRY_IN, position['volume'], price,
+                                 0.0, now, self.DEAL_REASON_EXPERT, position['comment'])
+        return order_ticket, deal
+
+    def _close_position(self, position: Dict[str, Any], volume: float, price: float, now: float,
+                        reason: int, comment: str, order_ticket: Optional[int] = None) -> int:
+        closing = {**position, 'volume': volume}
+        profit = self._position_profit(closing, price)
+        self.balance += round(profit, 2)
+        side = self.ORDER_TYPE_SELL if position['type'] == self.POSITION_TYPE_BUY else self.ORDER_TYPE_BUY
+        if order_ticket is None:
+            order_ticket = self._record_order({**position, 'volume': volume}, side, price, now,
+                                              self.ORDER_STATE_FILLED, position_id=position['ticket'])
+        deal = self._record_deal(order_ticket, position, side, self.DEAL_ENTRY_OUT, volume, price, profit,
+                                 now, reason, comment)
+        remaining = round(position['volume'] - volume, 8)
+        if remaining <= 0:
+            del self._positions[position['ticket']]
+        else:
+            position['volume'] = remaining
+        return deal
+
+    def _result(self, retcode: int, request: Dict[str, Any], comment: str, deal: int = 0, order: int = 0,
+                price: float = 0.0) -> OrderSendResult:
+        bid, ask = self._quote(request['symbol']) if request.get('symbol') in self._symbols else (0.0, 0.0)
+        return OrderSendResult(retcode, deal, order, float(request.get('volume', 0.0)), price, bid, ask,
+                               comment, 0, 0, request)
+
+    def order_send(self, request: Dict[str, Any]) -> Optional[OrderSendResult]:
+        self._delay('order_send')
+        with self._lock:
+            if not self._call('order_send'):
+                return None
+            self._match()
+            action = request.get('action')
+            symbol = request.get('symbol')
+            now = self.now()
+            if action == self.TRADE_ACTION_REMOVE:
+                order = self._orders.pop(request.get('order'), None)
+                if order is None:
+                    return self._result(self.TRADE_RETCODE_INVALID, request, 'Invalid request')
+                self._record_order(order, order['type'], order['price_open'], now, self.ORDER_STATE_CANCELED,
+                                   ticket=order['ticket'])
+                return self._result(self.TRADE_RETCODE_DONE, request, 'Request executed', order=order['ticket'])
+            if action == self.TRADE_ACTION_SLTP:
+                position = self._positions.get(request.get('position'))
+                if position is None:
+                    return self._result(self.TRADE_RETCODE_POSITION_CLOSED, request, 'Position doesn\'t exist')
+                position['sl'] = float(request.get('sl') or 0.0)
+                position['tp'] = float(request.get('tp') or 0.0)
+                return self._result(self.TRADE_RETCODE_DONE, request, 'Request executed')
+
+            model = self._symbols.get(symbol)
+            if model is None:
+                return self._result(self.TRADE_RETCODE_INVALID, request, f'Unknown symbol {symbol}')
+            volume = float(request.get('volume', 0.0))
+            if volume < 0.01 or volume > 100.0 or abs(round(volume / 0.01) * 0.01 - volume) > 1e-9:
+                return self._result(self.TRADE_RETCODE_INVALID_VOLUME, request, 'Invalid volume')
+            order_type = request.get('type')
+            bid, ask = self._quote(symbol)
+
+            if action == self.TRADE_ACTION_PENDING:
+                if order_type not in _PENDING_TYPES or not request.get('price'):
+                    return self._result(self.TRADE_RETCODE_INVALID_PRICE, request, 'Invalid price')
+                ticket = self._ticket()
+                self._orders[ticket] = {
+                    'ticket': ticket, 'time_setup': int(now), 'type': order_type, 'symbol': symbol,
+                    'volume': volume, 'price_open': float(request['price']),
+                    'sl': float(request.get('sl') or 0.0), 'tp': float(request.get('tp') or 0.0),
+                    'magic': request.get('magic', 0), 'comment': request.get('comment', ''),
+                    'type_time': request.get('type_time', 0), 'type_filling': request.get('type_filling', 0),
+                }
+                return self._result(self.TRADE_RETCODE_DONE, request, 'Request executed', order=ticket,
+                                    price=float(request['price']))
+
+            if action != self.TRADE_ACTION_DEAL or order_type not in (self.ORDER_TYPE_BUY, self.ORDER_TYPE_SELL):
+                return self._result(self.TRADE_RETCODE_INVALID, request, 'Invalid request')
+            price = ask if order_type == self.ORDER_TYPE_BUY else bid
+            requested = request.get('price')
+            deviation = request.get('deviation', 0)
+            if self.execution == 'instant' and requested \
+                    and abs(requested - price) > max(deviation, 0) * model.point + 1e-12:
+                return self._result(self.TRADE_RETCODE_REQUOTE, request, 'Requote', price=price)
+
+            if request.get('position'):
+                position = self._positions.get(request['position'])
+                if position is None:
+                    return self._result(self.TRADE_RETCODE_POSITION_CLOSED, request, 'Position doesn\'t exist')
+                if order_type == position['type'] or volume > position['volume'] + 1e-9:
+                    return self._result(self.TRADE_RETCODE_INVALID, request, 'Invalid request')
+                order_ticket = self._record_order(request, order_type, price, now, self.ORDER_STATE_FILLED,
+                                                  position_id=position['ticket'])
+                deal = self._close_position(position, volume, price, now, self.DEAL_REASON_EXPERT,
+                                            request.get('comment', ''), order_ticket=order_ticket)
+                return self._result(self.TRADE_RETCODE_DONE, request, 'Request executed', deal=deal,
+                                    order=order_ticket, price=price)
+
+            sl, tp = float(request.get('sl') or 0.0), float(request.get('tp') or 0.0)
+            is_buy = order_type == self.ORDER_TYPE_BUY
+            if (sl and (sl >= price if is_buy else sl <= price)) or (tp and (tp <= price if is_buy else tp >= price)):
+                return self._result(self.TRADE_RETCODE_INVALID_STOPS, request, 'Invalid stops')
+            account = self._account_info()
+            if self._margin(symbol, volume, price) > account.margin_free:
+                return self._result(self.TRADE_RETCODE_NO_MONEY, request, 'No money')
+            order_ticket, deal = self._open_position(request, order_type, price, now)
+            return self._result(self.TRADE_RETCODE_DONE, request, 'Request executed', deal=deal,
+                                order=order_ticket, price=price)
+
+    def order_calc_margin(self, action: int, symbol: str, volume: float, price: float) -> Optional[float]:
+        self._delay('order_calc_margin')
+        with self._lock:
+            if not self._call('order_calc_margin') or symbol not in self._symbols:
+                return None
+            return round(self._margin(symbol, volume, price), 2)
+
+    def order_calc_profit(self, action: int, symbol: str, volume: float, price_open: float,
+                          price_close: float) -> Optional[float]:
+        self._delay('order_calc_profit')
+        with self._lock:
+            if not self._call('order_calc_profit') or symbol not in self._symbols:
+                return None
+            position = {'symbol': symbol, 'type': action, 'volume': volume, 'price_open': price_open}
+            return round(self._position_profit(position, price_close), 2)
+
+    # ------------------------------------------------------------------ queries
+
+    def positions_total(self) -> int:
+        self._delay('positions_total')
+        with self._lock:
+            return len(self._positions) if self._call('positions_total') else 0
+
+    def positions_get(self, symbol: Optional[str] = None, group: Optional[str] = None,
+                      ticket: Optional[int] = None) -> Optional[Tuple[TradePosition, ...]]:
+        self._delay('positions_get')
+        with self._lock:
+            if not self._call('positions_get'):
+                return None
+            self._match()
+            result = []
+            for p in self._positions.values():
+                if (symbol and p['symbol'] != symbol) or (ticket and p['ticket'] != ticket) \
+                        or not _matches_group(p['symbol'], group):
+                    continue
+                current = self._close_price(p)
+                result.append(TradePosition(
+                    p['ticket'], p['time'], p['time_msc'], p['time'], p['time_msc'], p['type'], p['magic'],
+                    p['ticket'], self.DEAL_REASON_EXPERT, p['volume'], p['price_open'], p['sl'], p['tp'],
+                    current, 0.0, round(self._position_profit(p, current), 2), p['symbol'], p['comment'], ''
+                ))
+            return tuple(result)
+
+    def orders_total(self) -> int:
+        self._delay('orders_total')
+        with self._lock:
+            return len(self._orders) if self._call('orders_total') else 0
+
+    def orders_get(self, symbol: Optional[str] = None, group: Optional[str] = None,
+                   ticket: Optional[int] = None) -> Optional[Tuple[TradeOrder, ...]]:
+        self._delay('orders_get')
+        with self._lock:
+            if not self._call('orders_get'):
+                return None
+            self._match()
+            result = []
+            for o in self._orders.values():
+                if (symbol and o['symbol'] != symbol) or (ticket and o['ticket'] != ticket) \
+                        or not _matches_group(o['symbol'], group):
+                    continue
+                bid, ask = self._quote(o['symbol'])
+                result.append(TradeOrder(
+                    o['ticket'], o['time_setup'], o['time_setup'] * 1000, 0, 0, 0, o['type'], o['type_time'],
+                    o['type_filling'], self.ORDER_STATE_PLACED, o['magic'], 0, 0, self.DEAL_REASON_EXPERT,
+                    o['volume'], o['volume'], o['price_open'], o['sl'], o['tp'],
+                    ask if o['type'] in (2, 4) else bid, 0.0, o['symbol'], o['comment'], ''
+                ))
+            return tuple(result)
+
+    def history_deals_total(self, date_from, date_to) -> int:
+        deals = self.history_deals_get(date_from, date_to)
+        return len(deals) if deals is not None else 0
+
+    def history_deals_get(self, date_from=None, date_to=None, group: Optional[str] = None,
+                          ticket: Optional[int] = None, position: Optional[int] = None) -> Optional[Tuple[TradeDeal, ...]]:
+        self._delay('history_deals_get')
+        with self._lock:
+            if not self._call('history_deals_get'):
+                return None
+            self._match()
+            deals = self._deals
+            if ticket is not None:
+                deals = [d for d in deals if d['order'] == ticket]
+            elif position is not None:
+                deals = [d for d in deals if d['position_id'] == position]
+            else:
+                start, end = _to_epoch(date_from), _to_epoch(date_to)
+                deals = [d for d in deals if start <= d['time'] <= end and _matches_group(d['symbol'], group)]
+            return tuple(TradeDeal(**d) for d in deals)
+
+    def history_orders_get(self, date_from=None, date_to=None, group: Optional[str] = None,
+                           ticket: Optional[int] = None, position: Optional[int] = None) -> Optional[Tuple[TradeOrder, ...]]:
+        self._delay('history_orders_get')
+        with self._lock:
+            if not self._call('history_orders_get'):
+                return None
+            orders = self._history_orders
+            if ticket is not None:
+                orders = [o for o in orders if o['ticket'] == ticket]
+            elif position is not None:
+                orders = [o for o in orders if o['position_id'] == position]
+            else:
+                start, end = _to_epoch(date_from), _to_epoch(date_to)
+                orders = [o for o in orders if start <= o['time_setup'] <= end and _matches_group(o['symbol'], group)]
+            return tuple(TradeOrder(**o) for o in orders)
+
+
+def _to_epoch(value) -> int:
+    """Epoch seconds for datetimes (naive values are taken as-is) and numeric timestamps."""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    if value.tzinfo is not None:
+        return calendar.timegm(value.utctimetuple())
+    return calendar.timegm(value.timetuple())
+
+
+def _matches_group(symbol: str, group: Optional[str]) -> bool:
+    """MT5 group filters: comma separated wildcards, '!' excludes."""
+    if not group:
+        return True
+    matched = False
+    for pattern in group.split(','):
+        pattern = pattern.strip()
+        if pattern.startswith('!'):
+            if fnmatch.fnmatchcase(symbol, pattern[1:]):
+                return False
+        elif fnmatch.fnmatchcase(symbol, pattern):
+            matched = True
+    return matched
+
+
+_simulator = None
+_simulator_lock = threading.Lock()
+
+
+def get_simulator() -> SimulatedMT5:
+    """Process-wide simulator configured from settings, shared by every module that needs MT5."""
+    global _simulator
+    with _simulator_lock:
+        if _simulator is None:
+            from config import settings
+            latency = {'*': settings.MT5_SIM_LATENCY_MS / 1000.0} if settings.MT5_SIM_LATENCY_MS else {}
+            _simulator = SimulatedMT5(
+                seed=settings.MT5_SIM_SEED,
+                balance=settings.MT5_SIM_BALANCE,
+                latency=latency,
+                start_time=datetime.fromisoformat(settings.MT5_SIM_START_TIME) if settings.MT5_SIM_START_TIME else None
+            )
+        return _simulator
@@ -0,0 +1,102 @@
+"""
+Single-threaded queue for MetaTrader5 terminal calls.
+
+The MetaTrader5 package talks to one terminal over IPC and is not safe to
+call from several threads at once. :class:`MT5Worker` runs every submitted
+call on one dedicated thread in submission order. Batch endpoints enqueue all
+of their calls up front, so the terminal handles them back to back with no
+event loop or HTTP round-trip between two orders.
+
+Every call goes through :meth:`MT5Worker.submit` and resolves to a
+:class:`TimedResult`, which records how long the call waited in the queue and
+how long it ran.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Tuple
+
+import metrics
+
+
+class MT5QueueFull(Exception):
+    pass
+
+
+class TimedResult:
+    __slots__ = ('value', 'error', 'queued_ms', 'latency_ms')
+
+    def __init__(self, value: Any, error: Any, queued_ms: float, latency_ms: float):
+        self.value = value
+        # The exception raised by the call, if any; batch callers report it per item
+        self.error = error
+        self.queued_ms = queued_ms
+        self.latency_ms = latency_ms
+
+
+class MT5Worker:
+    def __init__(self, max_queue: int = 1024):
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mt5-worker')
+        self._lock = threading.Lock()
+        self.pending = 0
+
+    def _run(self, submitted: float, fn: Callable, args: Tuple, kwargs: dict) -> TimedResult:
+        started = time.perf_counter()
+        metrics.MT5_WORKER_QUEUE_WAIT.observe(started - submitted)
+        value, error = None, None
+        try:
+            value = fn(*args, **kwargs)
+        except Exception as e:
+            error = e
+        finished = time.perf_counter()
+        with self._lock:
+            self.pending -= 1
+        return TimedResult(value, error, (started - submitted) * 1000, (finished - started) * 1000)
+
+    def _release_cancelled(self, future: Future):
+        # A call cancelled while still queued (e.g. its caller timed out) never reaches _run
+        if future.cancelled():
+            with self._lock:
+                self.pending -= 1
+
+    def submit(self, fn: Callable, *args, **kwargs) -> "Future[TimedResult]":
+        with self._lock:
+            if self.pending >= self.max_queue:
+                raise MT5QueueFull(f"MT5 worker queue is full ({self.max_queue} calls pending)")
+            self.pending += 1
+        try:
+            future = self._executor.submit(self._run, time.perf_counter(), fn, args, kwargs)
+        except RuntimeError:
+            with self._lock:
+                self.pending -= 1
+            raise
+        future.add_done_callback(self._release_cancelled)
+        return future
+
+    def submit_many(self, calls: List[Tuple[Callable, Tuple]]) -> List["Future[TimedResult]"]:
+        """Enqueue (fn, args) pairs atomically, so they run back to back in order."""
+        with self._lock:
+            if self.pending + len(calls) > self.max_queue:
+                raise MT5QueueFull(f"MT5 worker queue cannot take {len(calls)} more calls "
+                                   f"({self.pending} of {self.max_queue} pending)")
+            self.pending += len(calls)
+            submitted = time.perf_counter()
+            futures = [self._executor.submit(self._run, submitted, fn, args, {}) for fn, args in calls]
+        for future in futures:
+            future.add_done_callback(self._release_cancelled)
+        return futures
+
+    async def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run one call on the worker and return its value (re-raising its exception)."""
+        result = await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+        if result.error is not None:
+            raise result.error
+        return result.value
+
+    async def gather(self, futures: List["Future[TimedResult]"]) -> List[TimedResult]:
+        return list(await asyncio.gather(*(asyncio.wrap_future(future) for future in futures)))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
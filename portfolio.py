@@ -0,0 +1,169 @@
+"""
+Multi-symbol portfolio backtests as a P&L aggregation over one balance.
+
+Every leg (symbol + strategy) is simulated on its own bars, in parallel worker
+processes when there are several legs. Legs trade fixed lot sizes, so their
+profit and loss does not depend on the shared balance; the combined account is
+built afterwards by aligning each leg's mark-to-market P&L onto the merged time
+axis and summing the aligned matrix.
+
+This is not a margin simulation. No leg checks free margin before opening a
+position, and legs do not see each other. "Stopped out" only marks the first
+time combined equity reaches zero. The account curves are frozen from then
+on, but each leg's summary and trades still cover the whole range.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ea_tester import EATester
+from symbol_specs import SymbolSpec
+
+logger = logging.getLogger(__name__)
+
+
+def run_leg(rates: np.ndarray, leg: Dict[str, Any]) -> Dict[str, Any]:
+    """Simulate one leg and return its P&L path on its own time axis."""
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+
+    tester = EATester()
+    signal = tester.signals(df, leg['strategy_name'], leg.get('strategy_params', {}))
+    # P&L only (starting from 0); risk metrics belong to the combined account, not a zero-based leg curve
+    result = tester.backtest_arrays(
+        df['time'].to_numpy(), rates['close'], signal, high=rates['high'], low=rates['low'],
+        initial_balance=0.0,
+        lot_size=leg.get('lot_size', 0.1),
+        stop_loss_pips=leg.get('stop_loss_pips', 0.0),
+        take_profit_pips=leg.get('take_profit_pips', 0.0),
+        exit_on_opposite_signal=leg.get('exit_on_opposite_signal', True),
+        risk=False,
+        spec=SymbolSpec.from_dict(leg['symbol_spec']) if leg.get('symbol_spec') else None
+    )
+    trades = result['trades']
+    times = np.asarray(rates['time'], dtype=np.int64)
+    return {
+        'times': times,
+        'pnl': np.asarray(result['equity_curve'], dtype=np.float64),
+        'exit_times': times[np.array([t['exit_index'] for t in trades], dtype=np.int64)],
+        'trade_profits': np.array([t['profit'] for t in trades], dtype=np.float64),
+        'summary': {
+            'symbol': leg['symbol'],
+            'strategy_name': leg['strategy_name'],
+            'total_trades': result['total_trades'],
+            'winning_trades': result['winning_trades'],
+            'losing_trades': result['losing_trades'],
+            'win_rate': result['win_rate'],
+            'net_profit': float(sum(t['profit'] for t in trades)),
+            'profit_factor': result['profit_factor'],
+            'trades': trades,
+        }
+    }
+
+
+def align_to_axis(axis: np.ndarray, times: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Forward-fill a series onto a merged time axis, using 0 before its first bar."""
+    idx = np.searchsorted(times, axis, side='right') - 1
+    aligned = values[np.maximum(idx, 0)]
+    aligned[idx < 0] = 0.0
+    return aligned
+
+
+def combine_legs(leg_results: List[Dict[str, Any]], initial_balance: float) -> Dict[str, Any]:
+    """Merge per-leg P&L paths into one shared account."""
+    axis = np.unique(np.concatenate([leg['times'] for leg in leg_results]))
+    pnl = np.vstack([align_to_axis(axis, leg['times'], leg['pnl']) for leg in leg_results])
+    equity = initial_balance + pnl.sum(axis=0)
+
+    # Realized balance only moves when a trade closes
+    exit_times = np.concatenate([leg['exit_times'] for leg in leg_results])
+    profits = np.concatenate([leg['trade_profits'] for leg in leg_results])
+    realized = np.bincount(np.searchsorted(axis, exit_times), weights=profits, minlength=len(axis))
+    balance = initial_balance + np.cumsum(realized[:len(axis)])
+
+    stopped_out_at = None
+    ruined = np.flatnonzero(equity <= 0)
+    if len(ruined):
+        cut = ruined[0]
+        stopped_out_at = pd.Timestamp(int(axis[cut]), unit='s').isoformat()
+        equity[cut:] = equity[cut]
+        balance[cut:] = equity[cut]
+
+    running_max = np.maximum.accumulate(equity)
+    drawdown = running_max - equity
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown_pct = np.where(running_max > 0, drawdown / running_max * 100, 0.0)
+
+    return {
+        'axis': axis,
+        'equity': equity,
+        'balance': balance,
+        'max_drawdown': float(drawdown_pct.max()) if len(axis) else 0.0,
+        'max_drawdown_amount': float(drawdown.max()) if len(axis) else 0.0,
+        'stopped_out_at': stopped_out_at,
+    }
+
+
+class PortfolioBacktester:
+    """Runs portfolio legs in a lazily created, reusable worker process pool."""
+
+    def __init__(self, max_workers: int = 4, parallel_threshold: int = 2):
+        self.max_workers = max_workers
+        self.parallel_threshold = parallel_threshold
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def run(self, legs: List[Dict[str, Any]], rates_by_symbol: Dict[str, np.ndarray],
+            initial_balance: float = 10000.0, parallel: Optional[bool] = None) -> Dict[str, Any]:
+        if not legs:
+            raise ValueError("A portfolio needs at least one leg")
+        if parallel is None:
+            parallel = self.max_workers > 1 and len(legs) >= self.parallel_threshold
+
+        if parallel:
+            futures = [self._pool().submit(run_leg, rates_by_symbol[leg['symbol']], leg) for leg in legs]
+            leg_results = [future.result() for future in futures]
+        else:
+            leg_results = [run_leg(rates_by_symbol[leg['symbol']], leg) for leg in legs]
+
+        account = combine_legs(leg_results, initial_balance)
+        total_trades = sum(leg['summary']['total_trades'] for leg in leg_results)
+        winning_trades = sum(leg['summary']['winning_trades'] for leg in leg_results)
+        final_equity = float(account['equity'][-1])
+        return {
+            'initial_balance': float(initial_balance),
+            'final_balance': float(account['balance'][-1]),
+            'final_equity': final_equity,
+            'net_profit': final_equity - float(initial_balance),
+            'total_trades': total_trades,
+            'win_rate': float(winning_trades / total_trades * 100) if total_trades else 0.0,
+            'max_drawdown': account['max_drawdown'],
+            'max_drawdown_amount': account['max_drawdown_amount'],
+            'stopped_out_at': account['stopped_out_at'],
+            # Summed leg P&L: no margin checks, and legs keep trading past stopped_out_at
+            'account_model': 'pnl_aggregation',
+            'legs': [leg['summary'] for leg in leg_results],
+            'equity_curve': account['equity'].tolist(),
+            'balance_curve': account['balance'].tolist(),
+            'timestamps': pd.to_datetime(account['axis'], unit='s').strftime('%Y-%m-%dT%H:%M:%S').tolist(),
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,244 @@
+"""
+Opt-in sampling profiler for individual requests.
+
+An admin sends ``X-Profile: 1`` (or ``?profile=1``) together with a valid
+``X-Admin-Key`` header. The request is served normally while a background
+thread samples every Python thread's stack via ``sys._current_frames()`` at
+a configurable interval. The response carries an ``X-Profile-Id`` header and
+the profile is kept in a bounded in-memory store, downloadable as collapsed
+stacks (flamegraph.pl / speedscope import) or speedscope JSON.
+
+Sampling never instruments code, so overhead is one stack walk per interval.
+Only one request is profiled at a time; concurrent requests asking for a
+profile are served unprofiled with ``X-Profile-Skipped: busy``. While a
+profile runs, all threads are sampled, so stacks from concurrent requests on
+the event loop can appear in it; each stack is rooted at its thread name.
+"""
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+Frame = Tuple[str, str, int]  # function, file, first line
+
+
+class Profile:
+    def __init__(self, profile_id: str, method: str, path: str, interval: float):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.created_at = datetime.now()
+        self.duration = 0.0
+        self.status = None
+        self.samples: Counter = Counter()  # stack (root first) -> sample count
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format: ``frame;frame;frame count`` per line."""
+        lines = []
+        for stack, count in self.samples.most_common():
+            lines.append(';'.join(_frame_label(frame) for frame in stack) + f' {count}')
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self) -> Dict[str, Any]:
+        frames: List[Frame] = []
+        index: Dict[Frame, int] = {}
+        samples, weights = [], []
+        for stack, count in self.samples.items():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append(frame)
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(count * self.interval * 1000)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': [{'name': name, 'file': file, 'line': line} for name, file, line in frames]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': f'{self.method} {self.path}',
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            }],
+            'name': f'{self.method} {self.path} ({self.id})',
+            'exporter': 'mt5-tradebot-api',
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'duration_ms': round(self.duration * 1000, 3),
+            'interval_ms': round(self.interval * 1000, 3),
+            'samples': self.sample_count,
+        }
+
+
+def _frame_label(frame: Frame) -> str:
+    name, file, line = frame
+    if not file:
+        return name
+    return f'{name} ({os.path.basename(file)}:{line})'
+
+
+class Sampler:
+    """Background thread collecting stack samples of every other thread into ``profile``."""
+
+    def __init__(self, profile: Profile, max_depth: int = 128):
+        self.profile = profile
+        self.max_depth = max_depth
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.profile.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.append((names.get(thread_id, f'thread-{thread_id}'), '', 0))
+                self.profile.samples[tuple(reversed(stack))] += 1
+
+
+class ProfileStore:
+    """Most recent profiles, oldest evicted first."""
+
+    def __init__(self, max_profiles: int = 20):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile):
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+
+def is_admin(provided: Optional[str], admin_key: Optional[str]) -> bool:
+    """Constant-time admin key check; nobody is admin while no key is configured."""
+    if not admin_key or not provided:
+        return False
+    return hmac.compare_digest(provided.encode(), admin_key.encode())
+
+
+def _truthy(value: Optional[str]) -> bool:
+    return value is not None and value.lower() in ('1', 'true', 'yes', 'on')
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware running admin-requested requests under a :class:`Sampler`.
+
+    ``admin_key`` is a callable so a key rotated in settings applies without
+    rebuilding the middleware stack. ``X-Profile-Interval-Ms`` overrides the
+    sampling interval per request, floored at ``min_interval_ms``.
+    """
+
+    def __init__(self, app, store: ProfileStore, admin_key: Callable[[], Optional[str]],
+                 interval_ms: float = 5.0, min_interval_ms: float = 1.0):
+        self.app = app
+        self.store = store
+        self.admin_key = admin_key
+        self.interval_ms = interval_ms
+        self.min_interval_ms = min_interval_ms
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        if not (_truthy(headers.get('x-profile')) or _truthy((query.get('profile') or [None])[0])):
+            await self.app(scope, receive, send)
+            return
+
+        if not is_admin(headers.get('x-admin-key'), self.admin_key()):
+            await _send_json(send, 403, {'detail': 'Profiling requires a valid X-Admin-Key header'})
+            return
+
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, _with_headers(send, [(b'x-profile-skipped', b'busy')]))
+            return
+        try:
+            try:
+                interval_ms = float(headers.get('x-profile-interval-ms', self.interval_ms))
+            except ValueError:
+                interval_ms = self.interval_ms
+            profile = Profile(uuid.uuid4().hex, scope['method'], scope['path'],
+                              max(interval_ms, self.min_interval_ms) / 1000.0)
+            state = {}
+
+            async def send_with_id(message):
+                if message['type'] == 'http.response.start':
+                    state['status'] = message['status']
+                await send(message)
+
+            sampler = Sampler(profile)
+            start = time.perf_counter()
+            sampler.start()
+            try:
+                await self.app(scope, receive, _with_headers(send_with_id, [(b'x-profile-id', profile.id.encode())]))
+            finally:
+                sampler.stop()
+                profile.duration = time.perf_counter() - start
+                profile.status = state.get('status')
+                self.store.add(profile)
+        finally:
+            self._busy.release()
+
+
+def _with_headers(send, extra: List[Tuple[bytes, bytes]]):
+    async def wrapped(message):
+        if message['type'] == 'http.response.start':
+            message = {**message, 'headers': list(message.get('headers', [])) + extra}
+        await send(message)
+    return wrapped
+
+
+async def _send_json(send, status: int, body: Dict[str, Any]):
+    payload = json.dumps(body).encode()
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]})
+    await send({'type': 'http.response.body', 'body': payload})
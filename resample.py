@@ -0,0 +1,287 @@
+"""
+Local OHLCV resampling from a single base timeframe.
+
+Higher timeframes are derived from cached M1/M5 bars instead of issuing a
+separate ``copy_rates_range`` call per timeframe. Bucketing is fully
+vectorized: bar open times are floored to the target period and the OHLCV
+fields are reduced per bucket with ``ufunc.reduceat``.
+
+MT5 bar times are broker server time, so buckets align to server midnight by
+default exactly like the terminal's own H4/D1 bars. ``session_offset`` shifts
+the boundaries for brokers or desks that roll the trading day at another hour
+(e.g. -7 hours for a 17:00 New York close on a UTC server).
+"""
+import calendar
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from compact import PRICE_MODES, CompactBars
+
+TIMEFRAME_SECONDS = {
+    'M1': 60,
+    'M5': 300,
+    'M15': 900,
+    'M30': 1800,
+    'H1': 3600,
+    'H4': 14400,
+    'D1': 86400,
+    'W1': 604800,
+}
+
+# 1970-01-01 was a Thursday; MT5 weekly bars open on Sunday 00:00 server time
+_WEEK_ANCHOR = 3 * 86400
+
+
+def timeframe_seconds(timeframe: str) -> Optional[int]:
+    """Nominal bar length in seconds, or None for calendar-month bars."""
+    name = getattr(timeframe, 'value', timeframe)
+    if name == 'MN1':
+        return None
+    if name not in TIMEFRAME_SECONDS:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return TIMEFRAME_SECONDS[name]
+
+
+def infer_timeframe(times) -> str:
+    """Guess the timeframe of a bar series from the most common spacing between bars."""
+    values = np.asarray(times)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype('datetime64[s]').astype(np.int64)
+    diffs = np.diff(values.astype(np.int64))
+    diffs = diffs[diffs > 0]
+    if len(diffs) == 0:
+        raise ValueError("At least two bars are needed to infer the timeframe")
+    spacings, counts = np.unique(diffs, return_counts=True)
+    spacing = int(spacings[counts.argmax()])
+    for name, seconds in TIMEFRAME_SECONDS.items():
+        if seconds == spacing:
+            return name
+    if 28 * 86400 <= spacing <= 31 * 86400:
+        return 'MN1'
+    raise ValueError(f"Bar spacing of {spacing}s does not match any MT5 timeframe")
+
+
+def bucket_starts(times: np.ndarray, timeframe: str, session_offset: int = 0) -> np.ndarray:
+    """Open time (epoch seconds) of the target-timeframe bar each base bar belongs to."""
+    times = np.asarray(times, dtype=np.int64)
+    period = timeframe_seconds(timeframe)
+    if period is None:
+        shifted = (times - session_offset).astype('datetime64[s]')
+        months = shifted.astype('datetime64[M]').astype('datetime64[s]').astype(np.int64)
+        return months + session_offset
+    anchor = session_offset + (_WEEK_ANCHOR if period == TIMEFRAME_SECONDS['W1'] else 0)
+    return (times - anchor) // period * period + anchor
+
+
+def resample_rates(rates: np.ndarray, timeframe: str, session_offset: int = 0,
+                   base_timeframe: Optional[str] = None, drop_incomplete: bool = False) -> np.ndarray:
+    """
+    Aggregate MT5 rates (structured array sorted by time) to a higher timeframe.
+
+    Returns a structured array with the same dtype as the input. Buckets without
+    any base bars (weekends, holidays) are simply absent, as in MT5. With
+    ``drop_incomplete`` the trailing bucket is dropped unless the base bars
+    cover it to its end; this requires ``base_timeframe``.
+    """
+    if len(rates) == 0:
+        return rates.copy()
+    if base_timeframe is not None:
+        base_period = timeframe_seconds(base_timeframe)
+        target_period = timeframe_seconds(timeframe)
+        if target_period is not None and (target_period < base_period or target_period % base_period):
+            raise ValueError(f"Cannot derive {timeframe} bars from {base_timeframe} bars")
+
+    buckets = bucket_starts(rates['time'], timeframe, session_offset)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(rates)] - 1
+
+    out = np.empty(len(starts), dtype=rates.dtype)
+    out['time'] = buckets[starts]
+    out['open'] = rates['open'][starts]
+    out['high'] = np.maximum.reduceat(rates['high'], starts)
+    out['low'] = np.minimum.reduceat(rates['low'], starts)
+    out['close'] = rates['close'][ends]
+    names = rates.dtype.names
+    for field in ('tick_volume', 'real_volume'):
+        if field in names:
+            out[field] = np.add.reduceat(rates[field], starts)
+    if 'spread' in names:
+        out['spread'] = np.minimum.reduceat(rates['spread'], starts)
+
+    if drop_incomplete:
+        if base_timeframe is None:
+            raise ValueError("drop_incomplete requires base_timeframe")
+        last_bar_end = int(rates['time'][-1]) + timeframe_seconds(base_timeframe)
+        if last_bar_end < _bucket_end(int(out['time'][-1]), timeframe, session_offset):
+            out = out[:-1]
+    return out
+
+
+def bucket_ends(starts: np.ndarray, timeframe: str, session_offset: int = 0) -> np.ndarray:
+    """Close time (epoch seconds) of bars opening at ``starts``."""
+    starts = np.asarray(starts, dtype=np.int64)
+    period = timeframe_seconds(timeframe)
+    if period is not None:
+        return starts + period
+    months = (starts - session_offset).astype('datetime64[s]').astype('datetime64[M]') + 1
+    return months.astype('datetime64[s]').astype(np.int64) + session_offset
+
+
+def _bucket_end(bucket_start: int, timeframe: str, session_offset: int) -> int:
+    return int(bucket_ends(np.array([bucket_start]), timeframe, session_offset)[0])
+
+
+def resample_frame(df: pd.DataFrame, timeframe: str, session_offset: int = 0) -> pd.DataFrame:
+    """DataFrame counterpart of :func:`resample_rates`; keeps datetime ``time`` columns as datetimes."""
+    times = df['time']
+    is_datetime = pd.api.types.is_datetime64_any_dtype(times)
+    seconds = times.to_numpy(dtype='datetime64[s]').astype(np.int64) if is_datetime else times.to_numpy(dtype=np.int64)
+    columns = [c for c in ('open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume') if c in df.columns]
+    rates = np.empty(len(df), dtype=[('time', np.int64)] + [(c, df[c].to_numpy().dtype) for c in columns])
+    rates['time'] = seconds
+    for c in columns:
+        rates[c] = df[c].to_numpy()
+    result = pd.DataFrame(resample_rates(rates, timeframe, session_offset))
+    if is_datetime:
+        result['time'] = pd.to_datetime(result['time'], unit='s')
+    return result
+
+
+class BarCache:
+    """
+    In-memory cache of base-timeframe bars per symbol.
+
+    Each entry holds one contiguous time range. Requests inside it are served by
+    slicing; requests outside it only fetch the missing head or tail. The last
+    cached bar is always refetched when extending the tail because it may have
+    still been forming when it was first downloaded. Coverage ends at the last
+    bar received, not at the requested end, so bars that form after a request
+    reaching into the future are still fetched later.
+
+    With ``compact`` set to ``'ticks'`` or ``'float32'``, entries are held as
+    :class:`compact.CompactBars` (roughly half the memory) and each request
+    decodes only its slice back to a float64 rates array.
+    """
+
+    def __init__(self, fetch: Callable[[str, str, datetime, datetime], Optional[np.ndarray]],
+                 base_timeframe: str = 'M1', max_symbols: int = 32, compact: Optional[str] = None):
+        if compact is not None and compact not in PRICE_MODES:
+            raise ValueError(f"compact must be one of {PRICE_MODES}")
+        self.fetch = fetch
+        self.base_timeframe = base_timeframe
+        self.max_symbols = max_symbols
+        self.compact = compact
+        # symbol -> (rates or CompactBars, covered start, covered end) in epoch seconds
+        self._entries: "OrderedDict[str, Tuple[Any, int, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # A hit is a request served without downloading anything
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _epoch(value: datetime) -> int:
+        # Naive datetimes are read as-is, matching the server-time bar stamps
+        if value.tzinfo is not None:
+            return calendar.timegm(value.utctimetuple())
+        return calendar.timegm(value.timetuple())
+
+    @staticmethod
+    def _datetime(epoch: int) -> datetime:
+        return datetime.fromtimestamp(epoch, tz=timezone.utc).replace(tzinfo=None)
+
+    def _download(self, symbol: str, start: datetime, end: datetime) -> Optional[np.ndarray]:
+        rates = self.fetch(symbol, self.base_timeframe, start, end)
+        if rates is None or len(rates) == 0:
+            return None
+        return np.asarray(rates)
+
+    def get_base(self, symbol: str, start: datetime, end: datetime) -> Optional[np.ndarray]:
+        start_ts, end_ts = self._epoch(start), self._epoch(end)
+        with self._lock:
+            entry = self._entries.get(symbol)
+            hit = entry is not None and entry[1] <= start_ts and end_ts <= entry[2]
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if entry is None:
+                rates = self._download(symbol, start, end)
+                if rates is None:
+                    return None
+                entry = (self._store(rates), start_ts, self._covered_until(rates, end_ts))
+            elif not hit:
+                stored, covered_start, covered_end = entry
+                rates = stored.to_rates() if self.compact else stored
+                if start_ts < covered_start:
+                    head = self._download(symbol, start, self._datetime(covered_start - 1))
+                    if head is not None:
+                        rates = np.concatenate([head[head['time'] < covered_start], rates])
+                    covered_start = start_ts
+                if end_ts > covered_end:
+                    # Refetch from the last cached bar, which may still have been forming
+                    tail_from = int(rates['time'][-1]) if len(rates) else covered_end
+                    tail = self._download(symbol, self._datetime(tail_from), end)
+                    if tail is not None:
+                        rates = np.concatenate([rates[rates['time'] < tail['time'][0]], tail])
+                    covered_end = self._covered_until(rates, end_ts)
+                entry = (self._store(rates), covered_start, covered_end)
+            self._entries[symbol] = entry
+            self._entries.move_to_end(symbol)
+            while len(self._entries) > self.max_symbols:
+                self._entries.popitem(last=False)
+        stored = entry[0]
+        if self.compact:
+            return stored[stored.searchsorted(start_ts, 'left'):stored.searchsorted(end_ts, 'right')].to_rates()
+        lo = np.searchsorted(stored['time'], start_ts, side='left')
+        hi = np.searchsorted(stored['time'], end_ts, side='right')
+        return stored[lo:hi]
+
+    @staticmethod
+    def _covered_until(rates: np.ndarray, end_ts: int) -> int:
+        return min(end_ts, int(rates['time'][-1]))
+
+    def _store(self, rates: np.ndarray):
+        return CompactBars.from_rates(rates, prices=self.compact) if self.compact else rates
+
+    def get_rates(self, symbol: str, timeframe: str, start: datetime, end: datetime,
+                  session_offset: int = 0) -> Optional[np.ndarray]:
+        """
+        Bars for ``timeframe`` derived from the cached base series.
+
+        Matches ``copy_rates_range``: only bars opening within [start, end] are
+        returned, each built from its whole bucket. A bucket that starts before
+        ``start`` is left out rather than resampled from its tail, and the last
+        bucket is not cut off at ``end``.
+        """
+        if getattr(timeframe, 'value', timeframe) == self.base_timeframe:
+            base = self.get_base(symbol, start, end)
+            return base if base is not None and len(base) else None
+        start_ts, end_ts = self._epoch(start), self._epoch(end)
+        first = int(bucket_starts(np.array([start_ts]), timeframe, session_offset)[0])
+        if first < start_ts:
+            first = _bucket_end(first, timeframe, session_offset)
+        last_end = _bucket_end(int(bucket_starts(np.array([end_ts]), timeframe, session_offset)[0]),
+                               timeframe, session_offset)
+        if first > end_ts:
+            return None
+        base = self.get_base(symbol, self._datetime(first), self._datetime(last_end - 1))
+        if base is None or len(base) == 0:
+            return None
+        rates = resample_rates(base, timeframe, session_offset, base_timeframe=self.base_timeframe)
+        return rates[rates['time'] >= start_ts]
+
+    def invalidate(self, symbol: Optional[str] = None):
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol, None)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(entry[0].nbytes for entry in self._entries.values())
@@ -0,0 +1,117 @@
+"""
+Vectorised risk metrics over many equity curves at once.
+
+``batch_risk_metrics`` takes an (m, n) matrix with one curve per row: equity
+values, or per-period returns via ``returns=``. Every metric is computed for
+all rows with whole-matrix NumPy operations, so scoring thousands of optimizer
+candidates costs about the same as scoring one:
+
+- ``sharpe`` / ``sortino``: annualised mean excess return over the sample
+  standard deviation / downside deviation;
+- ``max_drawdown`` (fraction) with ``drawdown_start`` (peak index) and
+  ``drawdown_end`` (trough index);
+- ``var`` / ``cvar``: historical value at risk and expected shortfall of the
+  per-period returns (negative numbers are losses);
+- ``total_return``, ``cagr`` and ``calmar`` (CAGR over max drawdown);
+- ``exposure``: fraction of periods in the market. This comes from the
+  ``exposure`` mask when given, otherwise from periods whose equity changed.
+
+Formulas follow ``RiskManagement.calculate_sharpe_ratio``,
+``calculate_max_drawdown`` and ``calculate_var``. Undefined values (flat
+curves, zero drawdown) are NaN in the arrays and None in ``metrics_row``.
+"""
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+SECONDS_PER_YEAR = 365.25 * 86400
+
+
+def periods_per_year(times, default: float = 252.0) -> float:
+    """Observed bars per year from bar timestamps (epoch seconds or datetime64); weekend gaps included."""
+    if times is None or len(times) < 2:
+        return default
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = times.astype('datetime64[s]').astype(np.int64)
+    span = float(times[-1] - times[0])
+    if not span > 0:
+        return default
+    return (len(times) - 1) * SECONDS_PER_YEAR / span
+
+
+def batch_risk_metrics(equity=None, returns=None, periods_per_year: float = 252.0,
+                       risk_free_rate: float = 0.0, confidence: float = 0.95,
+                       exposure: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """Risk metrics for each row of ``equity`` (or of ``returns``); see the module docstring."""
+    if (equity is None) == (returns is None):
+        raise ValueError("Pass exactly one of equity or returns")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if returns is None:
+            equity = np.atleast_2d(np.asarray(equity, dtype=np.float64))
+            returns = equity[:, 1:] / equity[:, :-1] - 1
+        else:
+            returns = np.atleast_2d(np.asarray(returns, dtype=np.float64))
+            equity = np.cumprod(np.hstack([np.ones((len(returns), 1)), 1 + returns]), axis=1)
+        rows, periods = returns.shape
+        if periods < 1:
+            raise ValueError("Need at least two equity points per curve")
+        index = np.arange(rows)
+
+        excess = returns - risk_free_rate / periods_per_year
+        mean = excess.mean(axis=1)
+        std = excess.std(axis=1, ddof=1) if periods > 1 else np.full(rows, np.nan)
+        downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2, axis=1))
+        annualise = math.sqrt(periods_per_year)
+        sharpe = np.where(std > 0, annualise * mean / std, 0.0)
+        sortino = np.where(downside > 0, annualise * mean / downside, np.nan)
+
+        running_max = np.maximum.accumulate(equity, axis=1)
+        drawdown = (equity - running_max) / running_max
+        end = np.argmin(drawdown, axis=1)
+        max_drawdown = -drawdown[index, end]
+        # Index of the first bar at each running high, so the peak is its first occurrence
+        previous_max = np.hstack([np.full((rows, 1), -np.inf), running_max[:, :-1]])
+        positions = np.where(equity > previous_max, np.arange(periods + 1), 0)
+        start = np.maximum.accumulate(positions, axis=1)[index, end]
+
+        total_return = equity[:, -1] / equity[:, 0] - 1
+        cagr = (equity[:, -1] / equity[:, 0]) ** (periods_per_year / periods) - 1
+        calmar = np.where(max_drawdown > 0, cagr / max_drawdown, np.nan)
+
+        var = np.percentile(returns, (1 - confidence) * 100, axis=1)
+        tail = returns <= var[:, None]
+        cvar = np.where(tail, returns, 0.0).sum(axis=1) / tail.sum(axis=1)
+
+        if exposure is None:
+            in_market = returns != 0
+        else:
+            in_market = np.atleast_2d(np.asarray(exposure, dtype=bool))
+        exposure_ratio = in_market.mean(axis=1)
+
+    return {
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'max_drawdown': max_drawdown,
+        'drawdown_start': start,
+        'drawdown_end': end,
+        'var': var,
+        'cvar': cvar,
+        'total_return': total_return,
+        'cagr': cagr,
+        'calmar': calmar,
+        'exposure': exposure_ratio,
+    }
+
+
+def metrics_row(metrics: Dict[str, np.ndarray], row: int) -> Dict[str, Any]:
+    """One curve's metrics as JSON-safe Python values (NaN/inf become None)."""
+    result = {}
+    for name, values in metrics.items():
+        value = values[row]
+        if np.issubdtype(values.dtype, np.integer):
+            result[name] = int(value)
+        else:
+            result[name] = float(value) if np.isfinite(value) else None
+    return result
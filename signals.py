@@ -0,0 +1,155 @@
+"""
+Lean signal path: raw NumPy OHLCV arrays in, int8 signal array out.
+
+These functions reproduce the ``signal`` column of ``EATester.run_strategy``
+exactly, but without copying the frame, lower-casing columns or writing the
+helper columns (``BB_Std``, ``Volume_MA``, ``Position``, ...) that the
+DataFrame strategies keep for inspection. The optimizer and AutoTrader use
+this path. Rolling statistics come from a :class:`BarIndex`, which a sweep
+shares across permutations.
+
+Strategies that need resampling (``multi_timeframe_trend``) have no lean
+version; ``EATester.signals`` falls back to the DataFrame path for them.
+"""
+from typing import Any, Callable, Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from indicators import BarIndex, channels
+
+Bars = Mapping[str, np.ndarray]
+
+
+def bar_arrays(data) -> Dict[str, np.ndarray]:
+    """Lower-cased column name -> array view, from a DataFrame or an MT5 structured rates array."""
+    if isinstance(data, np.ndarray) and data.dtype.names:
+        return {name.lower(): data[name] for name in data.dtype.names}
+    return {str(column).lower(): data[column].to_numpy() for column in data.columns}
+
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """``Series.shift(periods)`` for a float array (periods >= 0)."""
+    out = np.full(len(values), np.nan)
+    if periods == 0:
+        out[:] = values
+    elif periods < len(values):
+        out[periods:] = values[:-periods]
+    return out
+
+
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def _signal(buy: np.ndarray, sell: np.ndarray) -> np.ndarray:
+    """1 where ``buy``, then -1 where ``sell`` (sell wins, as the second ``.loc`` assignment does)."""
+    signal = np.zeros(len(buy), dtype=np.int8)
+    signal[buy] = 1
+    signal[sell] = -1
+    return signal
+
+
+def simple_ma_crossover(bars: Bars, index: BarIndex, params: Dict[str, Any]) -> np.ndarray:
+    fast = index.sma(int(params.get('fast_period', 10)))
+    slow = index.sma(int(params.get('slow_period', 20)))
+    return _signal(fast > slow, fast < slow)
+
+
+def rsi(bars: Bars, index: BarIndex, params: Dict[str, Any]) -> np.ndarray:
+    value = index.rsi(int(params.get('rsi_period', 14)))
+    return _signal(value < int(params.get('oversold', 30)), value > int(params.get('overbought', 70)))
+
+
+def bollinger_bands(bars: Bars, index: BarIndex, params: Dict[str, Any]) -> np.ndarray:
+    period = int(params.get('period', 20))
+    std_dev = float(params.get('std_dev', 2.0))
+    middle, std = index.sma(period), index.std(period)
+    close = bars['close']
+    return _signal(close < middle - std * std_dev, close > middle + std * std_dev)
+
+
+def macd(bars: Bars, index: BarIndex, params: Dict[str, Any]) -> np.ndarray:
+    close = np.asarray(bars['close'], dtype=np.float64)
+    line = _ema(close, int(params.get('fast', 12))) - _ema(close, int(params.get('slow', 26)))
+    signal_line = _ema(line, int(params.get('signal', 9)))
+    prev_line, prev_signal = _shift(line, 1), _shift(signal_line, 1)
+    return _signal((line > signal_line) & (prev_line <= prev_signal),
+                   (line < signal_line) & (prev_line >= prev_signal))
+
+
+def stochastic(bars: Bars, index: BarIndex, params: Dict[str, Any]) -> np.ndarray:
+    k_period = int(params.get('k_period', 14))
+    high_max, low_min = channels(bars, [k_period], index)[k_period]
+    k = 100 * ((bars['close'] - low_min) / (high_max - low_min))
+    d = pd.Series(k).rolling(window=int(params.get('d_period', 3))).mean().to_numpy()
+    return _signal((k < int(params.get('oversold', 20))) & (k > d),
+                   (k > int(params.get('overbought', 80))) & (k < d))
+
+
+def ichimoku(bars: Bars, index: BarIndex, params: Dict[str, Any]) -> np.ndarray:
+    tenkan = int(params.get('tenkan', 9))
+    kijun = int(params.get('kijun', 26))
+    senkou_b = int(params.get('senkou_b', 52))
+    extremes = channels(bars, [tenkan, kijun, senkou_b], index)
+    tenkan_sen = (extremes[tenkan][0] + extremes[tenkan][1]) / 2
+    kijun_sen = (extremes[kijun][0] + extremes[kijun][1]) / 2
+    span_a = _shift((tenkan_sen + kijun_sen) / 2, kijun)
+    span_b = _shift((extremes[senkou_b][0] + extremes[senkou_b][1]) / 2, kijun)
+    close = bars['close']
+    return _signal((tenkan_sen > kijun_sen) & (close > span_a) & (close > span_b),
+                   (tenkan_sen < kijun_sen) & (close < span_a) & (close < span_b))
+
+
+def vwap(bars: Bars, index: BarIndex, params: Dict[str, Any]) -> np.ndarray:
+    period = int(params.get('period', 20))
+    value = index.vwap(period)
+    ratio = bars['tick_volume'] / index.volume_ma(period)
+    close = bars['close']
+    return _signal((close > value) & (ratio > 1.5), (close < value) & (ratio > 1.5))
+
+
+def breakout(bars: Bars, index: BarIndex, params: Dict[str, Any]) -> np.ndarray:
+    lookback = int(params.get('lookback', 20))
+    volume_threshold = float(params.get('volume_threshold', 1.5))
+    high_max, low_min = channels(bars, [lookback], index)[lookback]
+    ratio = bars['tick_volume'] / index.volume_ma(lookback)
+    close = bars['close']
+    return _signal((close > _shift(high_max, 1)) & (ratio > volume_threshold),
+                   (close < _shift(low_min, 1)) & (ratio > volume_threshold))
+
+
+def mean_reversion(bars: Bars, index: BarIndex, params: Dict[str, Any]) -> np.ndarray:
+    period = int(params.get('period', 20))
+    std_threshold = float(params.get('std_threshold', 2.0))
+    z_score = (bars['close'] - index.sma(period)) / index.std(period)
+    signal = _signal(z_score < -std_threshold, z_score > std_threshold)
+    signal[np.abs(z_score) < 0.5] = 0
+    return signal
+
+
+LEAN_STRATEGIES: Dict[str, Callable[[Bars, BarIndex, Dict[str, Any]], np.ndarray]] = {
+    'simple_ma_crossover': simple_ma_crossover,
+    'rsi': rsi,
+    'bollinger_bands': bollinger_bands,
+    'macd': macd,
+    'stochastic': stochastic,
+    'ichimoku': ichimoku,
+    'vwap': vwap,
+    'breakout': breakout,
+    'mean_reversion': mean_reversion,
+}
+
+
+def strategy_signals(strategy_name: str, bars: Bars, strategy_params: Dict[str, Any],
+                     index: Optional[BarIndex] = None) -> np.ndarray:
+    """int8 signals (1 buy, -1 sell, 0 flat) for a strategy with a lean implementation."""
+    strategy = LEAN_STRATEGIES.get(strategy_name)
+    if strategy is None:
+        raise ValueError(f"No lean implementation for strategy: {strategy_name}")
+    if index is None:
+        index = BarIndex(bars)
+    elif len(index) != len(bars['close']):
+        raise ValueError(f"BarIndex covers {len(index)} bars but {len(bars['close'])} were given")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return strategy(bars, index, strategy_params)
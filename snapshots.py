@@ -0,0 +1,115 @@
+"""
+Shared, versioned snapshot of account state polled from the terminal.
+
+One :class:`SnapshotPoller` task refreshes named sections (account,
+positions, orders) at a fixed cadence and serves every reader from memory.
+Endpoints and bots no longer call MT5 themselves. A section's version only
+moves when its content actually changes, and its ETag combines a per-process
+id, the section name and the version. Clients that send ``If-None-Match`` (or
+the last version they saw) therefore get a 304 until something is different.
+
+Readers get None when the snapshot is older than ``max_age`` (three intervals
+by default), e.g. after the terminal disconnects. They then fall back to a
+direct call, so a stalled poller never serves stale state silently. Trading
+code calls :meth:`SnapshotPoller.poke` to request an immediate refresh, or
+awaits :meth:`SnapshotPoller.refresh` when it needs the new state itself.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Section:
+    __slots__ = ('name', 'data', 'version', 'etag', 'changed_at')
+
+    def __init__(self, name: str, data: Any, version: int, instance: str):
+        self.name = name
+        self.data = data
+        self.version = version
+        self.etag = f'"{instance}-{name}-{version}"'
+        self.changed_at = datetime.now().isoformat()
+
+
+async def _run_inline(fn: Callable[[], Any]) -> Any:
+    return fn()
+
+
+class SnapshotPoller:
+    def __init__(self, fetchers: Dict[str, Callable[[], Any]], interval: float = 1.0,
+                 runner: Optional[Callable[[Callable[[], Any]], Awaitable[Any]]] = None,
+                 max_age: Optional[float] = None):
+        """runner executes the blocking fetch (e.g. on the MT5 worker thread); inline by default."""
+        self.fetchers = fetchers
+        self.interval = interval
+        self.max_age = max_age if max_age is not None else 3 * interval
+        self.runner = runner or _run_inline
+        self.instance = uuid.uuid4().hex[:8]
+        self._sections: Dict[str, Section] = {}
+        self._refreshed_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.refreshes = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _fetch_all(self) -> Dict[str, Any]:
+        # One runner call for all sections keeps them consistent with each other
+        return {name: fetch() for name, fetch in self.fetchers.items()}
+
+    async def refresh(self):
+        data = await self.runner(self._fetch_all)
+        for name, value in data.items():
+            section = self._sections.get(name)
+            if section is None or section.data != value:
+                self._sections[name] = Section(name, value, section.version + 1 if section else 1, self.instance)
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+    def get(self, name: str) -> Optional[Section]:
+        """The section if the last successful refresh is recent enough, else None."""
+        if self._refreshed_at is None or time.monotonic() - self._refreshed_at > self.max_age:
+            return None
+        return self._sections.get(name)
+
+    def poke(self):
+        """Refresh as soon as possible instead of waiting for the next tick."""
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self):
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                if self.last_error != str(e):
+                    logger.warning(f"Snapshot refresh failed: {e}")
+                self.last_error = str(e)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,191 @@
+"""
+Terminal connection supervisor.
+
+:class:`ConnectionSupervisor` probes the terminal every ``interval`` seconds
+with one cheap call (``terminal_info``, run on the MT5 worker). A probe that
+fails or takes longer than ``timeout`` counts as a miss, and so does a
+reconnect attempt. After
+``failure_threshold`` misses in a row, the connection is marked down and the
+supervisor reconnects with the stored credentials, doubling the wait between
+attempts up to ``max_backoff``. Once a probe succeeds again, the connection is
+marked up and ``on_up`` warms the caches that went stale meanwhile.
+
+Nothing is attempted while ``enabled()`` is false, e.g. before the first
+connect or after an explicit disconnect. Reconnects, failed attempts and
+probe latency are exported as metrics, and ``downtime`` (including an ongoing
+outage) backs the ``mt5_downtime_seconds_total`` counter.
+"""
+import asyncio
+import inspect
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+async def _run_inline(fn: Callable[[], Any]) -> Any:
+    return fn()
+
+
+class ConnectionSupervisor:
+    def __init__(self, probe: Callable[[], bool], reconnect: Callable[[], Any], interval: float = 5.0,
+                 timeout: float = 5.0, backoff: float = 1.0, max_backoff: float = 60.0, failure_threshold: int = 2,
+                 runner: Optional[Callable[[Callable[[], Any]], Awaitable[Any]]] = None,
+                 enabled: Callable[[], bool] = lambda: True, on_down: Optional[Callable[[], Any]] = None,
+                 on_up: Optional[Callable[[], Any]] = None):
+        """probe returns True while the terminal is usable; reconnect re-initialises it (raising on failure).
+
+        runner executes both blocking calls (e.g. on the MT5 worker thread); on_down/on_up may be coroutines.
+        """
+        self.probe = probe
+        self.reconnect = reconnect
+        self.interval = interval
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.runner = runner or _run_inline
+        self.enabled = enabled
+        self.on_down = on_down
+        self.on_up = on_up
+        self.up = True
+        self.down_since: Optional[float] = None
+        self.reconnects = 0
+        self.reconnect_failures = 0
+        self.missed_probes = 0
+        self.last_error: Optional[str] = None
+        self.last_reconnect: Optional[str] = None
+        self._downtime = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def downtime(self) -> float:
+        """Seconds spent disconnected so far, including the current outage."""
+        if self.down_since is None:
+            return self._downtime
+        return self._downtime + time.monotonic() - self.down_since
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'up': self.up,
+            'down_for_seconds': None if self.down_since is None else round(time.monotonic() - self.down_since, 3),
+            'reconnects': self.reconnects,
+            'reconnect_failures': self.reconnect_failures,
+            'downtime_seconds': round(self.downtime, 3),
+            'last_reconnect': self.last_reconnect,
+            'last_error': self.last_error,
+        }
+
+    async def _notify(self, callback: Optional[Callable[[], Any]]):
+        if callback is None:
+            return
+        try:
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.warning(f"Connection callback failed: {e}")
+
+    async def check(self) -> bool:
+        """Probe once; True when the terminal answered in time and reports itself connected."""
+        started = time.perf_counter()
+        try:
+            healthy = bool(await asyncio.wait_for(self.runner(self.probe), self.timeout))
+            if not healthy:
+                self.last_error = "Terminal reports no connection to the trade server"
+        except asyncio.TimeoutError:
+            healthy = False
+            self.last_error = f"Probe timed out after {self.timeout:g}s"
+        except Exception as e:
+            healthy = False
+            self.last_error = str(e)
+        metrics.MT5_PROBE_DURATION.observe(time.perf_counter() - started)
+        return healthy
+
+    async def mark_down(self):
+        if not self.up:
+            return
+        self.up = False
+        self.down_since = time.monotonic()
+        logger.warning(f"MT5 connection lost: {self.last_error}")
+        await self._notify(self.on_down)
+
+    def _end_outage(self):
+        self._downtime += time.monotonic() - self.down_since
+        self.up = True
+        self.down_since = None
+        self.missed_probes = 0
+
+    async def mark_up(self):
+        if self.up:
+            return
+        logger.info(f"MT5 connection restored after {time.monotonic() - self.down_since:.1f}s")
+        self._end_outage()
+        await self._notify(self.on_up)
+
+    async def recover(self):
+        """Reconnect with exponential backoff until a probe succeeds or supervision is disabled."""
+        delay = self.backoff
+        while self.enabled():
+            try:
+                # The probe that timed out may still hold the MT5 worker; never queue behind it indefinitely
+                await asyncio.wait_for(self.runner(self.reconnect), self.timeout)
+                if await self.check():
+                    self.reconnects += 1
+                    self.last_reconnect = datetime.now().isoformat()
+                    metrics.MT5_RECONNECTS.inc()
+                    await self.mark_up()
+                    return
+            except asyncio.TimeoutError:
+                self.last_error = f"Reconnect timed out after {self.timeout:g}s"
+            except Exception as e:
+                self.last_error = str(e)
+            self.reconnect_failures += 1
+            metrics.MT5_RECONNECT_FAILURES.inc()
+            # Jitter keeps several API instances from hammering one terminal in lockstep
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, self.max_backoff)
+
+    async def step(self):
+        """One supervision cycle: probe, and reconnect once the miss threshold is reached."""
+        if not self.enabled():
+            # An explicit disconnect ends the outage: there is nothing left to restore
+            if not self.up:
+                self._end_outage()
+            return
+        if await self.check():
+            self.missed_probes = 0
+            await self.mark_up()
+            return
+        self.missed_probes += 1
+        if self.missed_probes >= self.failure_threshold:
+            await self.mark_down()
+            await self.recover()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.step()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Connection supervision failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
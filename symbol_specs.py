@@ -0,0 +1,224 @@
+"""
+Per-symbol contract specifications for backtests and live order sizing.
+
+A :class:`SymbolSpec` is read once per symbol from MT5 ``symbol_info``
+(digits, point, contract size, tick size and value, volume limits) and
+cached in a :class:`SymbolSpecRegistry`. The registry can persist to a JSON
+file, so offline backtests use the same specs without a terminal.
+
+- ``pip_size`` follows the usual convention: ten points on 3 and 5 digit
+  quotes (EURUSD 0.0001, USDJPY 0.01) and one point otherwise (XAUUSD 0.01).
+- ``price_value`` is the P&L of one lot per 1.0 price move in the account
+  currency, ``trade_tick_value / trade_tick_size``. ``trade_tick_value`` is
+  quoted at the moment the spec was loaded, so cross-currency P&L uses that
+  rate for the whole backtest.
+
+Specs older than the registry's ``ttl`` are reloaded on the next ``get()``,
+and :meth:`SymbolSpecRegistry.refresh` reloads every cached spec after a
+(re)connect. When the terminal cannot answer, the last known spec is kept, so
+offline backtests still work from the persisted file. The load time is
+persisted with each spec.
+
+:meth:`SymbolSpec.guess` keeps the old price-level heuristic for bars with no
+known symbol.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('symbol', 'digits', 'point', 'pip_size', 'contract_size', 'tick_size', 'tick_value',
+          'volume_min', 'volume_max', 'volume_step', 'currency_profit')
+
+
+class SymbolSpec:
+    def __init__(self, symbol: Optional[str], digits: Optional[int], point: Optional[float], pip_size: float,
+                 contract_size: float, tick_size: Optional[float] = None, tick_value: Optional[float] = None,
+                 volume_min: Optional[float] = None, volume_max: Optional[float] = None,
+                 volume_step: Optional[float] = None, currency_profit: Optional[str] = None):
+        self.symbol = symbol
+        self.digits = digits
+        self.point = point
+        self.pip_size = pip_size
+        self.contract_size = contract_size
+        self.tick_size = tick_size
+        self.tick_value = tick_value
+        self.volume_min = volume_min
+        self.volume_max = volume_max
+        self.volume_step = volume_step
+        self.currency_profit = currency_profit
+
+    @classmethod
+    def from_symbol_info(cls, info) -> "SymbolSpec":
+        digits = int(info.digits)
+        point = float(info.point) if info.point else 10.0 ** -digits
+        return cls(
+            symbol=info.name,
+            digits=digits,
+            point=point,
+            pip_size=point * 10 if digits in (3, 5) else point,
+            contract_size=float(info.trade_contract_size),
+            tick_size=float(info.trade_tick_size) or point,
+            tick_value=float(info.trade_tick_value),
+            volume_min=float(info.volume_min),
+            volume_max=float(info.volume_max),
+            volume_step=float(info.volume_step),
+            currency_profit=getattr(info, 'currency_profit', None),
+        )
+
+    @classmethod
+    def guess(cls, price: float) -> "SymbolSpec":
+        """Price-level heuristic for bars of an unknown symbol."""
+        if price > 1000:  # Gold, BTC, etc.
+            return cls(None, None, None, pip_size=0.1, contract_size=100.0)
+        if price > 50:  # USDJPY, etc.
+            return cls(None, None, None, pip_size=0.01, contract_size=1000.0)
+        return cls(None, None, None, pip_size=0.0001, contract_size=100000.0)
+
+    @property
+    def price_value(self) -> float:
+        if self.tick_value and self.tick_size:
+            return self.tick_value / self.tick_size
+        return self.contract_size
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SymbolSpec":
+        return cls(**{field: data.get(field) for field in FIELDS})
+
+
+class SymbolSpecRegistry:
+    def __init__(self, loader: Optional[Callable[[str], Any]] = None, path: Optional[str] = None,
+                 ttl: Optional[float] = None):
+        """loader returns MT5 symbol_info for a symbol (None when unknown); path persists specs as JSON.
+
+        Specs older than ``ttl`` seconds are reloaded through the loader; None keeps them until invalidated.
+        """
+        self.loader = loader
+        self.path = path
+        self.ttl = ttl
+        self._specs: Dict[str, SymbolSpec] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def _expired(self, symbol: str) -> bool:
+        return self.ttl is not None and time.time() - self._loaded_at.get(symbol, 0.0) >= self.ttl
+
+    def _load(self, symbol: str) -> Optional[SymbolSpec]:
+        try:
+            info = self.loader(symbol)
+        except Exception as e:
+            logger.warning(f"Failed to load symbol spec for {symbol}: {e}")
+            return None
+        return SymbolSpec.from_symbol_info(info) if info is not None else None
+
+    def get(self, symbol: str) -> Optional[SymbolSpec]:
+        """Cached spec, loaded from the terminal on first use; None when neither knows the symbol."""
+        with self._lock:
+            spec = self._specs.get(symbol)
+            if spec is not None and (self.loader is None or not self._expired(symbol)):
+                self.hits += 1
+                return spec
+            self.misses += 1
+        if self.loader is None:
+            return None
+        fresh = self._load(symbol)
+        if fresh is None:
+            # An expired spec beats none while the terminal is unreachable
+            return spec
+        self.put(fresh)
+        return fresh
+
+    def put(self, spec: SymbolSpec, loaded_at: Optional[float] = None):
+        with self._lock:
+            self._specs[spec.symbol] = spec
+            self._loaded_at[spec.symbol] = time.time() if loaded_at is None else loaded_at
+        if self.path:
+            self.save()
+
+    def refresh(self) -> int:
+        """Reload every cached spec from the terminal; returns how many were reloaded."""
+        if self.loader is None:
+            return 0
+        with self._lock:
+            symbols = list(self._specs)
+        reloaded = {}
+        for symbol in symbols:
+            spec = self._load(symbol)
+            if spec is not None:
+                reloaded[symbol] = spec
+        if reloaded:
+            now = time.time()
+            with self._lock:
+                self._specs.update(reloaded)
+                self._loaded_at.update(dict.fromkeys(reloaded, now))
+            if self.path:
+                self.save()
+        return len(reloaded)
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Forget one symbol (or all), so the next get() reloads it from the terminal."""
+        with self._lock:
+            if symbol is None:
+                self._specs.clear()
+                self._loaded_at.clear()
+            else:
+                self._specs.pop(symbol, None)
+                self._loaded_at.pop(symbol, None)
+        if self.path:
+            self.save()
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {symbol: dict(spec.to_dict(), loaded_at=self._loaded_at.get(symbol))
+                    for symbol, spec in sorted(self._specs.items())}
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        # Serialised so an older snapshot can never replace a newer one
+        with self._save_lock:
+            data = json.dumps(self.to_dict(), indent=2)
+            directory = os.path.dirname(os.path.abspath(path))
+            # Write atomically so a crash never leaves a truncated spec file
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            except OSError as e:
+                logger.warning(f"Failed to write symbol specs to {path}: {e}")
+                return
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Failed to write symbol specs to {path}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def load(self, path: str):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to read symbol specs from {path}: {e}")
+            return
+        with self._lock:
+            for symbol, spec in data.items():
+                self._specs[symbol] = SymbolSpec.from_dict(spec)
+                # Files written before load times were recorded count as expired
+                self._loaded_at[symbol] = spec.get('loaded_at') or 0.0
@@ -0,0 +1,68 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from backtest_cache import BacktestCache
+from tests.test_jobs import create_mock_rates
+
+REQUEST = {
+    'symbol': 'EURUSD',
+    'timeframe': 'H1',
+    'start_date': '2024-01-01T00:00:00',
+    'end_date': '2024-02-01T00:00:00',
+    'strategy_name': 'bollinger_bands',
+    'strategy_params': {'period': 20, 'std_dev': 2.0},
+    'initial_balance': 10000.0,
+}
+
+
+def test_key_normalizes_equivalent_requests():
+    fingerprint = BacktestCache.fingerprint(create_mock_rates())
+    reordered = dict(REQUEST, strategy_params={'std_dev': 2, 'period': 20.0})
+
+    assert BacktestCache.make_key(REQUEST, fingerprint) == BacktestCache.make_key(reordered, fingerprint)
+    changed = dict(REQUEST, strategy_params={'period': 21, 'std_dev': 2.0})
+    assert BacktestCache.make_key(REQUEST, fingerprint) != BacktestCache.make_key(changed, fingerprint)
+
+
+def test_fingerprint_changes_with_data():
+    rates = create_mock_rates()
+    modified = rates.copy()
+    modified['close'][-1] += 0.00001
+
+    assert BacktestCache.fingerprint(rates) == BacktestCache.fingerprint(rates.copy())
+    assert BacktestCache.fingerprint(rates) != BacktestCache.fingerprint(modified)
+
+
+def test_roundtrip_and_persistence(tmp_path):
+    cache = BacktestCache(str(tmp_path))
+    key = BacktestCache.make_key(REQUEST, BacktestCache.fingerprint(create_mock_rates()))
+
+    assert cache.get(key) is None
+    cache.put(key, {'final_balance': 10123.5, 'trades': []})
+    assert cache.get(key) == {'final_balance': 10123.5, 'trades': []}
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+
+    reopened = BacktestCache(str(tmp_path))
+    assert reopened.get(key)['final_balance'] == 10123.5
+
+
+def test_size_based_eviction(tmp_path):
+    payload = {'equity_curve': np.random.RandomState(1).normal(size=2000).tolist()}
+    probe = BacktestCache(str(tmp_path / 'probe'))
+    probe.put('probe', payload)
+    entry_size = probe.stats['bytes']
+
+    cache = BacktestCache(str(tmp_path / 'cache'), max_bytes=int(entry_size * 2.5))
+    cache.put('a' * 64, payload)
+    cache.put('b' * 64, payload)
+    cache.get('a' * 64)  # 'a' becomes most recently used
+    cache.put('c' * 64, payload)
+
+    assert cache.get('b' * 64) is None
+    assert cache.get('a' * 64) is not None
+    assert cache.get('c' * 64) is not None
+    assert cache.stats['bytes'] <= cache.max_bytes
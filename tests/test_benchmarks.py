@@ -0,0 +1,56 @@
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench import build_cases, compare, load_baseline, main, make_bars, run_benchmarks
+
+
+def test_every_case_runs_on_small_input():
+    results = run_benchmarks([600], repeat=1, log=lambda line: None)
+
+    assert set(results) == {f'{case.name}@600' for case in build_cases()}
+    for result in results.values():
+        assert result['bars'] == 600
+        assert result['bars_per_sec'] > 0
+        assert result['peak_mb'] > 0
+
+
+def test_make_bars_is_seeded():
+    assert make_bars(100).equals(make_bars(100))
+    assert not make_bars(100).equals(make_bars(100, seed=1))
+
+
+def test_compare_flags_throughput_and_memory_regressions():
+    baseline = {
+        'backtest@1000': {'bars_per_sec': 10000.0, 'peak_mb': 10.0},
+        'optimize@1000': {'bars_per_sec': 10000.0, 'peak_mb': 10.0},
+    }
+    results = {
+        'backtest@1000': {'bars_per_sec': 7000.0, 'peak_mb': 10.5},
+        'optimize@1000': {'bars_per_sec': 9000.0, 'peak_mb': 20.0},
+        'macd@1000': {'bars_per_sec': 1.0, 'peak_mb': 1.0},  # Not in the baseline yet
+    }
+
+    regressions = compare(results, baseline, throughput_tolerance=0.2, memory_tolerance=0.2)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('backtest@1000: throughput')
+    assert regressions[1].startswith('optimize@1000: peak memory')
+
+
+def test_baseline_recorded_from_ci_output_skips_memory_across_library_versions(tmp_path):
+    output = tmp_path / 'bench-results.json'
+    baseline = str(tmp_path / 'baseline.json')
+    ci_environment = {'python': '3.11.9', 'numpy': '1.26.4', 'pandas': '2.1.4', 'machine': 'AMD64', 'platform': 'Windows'}
+    output.write_text(json.dumps({'environment': ci_environment,
+                                  'results': {'backtest@1000': {'bars_per_sec': 1.0, 'peak_mb': 0.001}}}))
+
+    assert main(['--record-from', str(output), '--baseline', baseline]) == 0
+    assert load_baseline(baseline)['environment'] == ci_environment
+    # Locally the memory figure is far above the recorded one, but the libraries differ
+    assert main(['--sizes', '1000', '--filter', 'backtest', '--repeat', '1', '--baseline', baseline]) == 0
+
+    results = {'backtest@1000': {'bars_per_sec': 1.0, 'peak_mb': 50.0}}
+    assert compare(results, load_baseline(baseline)['results'], check_memory=False) == []
+    assert len(compare(results, load_baseline(baseline)['results'])) == 1
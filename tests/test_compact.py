@@ -0,0 +1,62 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from compact import CompactBars
+from mt5_sim import SimulatedMT5
+from resample import BarCache
+
+
+def simulated_rates(symbol, start=datetime(2024, 1, 1), end=datetime(2024, 2, 1)):
+    sim = SimulatedMT5(start_time=datetime(2024, 6, 1))
+    sim.initialize()
+    return sim.copy_rates_range(symbol, sim.TIMEFRAME_M1, start, end)
+
+
+def test_tick_mode_is_lossless_and_about_half_the_size():
+    for symbol, digits in (('EURUSD', 5), ('USDJPY', 3), ('XAUUSD', 2)):
+        rates = simulated_rates(symbol)
+        compact = CompactBars.from_rates(rates)
+        assert compact.price_mode == 'ticks' and compact.digits == digits
+        assert compact.nbytes < 0.55 * rates.nbytes
+
+        decoded = compact.to_rates()
+        assert decoded.dtype == rates.dtype
+        for name in rates.dtype.names:
+            np.testing.assert_array_equal(decoded[name], rates[name])
+
+        middle = int(rates['time'][len(rates) // 2])
+        lo, hi = compact.searchsorted(middle), compact.searchsorted(middle + 3600, 'right')
+        np.testing.assert_array_equal(compact[lo:hi].to_rates(), rates[(rates['time'] >= middle) & (rates['time'] <= middle + 3600)])
+
+
+def test_prices_without_a_decimal_scale_fall_back_to_float32():
+    rates = simulated_rates('EURUSD')
+    rates['close'] += np.random.default_rng(0).normal(0, 1e-9, len(rates))
+    compact = CompactBars.from_rates(rates)
+    assert compact.price_mode == 'float32'
+    np.testing.assert_allclose(compact.column('close'), rates['close'], rtol=1e-6)
+    assert compact.column('close').dtype == np.float64
+
+
+def test_compact_bar_cache_serves_identical_bars():
+    full = simulated_rates('GBPUSD', end=datetime(2024, 1, 20))
+
+    def fetch(symbol, timeframe, start, end):
+        lo = np.searchsorted(full['time'], BarCache._epoch(start))
+        hi = np.searchsorted(full['time'], BarCache._epoch(end), side='right')
+        return full[lo:hi]
+
+    plain = BarCache(fetch, base_timeframe='M1')
+    compact = BarCache(fetch, base_timeframe='M1', compact='ticks')
+    for start, end in ((datetime(2024, 1, 5), datetime(2024, 1, 10)),
+                       (datetime(2024, 1, 2), datetime(2024, 1, 12)),
+                       (datetime(2024, 1, 3), datetime(2024, 1, 4))):
+        for timeframe in ('M1', 'H4'):
+            np.testing.assert_array_equal(compact.get_rates('GBPUSD', timeframe, start, end),
+                                          plain.get_rates('GBPUSD', timeframe, start, end))
+    assert compact.nbytes < 0.55 * plain.nbytes
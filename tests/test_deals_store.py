@@ -0,0 +1,78 @@
+import sys
+import os
+import asyncio
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+from deals_store import DealsStore, DealsSync
+from mt5_sim import SimulatedMT5
+
+
+def trade(sim, symbol, magic, side):
+    sim.order_send({'action': sim.TRADE_ACTION_DEAL, 'symbol': symbol, 'volume': 0.1, 'magic': magic,
+                    'type': sim.ORDER_TYPE_BUY if side == 'BUY' else sim.ORDER_TYPE_SELL})
+
+
+def test_sync_fetches_only_deals_after_the_watermark():
+    sim = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    sim.initialize()
+    fetched = []
+
+    def fetch(date_from, date_to):
+        deals = sim.history_deals_get(date_from, date_to)
+        fetched.append(len(deals))
+        return deals
+
+    store = DealsStore(':memory:')
+    sync = DealsSync(store, fetch)
+    for _ in range(5):
+        trade(sim, 'EURUSD', 7, 'BUY')
+        sim.advance(600)
+    asyncio.run(sync.sync_now())
+    assert len(store) == 5 and store.watermark == int(sim.now()) - 600
+
+    sim.advance(3600)
+    for _ in range(3):
+        trade(sim, 'GBPUSD', 8, 'SELL')
+    asyncio.run(sync.sync_now())
+    # The second pull starts just behind the watermark: only the last old deal falls inside the overlap
+    assert fetched == [5, 4]
+    assert len(store) == len(sim.history_deals_get(datetime(2000, 1, 1), datetime(2030, 1, 1))) == 8
+    assert store.query(magic=8)['count'] == 3
+
+
+def test_endpoints_page_with_cursor_and_aggregate(monkeypatch):
+    sim = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    sim.initialize()
+    for i in range(7):
+        trade(sim, 'EURUSD' if i % 2 else 'USDJPY', i % 3, 'BUY')
+        sim.advance(60)
+    store = DealsStore(':memory:')
+    sync = DealsSync(store, sim.history_deals_get)
+    asyncio.run(sync.sync_now())
+    monkeypatch.setattr(main, 'mt5', sim)
+    monkeypatch.setattr(main.mt5_manager, 'connected', True)
+    monkeypatch.setattr(main, 'deals_store', store)
+    monkeypatch.setattr(main, 'deals_sync', sync)
+    client = TestClient(main.app)
+
+    tickets, cursor = [], None
+    while True:
+        page = client.get('/api/v1/history/deals', params={'limit': 3, **({'cursor': cursor} if cursor else {})}).json()
+        tickets += [deal['ticket'] for deal in page['data']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert tickets == [deal.ticket for deal in sim.history_deals_get(datetime(2000, 1, 1), datetime(2030, 1, 1))]
+    assert client.get('/api/v1/history/deals', params={'cursor': 'bogus'}).status_code == 400
+    projected = client.get('/api/v1/history/deals', params={'prefix': 'USD', 'fields': 'ticket,profit'}).json()
+    assert projected['count'] == 4 and all(set(deal) == {'ticket', 'profit'} for deal in projected['data'])
+
+    summary = client.get('/api/v1/history/deals/summary', params={'group_by': 'magic'}).json()['data']
+    assert [(row['key'], row['deals']) for row in summary] == [(0, 3), (1, 2), (2, 2)]
+    assert abs(sum(row['volume'] for row in summary) - 0.7) < 1e-9
+    assert client.get('/api/v1/history/deals/summary', params={'group_by': 'ticket'}).status_code == 400
@@ -103,6 +103,16 @@ def test_backtest_sl_tp():
     assert results['trades'][0]['reason'] == 'TP'
     assert results['trades'][0]['exit_price'] == 1.1050 # Entry 1.1000 + 50 pips
 
+def test_backtest_accepts_advanced_strategy_output():
+    tester = EATester()
+    df = create_mock_data(bars=200, trend='sideways')
+    
+    # Advanced strategies emit 'Signal', run_strategy adds a lowercase copy
+    df_bb = tester.run_strategy(df, 'bollinger_bands', {'period': 10, 'std_dev': 1.0})
+    results = tester.backtest(df_bb)
+    
+    assert results['total_trades'] > 0
+
 def test_optimize_parameters_mock():
     tester = EATester()
     df = create_mock_data(bars=50, trend='up')
@@ -118,3 +128,93 @@ def test_optimize_parameters_mock():
     assert 'best_result' in opt_res
     assert 'fast_period' in opt_res['best_params']
     assert 'slow_period' in opt_res['best_params']
+
+def test_multi_timeframe_strategy_is_lookahead_free():
+    tester = EATester()
+    df = create_mock_data(bars=24 * 40, trend='up')
+    df['time'] = pd.date_range('2024-01-01', periods=len(df), freq='h')
+    params = {'ma_period': 5, 'higher_timeframes': ['H4', 'D1']}
+    
+    full = tester.run_strategy(df, 'multi_timeframe_trend', params)
+    assert {'Trend_H1', 'Trend_H4', 'Trend_D1', 'signal'} <= set(full.columns)
+    assert (full['signal'] != 0).any()
+    
+    # Signals for a bar must not change when later bars are removed
+    for cutoff in (200, 431, 700):
+        partial = tester.run_strategy(df.iloc[:cutoff], 'multi_timeframe_trend', params)
+        pd.testing.assert_series_equal(partial['signal'], full['signal'].iloc[:cutoff])
+
+def test_multi_timeframe_from_fetched_frames_matches_resampled_base():
+    from advanced_strategies import AdvancedStrategies
+    from resample import resample_frame
+    
+    df = create_mock_data(bars=24 * 40, trend='up')
+    df['time'] = pd.date_range('2024-01-01', periods=len(df), freq='h')
+    frames = {tf: resample_frame(df[['time', 'open', 'high', 'low', 'close']], tf) for tf in ('H4', 'D1')}
+    
+    resampled = AdvancedStrategies.multi_timeframe_from_base(df.copy(), 'H1', ['H4', 'D1'], ma_period=5)
+    fetched = AdvancedStrategies.multi_timeframe_from_frames(df.copy(), 'H1', frames, ma_period=5)
+    pd.testing.assert_series_equal(fetched['Signal'], resampled['Signal'])
+    
+    # Live trading fetches only ma_period + 2 bars per timeframe; the latest closed bar still agrees
+    tails = {tf: frame.iloc[-7:].reset_index(drop=True) for tf, frame in frames.items()}
+    live = AdvancedStrategies.multi_timeframe_from_frames(df.iloc[-150:].reset_index(drop=True), 'H1', tails, ma_period=5)
+    assert live['Signal'].iloc[-2] == resampled['Signal'].iloc[-2]
+
+def test_higher_timeframe_alignment_waits_for_bar_close():
+    from advanced_strategies import AdvancedStrategies
+    
+    df = pd.DataFrame({'time': pd.date_range('2024-01-01', periods=8, freq='h')})
+    df_h4 = pd.DataFrame({'time': pd.to_datetime(['2024-01-01 00:00', '2024-01-01 04:00']), 'Trend_H4': [1, -1]})
+    
+    AdvancedStrategies.align_higher_timeframe(df, df_h4, ['Trend_H4'], 'H1', 'H4')
+    # The 00:00 H4 bar closes at 04:00, which is the close of the 03:00 H1 bar
+    assert df['Trend_H4'].isna().sum() == 3
+    assert list(df['Trend_H4'].iloc[3:]) == [1, 1, 1, 1, -1]
+
+def test_lean_signals_match_dataframe_path():
+    tester = EATester()
+    df = create_mock_data(bars=1000, trend='sideways')
+    cases = {
+        'simple_ma_crossover': {'fast_period': 5, 'slow_period': 30},
+        'rsi': {'rsi_period': 10, 'oversold': 35, 'overbought': 65},
+        'bollinger_bands': {'period': 15, 'std_dev': 1.5},
+        'macd': {},
+        'stochastic': {'k_period': 10, 'd_period': 4},
+        'ichimoku': {'tenkan': 7, 'kijun': 22, 'senkou_b': 44},
+        'vwap': {'period': 12},
+        'breakout': {'lookback': 15, 'volume_threshold': 1.2},
+        'mean_reversion': {'period': 25, 'std_threshold': 1.5},
+    }
+    for name, params in cases.items():
+        lean = tester.signals(df, name, params)
+        assert lean.dtype == np.int8
+        expected = tester.run_strategy(df, name, params)['signal'].to_numpy()
+        np.testing.assert_array_equal(lean, expected, err_msg=name)
+
+def test_optimizer_lean_path_matches_dataframe_backtest():
+    tester = EATester()
+    df = create_mock_data(bars=400, trend='sideways')
+    result = tester.optimize_parameters(df, 'bollinger_bands', {'period': [10, 20, 30], 'std_dev': [1.0, 2.0]})
+    
+    expected = tester.backtest(tester.run_strategy(df, 'bollinger_bands', result['best_params']))
+    assert result['best_result'] == expected
+
+def test_optimizer_top_k_and_pareto_front():
+    tester = EATester()
+    df = create_mock_data(bars=400, trend='sideways')
+    grid = {'period': [10, 15, 20, 30], 'std_dev': [1.0, 1.5, 2.0]}
+    full = tester.optimize_parameters(df, 'bollinger_bands', grid, objective='sharpe')
+    top = tester.optimize_parameters(df, 'bollinger_bands', grid, objective='sharpe', top_k=3, keep_results=2,
+                                     pareto_objectives=['total_return', 'max_drawdown'])
+    
+    sharpes = [c['risk_metrics']['sharpe'] for c in full['candidates']]
+    assert len(sharpes) == 12 and sharpes == sorted(sharpes, reverse=True)
+    assert top['candidates'] == full['candidates'][:3]
+    assert [r['final_balance'] for r in top['top_results']] == [c['final_balance'] for c in top['candidates'][:2]]
+    assert top['best_result'] == tester.backtest(tester.run_strategy(df, 'bollinger_bands', top['best_params']))
+    
+    points = [(c['risk_metrics']['total_return'], c['risk_metrics']['max_drawdown']) for c in full['candidates']]
+    for candidate in top['pareto_front']:
+        ret, dd = candidate['risk_metrics']['total_return'], candidate['risk_metrics']['max_drawdown']
+        assert not any(r >= ret and d <= dd and (r, d) != (ret, dd) for r, d in points)
@@ -0,0 +1,94 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from advanced_strategies import AdvancedStrategies
+from ea_tester import EATester
+from indicators import BarIndex, rolling_extremes, rolling_max, rolling_min
+
+
+def test_rolling_extremes_match_pandas():
+    rng = np.random.default_rng(3)
+    for n in (0, 1, 7, 64, 1000):
+        high = rng.normal(size=n).cumsum() + 1.0
+        low = high - rng.random(n)
+        if n > 10:
+            high[5] = np.nan
+        windows = [1, 2, 3, 9, 26, 52, 64, 2000]
+        channels = rolling_extremes(high, low, windows)
+        assert sorted(channels) == windows
+        for window, (highest, lowest) in channels.items():
+            np.testing.assert_array_equal(highest, pd.Series(high).rolling(window).max().to_numpy())
+            np.testing.assert_array_equal(lowest, pd.Series(low).rolling(window).min().to_numpy())
+            np.testing.assert_array_equal(rolling_max(high, window), highest)
+            np.testing.assert_array_equal(rolling_min(low, window), lowest)
+
+    with pytest.raises(ValueError):
+        rolling_max([1.0, 2.0], 0)
+
+
+def test_ichimoku_matches_pandas_rolling():
+    rng = np.random.default_rng(7)
+    close = 1.1 + rng.normal(0, 0.001, 500).cumsum()
+    bars = pd.DataFrame({'close': close, 'high': close + rng.random(500) * 0.001,
+                         'low': close - rng.random(500) * 0.001})
+    df = AdvancedStrategies.ichimoku_strategy(bars.copy())
+    high, low = bars['high'], bars['low']
+    kijun = (high.rolling(26).max() + low.rolling(26).min()) / 2
+    senkou_b = ((high.rolling(52).max() + low.rolling(52).min()) / 2).shift(26)
+    pd.testing.assert_series_equal(df['Kijun_sen'], kijun, check_names=False)
+    pd.testing.assert_series_equal(df['Senkou_span_B'], senkou_b, check_names=False)
+
+
+def make_bars(n=2000, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + rng.normal(0, 0.001, n).cumsum()
+    return pd.DataFrame({
+        'time': pd.date_range('2024-01-01', periods=n, freq='h'),
+        'open': close, 'close': close,
+        'high': close + rng.random(n) * 0.001, 'low': close - rng.random(n) * 0.001,
+        'tick_volume': rng.integers(1, 500, n).astype(float),
+    })
+
+
+def test_bar_index_matches_pandas_rolling():
+    bars = make_bars()
+    bars.loc[300, 'close'] = np.nan
+    index = BarIndex(bars)
+    close, volume = bars['close'], bars['tick_volume']
+    for window in (1, 2, 14, 50, 200, 5000):
+        np.testing.assert_allclose(index.sma(window), close.rolling(window).mean(), rtol=1e-12)
+        np.testing.assert_allclose(index.std(window), close.rolling(window).std(), rtol=0, atol=1e-8)
+        np.testing.assert_allclose(index.volume_ma(window), volume.rolling(window).mean(), rtol=1e-12)
+        np.testing.assert_allclose(
+            index.vwap(window), (close * volume).rolling(window).sum() / volume.rolling(window).sum(), rtol=1e-10)
+        np.testing.assert_array_equal(index.highest(window), bars['high'].rolling(window).max())
+        np.testing.assert_array_equal(index.lowest(window), bars['low'].rolling(window).min())
+
+
+def test_indexed_strategies_give_same_signals():
+    bars = make_bars()
+    tester = EATester()
+    index = BarIndex(bars)
+    cases = {
+        'simple_ma_crossover': {'fast_period': 7, 'slow_period': 40},
+        'rsi': {'rsi_period': 9},
+        'bollinger_bands': {'period': 30},
+        'mean_reversion': {'period': 25},
+        'vwap': {'period': 15},
+        'breakout': {'lookback': 12},
+        'stochastic': {'k_period': 21},
+        'ichimoku': {},
+    }
+    for name, params in cases.items():
+        plain = tester.run_strategy(bars, name, params)
+        indexed = tester.run_strategy(bars, name, params, index=index)
+        pd.testing.assert_series_equal(indexed['signal'], plain['signal'], obj=name)
+
+    with pytest.raises(ValueError):
+        tester.run_strategy(bars.iloc[:100], 'rsi', {}, index=index)
@@ -0,0 +1,103 @@
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from jobs import JobManager, JobQueueFull, JobStatus
+
+
+def create_mock_rates(bars=200):
+    """Helper to create a structured array shaped like mt5.copy_rates_range output"""
+    np.random.seed(7)
+    dtype = [('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+             ('close', '<f8'), ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')]
+    rates = np.zeros(bars, dtype=dtype)
+    closes = 1.1000 + np.cumsum(np.random.normal(0, 0.001, bars))
+    rates['time'] = 1700000000 + np.arange(bars) * 3600
+    rates['open'] = np.roll(closes, 1)
+    rates['high'] = closes + 0.0005
+    rates['low'] = closes - 0.0005
+    rates['close'] = closes
+    rates['tick_volume'] = np.random.randint(100, 1000, bars)
+    return rates
+
+
+def wait_for(manager, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job.finished:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish in time")
+
+
+BACKTEST_PARAMS = {
+    'strategy_name': 'simple_ma_crossover',
+    'strategy_params': {'fast_period': 5, 'slow_period': 15},
+    'initial_balance': 10000.0,
+    'lot_size': 0.1,
+    'stop_loss_pips': 0.0,
+    'take_profit_pips': 0.0,
+    'exit_on_opposite_signal': True,
+}
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=1, max_queue=2)
+    yield manager
+    manager.shutdown()
+
+
+def test_backtest_job_completes(manager):
+    job = manager.submit('backtest', create_mock_rates(), BACKTEST_PARAMS)
+    job = wait_for(manager, job.id)
+
+    assert job.status == JobStatus.COMPLETED
+    assert job.progress == 100.0
+    assert 'final_balance' in job.result
+    assert len(job.result['equity_curve']) == 200
+
+
+def test_optimize_job_completes(manager):
+    params = {'strategy_name': 'simple_ma_crossover',
+              'param_ranges': {'fast_period': [5, 8], 'slow_period': [15, 20]}}
+    job = wait_for(manager, manager.submit('optimize', create_mock_rates(), params).id)
+
+    assert job.status == JobStatus.COMPLETED
+    assert 'fast_period' in job.result['best_params']
+
+
+def test_queue_positions_bound_and_cancel(manager):
+    rates = create_mock_rates()
+    running = manager.submit('backtest', rates, BACKTEST_PARAMS)
+    first = manager.submit('backtest', rates, BACKTEST_PARAMS)
+    second = manager.submit('backtest', rates, BACKTEST_PARAMS)
+
+    assert manager.describe(running.id)['queue_position'] is None
+    assert manager.describe(first.id)['queue_position'] == 1
+    assert manager.describe(second.id)['queue_position'] == 2
+
+    with pytest.raises(JobQueueFull):
+        manager.submit('backtest', rates, BACKTEST_PARAMS)
+
+    manager.cancel(first.id)
+    assert manager.get(first.id).status == JobStatus.CANCELLED
+    assert manager.describe(second.id)['queue_position'] == 1
+
+    assert wait_for(manager, second.id).status == JobStatus.COMPLETED
+    listed = manager.list_jobs(include_finished=True)
+    assert {job['job_id'] for job in listed} == {running.id, first.id, second.id}
+
+
+def test_failed_job_reports_error(manager):
+    params = dict(BACKTEST_PARAMS, strategy_name='does_not_exist')
+    job = wait_for(manager, manager.submit('backtest', create_mock_rates(), params).id)
+
+    assert job.status == JobStatus.FAILED
+    assert 'Unknown strategy name' in job.error
@@ -0,0 +1,102 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+from listing import SymbolCatalog
+from mt5_sim import SimulatedMT5
+from snapshots import SnapshotPoller
+
+
+def make_client(monkeypatch, sim):
+    sim.initialize()
+    monkeypatch.setattr(main, 'mt5', sim)
+    monkeypatch.setattr(main.mt5_manager, 'connected', True)
+    monkeypatch.setattr(main, 'symbol_catalog', SymbolCatalog(sim.symbols_get, ttl=60))
+    monkeypatch.setattr(main, 'snapshot_poller', SnapshotPoller({}, interval=60))
+    return TestClient(main.app)
+
+
+def test_symbols_filter_project_and_page_from_the_catalog(monkeypatch):
+    sim = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    client = make_client(monkeypatch, sim)
+
+    everything = client.get('/api/v1/symbols').json()
+    assert everything['count'] == 11 and everything['next_cursor'] is None
+    assert set(everything['data'][0]) == set(main.DEFAULT_SYMBOL_FIELDS)
+
+    names, cursor = [], None
+    while True:
+        params = {'prefix': 'EUR', 'fields': 'name,digits', 'limit': 2, **({'cursor': cursor} if cursor else {})}
+        page = client.get('/api/v1/symbols', params=params).json()
+        assert all(set(row) == {'name', 'digits'} for row in page['data'])
+        names += [row['name'] for row in page['data']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert names == ['EURGBP', 'EURJPY', 'EURUSD']
+
+    crosses = client.get('/api/v1/symbols', params={'path': 'Forex\\Crosses', 'fields': 'name'}).json()
+    assert [row['name'] for row in crosses['data']] == ['EURGBP', 'EURJPY']
+    assert client.get('/api/v1/symbols', params={'fields': 'name,bid'}).status_code == 400
+
+    # Served from the cache: the terminal is only asked once
+    sim.set_latency('symbols_get', 0.5)
+    assert client.get('/api/v1/symbols', params={'prefix': 'XAU'}).elapsed.total_seconds() < 0.5
+
+
+def test_positions_filter_by_magic_time_and_page_by_ticket(monkeypatch):
+    sim = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    client = make_client(monkeypatch, sim)
+    for i in range(6):
+        sim.order_send({'action': sim.TRADE_ACTION_DEAL, 'symbol': 'EURUSD' if i % 2 else 'USDJPY',
+                        'volume': 0.01, 'type': sim.ORDER_TYPE_BUY, 'magic': 1 + i % 2})
+        sim.advance(60)
+
+    assert client.get('/api/v1/positions').json()['count'] == 6
+    tickets, cursor = [], None
+    while True:
+        params = {'magic': 2, 'limit': 2, 'fields': 'ticket,symbol', **({'cursor': cursor} if cursor else {})}
+        page = client.get('/api/v1/positions', params=params).json()
+        assert page['total'] == 3 and all(row['symbol'] == 'EURUSD' for row in page['data'])
+        tickets += [row['ticket'] for row in page['data']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert tickets == sorted(p.ticket for p in sim.positions_get() if p.magic == 2)
+
+    late = client.get('/api/v1/positions', params={'start_date': '2024-03-05T12:03:00', 'prefix': 'USD'}).json()
+    assert late['count'] == 1 and late['data'][0]['symbol'] == 'USDJPY'
+    assert client.get('/api/v1/positions', params={'cursor': 'abc'}).status_code == 400
+
+
+def test_deals_without_a_store_apply_filters_and_limit(monkeypatch):
+    sim = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    client = make_client(monkeypatch, sim)
+    monkeypatch.setattr(main, 'deals_store', None)
+    monkeypatch.setattr(main, 'deals_sync', None)
+    for i in range(6):
+        sim.order_send({'action': sim.TRADE_ACTION_DEAL, 'symbol': 'EURUSD' if i % 2 else 'USDJPY',
+                        'volume': 0.01, 'type': sim.ORDER_TYPE_BUY, 'magic': 1 + i % 2})
+        sim.advance(60)
+    window = {'start_date': '2024-03-05T00:00:00', 'end_date': '2024-03-06T00:00:00'}
+
+    tickets, cursor = [], None
+    while True:
+        params = {**window, 'magic': 2, 'limit': 2, 'fields': 'ticket,symbol', **({'cursor': cursor} if cursor else {})}
+        page = client.get('/api/v1/history/deals', params=params).json()
+        assert page['count'] <= 2 and all(row == {'ticket': row['ticket'], 'symbol': 'EURUSD'} for row in page['data'])
+        tickets += [row['ticket'] for row in page['data']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert tickets == [d.ticket for d in sim.history_deals_get(datetime(2024, 3, 5), datetime(2024, 3, 6)) if d.magic == 2]
+    assert len(tickets) == 3
+
+    assert client.get('/api/v1/history/deals', params={**window, 'prefix': 'USD'}).json()['count'] == 3
+    assert client.get('/api/v1/history/deals', params={**window, 'fields': 'ticket,bid'}).status_code == 400
+    assert client.get('/api/v1/history/deals', params={**window, 'cursor': 'bogus'}).status_code == 400
@@ -0,0 +1,30 @@
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from load_test import LoadTest, in_process_client
+
+
+def test_mixed_workload_against_simulator(monkeypatch):
+    # Let monkeypatch restore the globals in_process_client swaps out
+    monkeypatch.setattr(main, 'mt5', main.mt5)
+    monkeypatch.setattr(main, 'backtest_cache', main.backtest_cache)
+
+    async def scenario():
+        async with in_process_client(seed=1) as client:
+            await client.post('/api/v1/connect', json={'login': 1, 'password': '', 'server': 'Simulator'})
+            try:
+                return await LoadTest(client, rps=40, duration=1.0, mix={'read': 6, 'trade': 3, 'backtest': 1}).run()
+            finally:
+                await client.post('/api/v1/disconnect')
+
+    report = asyncio.run(scenario())
+
+    assert report['requests'] == 40
+    assert report['errors'] == 0
+    assert 'POST /order/place' in report['endpoints']
+    for stats in report['endpoints'].values():
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms'] <= stats['max_ms']
@@ -0,0 +1,83 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import metrics
+from mt5_sim import SimulatedMT5
+
+
+def sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+def test_render_exposition_format():
+    registry = metrics.Registry()
+    requests = metrics.Counter('demo_requests_total', 'Demo requests', ['route'], registry=registry)
+    latency = metrics.Histogram('demo_latency_seconds', 'Demo latency', buckets=(0.1, 1.0), registry=registry)
+    metrics.Gauge('demo_ratio', 'Demo ratio', ['cache'], registry=registry, function=lambda: {('a"b',): 0.5})
+
+    requests.labels('/x').inc()
+    requests.labels('/x').inc(2)
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert '# TYPE demo_requests_total counter' in text
+    assert sample(text, 'demo_requests_total{route="/x"}') == 3
+    assert sample(text, 'demo_latency_seconds_bucket{le="0.1"}') == 1
+    assert sample(text, 'demo_latency_seconds_bucket{le="1"}') == 2
+    assert sample(text, 'demo_latency_seconds_bucket{le="+Inf"}') == 3
+    assert sample(text, 'demo_latency_seconds_count') == 3
+    assert sample(text, 'demo_ratio{cache="a\\"b"}') == 0.5
+
+    with pytest.raises(ValueError):
+        metrics.Counter('demo_requests_total', 'Duplicate', registry=registry)
+    with pytest.raises(ValueError):
+        requests.inc()  # Labelled metrics need label values
+
+
+def test_instrumented_mt5_counts_calls_and_failures():
+    simulator = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    mt5 = metrics.InstrumentedMT5(simulator)
+    errors = metrics.MT5_CALL_ERRORS.labels('symbol_info')
+    calls = metrics.MT5_CALL_DURATION.labels('symbol_info')
+    errors_before, calls_before = errors.value, calls.count
+
+    assert mt5.TIMEFRAME_H1 == simulator.TIMEFRAME_H1
+    mt5.initialize()
+    assert mt5.symbol_info('EURUSD').name == 'EURUSD'
+    assert mt5.symbol_info('UNKNOWN') is None
+
+    assert calls.count - calls_before == 2
+    assert errors.value - errors_before == 1
+    assert metrics.instrument_mt5(mt5) is mt5
+
+
+def test_metrics_endpoint_reports_route_templates(monkeypatch):
+    monkeypatch.setattr(main, 'mt5', metrics.InstrumentedMT5(SimulatedMT5(start_time=datetime(2024, 3, 5, 12))))
+    client = TestClient(main.app)
+    client.post('/api/v1/connect', json={'login': 1, 'password': '', 'server': 'Simulator'})
+    try:
+        client.get('/api/v1/symbol/EURUSD/tick')
+        client.get('/api/v1/symbol/GBPUSD/tick')
+        response = client.get('/metrics')
+    finally:
+        client.post('/api/v1/disconnect')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    text = response.text
+    assert sample(text, 'http_requests_total{method="GET",route="/api/v1/symbol/{symbol}/tick",status="200"}') >= 2
+    assert 'route="/api/v1/symbol/EURUSD/tick"' not in text
+    assert 'mt5_call_duration_seconds_count{function="symbol_info_tick"}' in text
+    assert 'jobs_in_flight{state="running"}' in text
+    assert 'cache_hit_ratio{cache="higher_timeframe"}' in text
@@ -0,0 +1,41 @@
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+import monte_carlo
+from monte_carlo import simulate
+
+
+def test_shuffle_keeps_final_equity_and_chunks_are_seed_stable(monkeypatch):
+    profits = np.random.default_rng(0).normal(4, 40, 300)
+    shuffled = simulate(profits, initial_balance=5000, paths=2000, method='shuffle', seed=1)
+    assert np.allclose(list(shuffled['final_equity'].values()), 5000 + profits.sum())
+    bands = shuffled['max_drawdown']
+    assert bands['p5'] <= bands['p50'] <= bands['p95'] and bands['p95'] > bands['p5']
+
+    whole = {method: simulate(profits, paths=2000, method=method, seed=7) for method in monte_carlo.METHODS}
+    monkeypatch.setattr(monte_carlo, 'MONTE_CARLO_BATCH_BYTES', 1)
+    for method in monte_carlo.METHODS:
+        assert simulate(profits, paths=2000, method=method, seed=7) == whole[method]
+    assert simulate([-100.0, -100.0], initial_balance=150, paths=5, seed=0)['max_drawdown']['p50'] == 100.0
+
+
+def test_endpoint_runs_ten_thousand_paths_quickly():
+    client = TestClient(main.app)
+    profits = np.random.default_rng(3).normal(5, 50, 500).tolist()
+    started = time.perf_counter()
+    response = client.post('/api/v1/backtest/monte-carlo', json={'profits': profits, 'paths': 10000, 'seed': 2})
+    assert time.perf_counter() - started < 1.0
+    assert response.status_code == 200
+    body = response.json()
+    assert body['paths'] == 10000 and body['trades'] == 500
+    assert body['final_equity']['p5'] < body['final_equity']['p95']
+    assert 0 <= body['probability_of_loss'] <= 1
+
+    assert client.post('/api/v1/backtest/monte-carlo', json={'profits': profits, 'method': 'walk'}).status_code == 400
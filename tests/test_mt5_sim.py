@@ -0,0 +1,139 @@
+import sys
+import os
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from mt5_sim import SimulatedMT5
+
+START = datetime(2024, 3, 5, 12, 0)
+
+
+@pytest.fixture
+def sim():
+    simulator = SimulatedMT5(seed=7, start_time=START)
+    simulator.initialize()
+    return simulator
+
+
+def test_bars_are_deterministic_and_consistent_across_timeframes(sim):
+    other = SimulatedMT5(seed=7, start_time=START)
+    other.initialize()
+    h1 = sim.copy_rates_range('EURUSD', sim.TIMEFRAME_H1, datetime(2024, 2, 1), datetime(2024, 3, 1))
+    np.testing.assert_array_equal(h1, other.copy_rates_range('EURUSD', sim.TIMEFRAME_H1,
+                                                             datetime(2024, 2, 1), datetime(2024, 3, 1)))
+    assert np.all(np.diff(h1['time']) > 0)
+    assert np.all(h1['high'] >= np.maximum(h1['open'], h1['close']))
+    assert np.all(h1['low'] <= np.minimum(h1['open'], h1['close']))
+
+    d1 = sim.copy_rates_range('EURUSD', sim.TIMEFRAME_D1, datetime(2024, 2, 1), datetime(2024, 3, 1))
+    assert all(datetime.utcfromtimestamp(t).weekday() < 5 for t in d1['time'])  # No weekend bars for FX
+    first_day = h1[h1['time'] < d1['time'][0] + 86400]
+    assert d1['high'][0] == first_day['high'].max()
+    assert d1['close'][0] == first_day['close'][-1]
+
+    latest = sim.copy_rates_from_pos('EURUSD', sim.TIMEFRAME_M15, 0, 50)
+    assert len(latest) == 50
+    assert latest['time'][-1] <= START.timestamp()
+
+
+def test_market_order_lifecycle_updates_account(sim):
+    result = sim.order_send({'action': sim.TRADE_ACTION_DEAL, 'symbol': 'EURUSD', 'volume': 0.5,
+                             'type': sim.ORDER_TYPE_BUY, 'magic': 11})
+    assert result.retcode == sim.TRADE_RETCODE_DONE
+    position = sim.positions_get(symbol='EURUSD')[0]
+    assert position.price_open == sim.symbol_info_tick('EURUSD').ask
+
+    sim.advance(3 * 3600)
+    close = sim.order_send({'action': sim.TRADE_ACTION_DEAL, 'symbol': 'EURUSD', 'volume': 0.2,
+                            'type': sim.ORDER_TYPE_SELL, 'position': position.ticket})
+    assert close.retcode == sim.TRADE_RETCODE_DONE
+    assert sim.positions_get(ticket=position.ticket)[0].volume == pytest.approx(0.3)
+
+    deals = sim.history_deals_get(position=position.ticket)
+    assert [d.entry for d in deals] == [sim.DEAL_ENTRY_IN, sim.DEAL_ENTRY_OUT]
+    assert sim.account_info().balance == pytest.approx(10000.0 + deals[-1].profit)
+
+
+def test_pending_orders_and_stops_trigger_on_price_moves(sim):
+    tick = sim.symbol_info_tick('EURUSD')
+    for order_type, price in ((sim.ORDER_TYPE_BUY_STOP, tick.ask + 0.0002), (sim.ORDER_TYPE_SELL_STOP, tick.bid - 0.0002)):
+        sim.order_send({'action': sim.TRADE_ACTION_PENDING, 'symbol': 'EURUSD', 'volume': 0.1,
+                        'type': order_type, 'price': price})
+    sim.order_send({'action': sim.TRADE_ACTION_DEAL, 'symbol': 'EURUSD', 'volume': 0.1,
+                    'type': sim.ORDER_TYPE_BUY, 'sl': tick.bid - 0.0005})
+    sim.order_send({'action': sim.TRADE_ACTION_DEAL, 'symbol': 'EURUSD', 'volume': 0.1,
+                    'type': sim.ORDER_TYPE_SELL, 'sl': tick.ask + 0.0005})
+    assert sim.orders_total() == 2
+
+    deals = []
+    for _ in range(96):
+        sim.advance(900)
+        deals = sim.history_deals_get(datetime(2024, 1, 1), datetime(2025, 1, 1))
+        if sim.orders_total() < 2 and any(d.reason == sim.DEAL_REASON_SL for d in deals):
+            break
+    assert sim.orders_total() < 2
+    stopped = [d for d in deals if d.reason == sim.DEAL_REASON_SL]
+    assert stopped and all(d.entry == sim.DEAL_ENTRY_OUT for d in stopped)
+
+
+def test_rejections_and_disconnect(sim):
+    too_big = sim.order_send({'action': sim.TRADE_ACTION_DEAL, 'symbol': 'XAUUSD', 'volume': 100.0,
+                              'type': sim.ORDER_TYPE_BUY})
+    assert too_big.retcode == sim.TRADE_RETCODE_NO_MONEY
+    bad_stops = sim.order_send({'action': sim.TRADE_ACTION_DEAL, 'symbol': 'EURUSD', 'volume': 0.1,
+                                'type': sim.ORDER_TYPE_BUY, 'sl': 2.0})
+    assert bad_stops.retcode == sim.TRADE_RETCODE_INVALID_STOPS
+
+    sim.simulate_disconnect()
+    assert sim.account_info() is None
+    assert sim.last_error()[0] == sim.RES_E_INTERNAL_FAIL_INIT
+
+
+def test_latency_is_paid_once_and_outside_the_lock(sim):
+    sim.set_latency('order_send', 0.3)
+    sim.set_latency('account_info', 0.3)
+    order = threading.Thread(target=sim.order_send, args=({'action': sim.TRADE_ACTION_DEAL, 'symbol': 'EURUSD',
+                                                          'volume': 0.1, 'type': sim.ORDER_TYPE_BUY},))
+    started = time.perf_counter()
+    order.start()
+    time.sleep(0.05)
+    # A probe issued while the order is in flight is not queued behind its latency
+    assert sim.terminal_info() is not None and time.perf_counter() - started < 0.2
+    order.join()
+    # The margin check inside order_send does not add account_info's latency
+    assert time.perf_counter() - started < 0.5 and len(sim.positions_get()) == 1
+
+
+def test_api_runs_against_simulator(sim, monkeypatch):
+    monkeypatch.setattr(main, 'mt5', sim)
+    monkeypatch.setattr(main, 'backtest_cache', None)
+    monkeypatch.setattr(main, 'bar_cache', None)
+    client = TestClient(main.app)
+
+    assert client.post('/api/v1/connect', json={'login': 1, 'password': 'x', 'server': 'Sim'}).status_code == 200
+    try:
+        order = client.post('/api/v1/order/place', json={'symbol': 'GBPUSD', 'order_type': 'BUY', 'volume': 0.1})
+        assert order.status_code == 200
+        positions = client.get('/api/v1/positions').json()['data']
+        assert len(positions) == 1
+
+        closed = client.post(f"/api/v1/position/close/{positions[0]['ticket']}")
+        assert closed.status_code == 200
+        assert client.get('/api/v1/positions').json()['data'] == []
+
+        backtest = client.post('/api/v1/backtest', json={
+            'symbol': 'EURUSD', 'timeframe': 'H1', 'start_date': '2024-01-01T00:00:00',
+            'end_date': '2024-03-01T00:00:00', 'strategy_name': 'simple_ma_crossover',
+            'strategy_params': {'fast_period': 10, 'slow_period': 30}})
+        assert backtest.status_code == 200, backtest.text
+        assert backtest.json()['total_trades'] > 0
+    finally:
+        client.post('/api/v1/disconnect')
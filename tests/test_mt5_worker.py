@@ -0,0 +1,112 @@
+import sys
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from mt5_sim import SimulatedMT5
+from mt5_worker import MT5QueueFull, MT5Worker
+
+
+def test_worker_runs_calls_in_order_on_one_thread():
+    worker = MT5Worker(max_queue=3)
+    seen = []
+    futures = worker.submit_many([(lambda i: seen.append((i, threading.current_thread().name)), (i,)) for i in range(3)])
+    results = [future.result() for future in futures]
+    assert [i for i, _ in seen] == [0, 1, 2]
+    assert len({name for _, name in seen}) == 1 and seen[0][1].startswith('mt5-worker')
+    assert all(result.error is None and result.latency_ms >= 0 for result in results)
+
+    failed = worker.submit(lambda: 1 / 0).result()
+    assert isinstance(failed.error, ZeroDivisionError)
+
+    gate = threading.Event()
+    worker.submit_many([(gate.wait, ())] * 3)
+    with pytest.raises(MT5QueueFull):
+        worker.submit(lambda: None)
+    gate.set()
+    worker.shutdown()
+
+
+def test_batch_orders_resolve_each_symbol_once(monkeypatch):
+    sim = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    sim.initialize()
+    calls = Counter()
+    original = sim._call
+
+    def counting_call(function):
+        calls[function] += 1
+        return original(function)
+
+    monkeypatch.setattr(sim, '_call', counting_call)
+    monkeypatch.setattr(main, 'mt5', sim)
+    monkeypatch.setattr(main.mt5_manager, 'connected', True)
+    client = TestClient(main.app)
+
+    legs = [{'symbol': symbol, 'order_type': side, 'volume': 0.01}
+            for symbol in ('EURUSD', 'GBPUSD', 'USDJPY') for side in ('BUY', 'SELL') * 5]
+    legs += [{'symbol': 'NOPE', 'order_type': 'BUY', 'volume': 0.01},
+             {'symbol': 'EURUSD', 'order_type': 'BUY_LIMIT', 'volume': 0.01}]
+    body = client.post('/api/v1/orders/batch', json={'orders': legs}).json()
+
+    assert body['status'] == 'partial' and body['succeeded'] == 30 and body['failed'] == 2
+    assert [entry['index'] for entry in body['results']] == list(range(32))
+    assert body['results'][30]['error'] == 'Symbol NOPE not found'
+    assert 'price is required' in body['results'][31]['error']
+    assert all(entry['latency_ms'] >= 0 for entry in body['results'][:30])
+    assert calls['symbol_info'] == 4 and calls['symbol_info_tick'] == 3 and calls['order_send'] == 30
+    assert len(sim.positions_get()) == 30
+
+
+def test_bulk_close_filters_and_flatten(monkeypatch):
+    sim = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    sim.initialize()
+    monkeypatch.setattr(main, 'mt5', sim)
+    monkeypatch.setattr(main.mt5_manager, 'connected', True)
+    client = TestClient(main.app)
+
+    legs = [{'symbol': symbol, 'order_type': side, 'volume': 0.01, 'magic': magic}
+            for symbol in ('EURUSD', 'USDJPY') for side in ('BUY', 'SELL') for magic in (1, 2)]
+    assert client.post('/api/v1/orders/batch', json={'orders': legs}).json()['succeeded'] == 8
+
+    body = client.post('/api/v1/positions/close', json={'symbol': 'EURUSD', 'side': 'BUY'}).json()
+    assert body['matched'] == body['closed'] == 2 and body['status'] == 'success'
+    assert {(entry['symbol'], entry['side']) for entry in body['results']} == {('EURUSD', 'BUY')}
+    assert client.post('/api/v1/positions/close', json={'magic': 2}).json()['closed'] == 3
+
+    left = {(p.symbol, p.type, p.magic) for p in sim.positions_get()}
+    assert left == {('EURUSD', sim.POSITION_TYPE_SELL, 1), ('USDJPY', sim.POSITION_TYPE_BUY, 1),
+                    ('USDJPY', sim.POSITION_TYPE_SELL, 1)}
+    flattened = client.post('/api/v1/positions/flatten').json()
+    assert flattened['closed'] == 3 and flattened['total_ms'] >= 0
+    assert not sim.positions_get()
+
+
+def test_single_order_close_and_tick_run_on_the_worker(monkeypatch):
+    sim = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    sim.initialize()
+    threads = {}
+    original = sim._call
+
+    def recording_call(function):
+        threads.setdefault(function, set()).add(threading.current_thread().name.split('_')[0])
+        return original(function)
+
+    monkeypatch.setattr(sim, '_call', recording_call)
+    monkeypatch.setattr(main, 'mt5', sim)
+    monkeypatch.setattr(main.mt5_manager, 'connected', True)
+    client = TestClient(main.app)
+
+    assert client.post('/api/v1/order/place', json={'symbol': 'EURUSD', 'order_type': 'BUY', 'volume': 0.01}).status_code == 200
+    ticket = sim.positions_get()[0].ticket
+    assert client.post(f'/api/v1/position/close/{ticket}').status_code == 200
+    assert client.get('/api/v1/symbol/EURUSD/tick').status_code == 200
+    assert client.post('/api/v1/order/place', json={'symbol': 'NOPE', 'order_type': 'BUY', 'volume': 0.01}).status_code == 404
+    assert not sim.positions_get()
+    assert all(threads[function] == {'mt5-worker'} for function in ('symbol_info', 'symbol_info_tick', 'order_send'))
@@ -0,0 +1,66 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ea_tester import EATester
+from portfolio import PortfolioBacktester, align_to_axis
+from tests.test_jobs import create_mock_rates
+
+LEG = {'symbol': 'EURUSD', 'strategy_name': 'simple_ma_crossover',
+       'strategy_params': {'fast_period': 5, 'slow_period': 15}, 'lot_size': 0.1}
+
+
+def test_align_to_axis_forward_fills():
+    axis = np.array([0, 5, 10, 15, 20])
+    aligned = align_to_axis(axis, np.array([10, 20]), np.array([1.0, 2.0]))
+    np.testing.assert_array_equal(aligned, [0.0, 0.0, 1.0, 1.0, 2.0])
+
+
+def test_single_leg_matches_standalone_backtest():
+    rates = create_mock_rates(300)
+    result = PortfolioBacktester().run([LEG], {'EURUSD': rates}, initial_balance=10000.0, parallel=False)
+
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    tester = EATester()
+    expected = tester.backtest(tester.run_strategy(df, LEG['strategy_name'], LEG['strategy_params']))
+
+    assert result['final_balance'] == pytest.approx(expected['final_balance'])
+    np.testing.assert_allclose(result['equity_curve'], expected['equity_curve'])
+    assert result['total_trades'] == expected['total_trades']
+
+
+def test_legs_share_one_account_over_merged_axis():
+    eurusd = create_mock_rates(300)
+    gbpusd = create_mock_rates(200)
+    gbpusd['time'] += 1800  # Offset bar times so the axis has to be merged
+    legs = [LEG, dict(LEG, symbol='GBPUSD', strategy_name='rsi', strategy_params={})]
+    backtester = PortfolioBacktester(max_workers=2)
+    try:
+        result = backtester.run(legs, {'EURUSD': eurusd, 'GBPUSD': gbpusd}, initial_balance=5000.0, parallel=True)
+    finally:
+        backtester.shutdown()
+
+    assert len(result['timestamps']) == 500
+    assert len(result['legs']) == 2
+    net = sum(leg['net_profit'] for leg in result['legs'])
+    assert result['final_balance'] == pytest.approx(5000.0 + net)
+    assert result['max_drawdown'] >= 0.0
+
+
+def test_stop_out_freezes_account_but_is_reported_as_pnl_aggregation():
+    rates = create_mock_rates(300)
+    result = PortfolioBacktester().run([dict(LEG, lot_size=50.0)], {'EURUSD': rates}, initial_balance=1.0,
+                                       parallel=False)
+
+    assert result['account_model'] == 'pnl_aggregation'
+    assert result['stopped_out_at'] is not None
+    cut = result['timestamps'].index(result['stopped_out_at'][:19])
+    assert len(set(result['equity_curve'][cut:])) == 1
+    # Legs are not halted: their trades run past the stop-out
+    assert result['legs'][0]['trades'][-1]['exit_time'] > result['stopped_out_at'].replace('T', ' ')
@@ -0,0 +1,67 @@
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+from config import settings
+from profiler import Profile, Sampler
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler_collects_stacks_in_both_formats():
+    profile = Profile('p1', 'GET', '/demo', interval=0.001)
+    sampler = Sampler(profile)
+    sampler.start()
+    busy_wait(0.1)
+    sampler.stop()
+
+    assert profile.sample_count > 0
+    collapsed = profile.collapsed()
+    assert 'busy_wait (test_profiler.py:' in collapsed
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in collapsed.strip().splitlines())
+
+    speedscope = profile.speedscope()
+    frames = speedscope['shared']['frames']
+    data = speedscope['profiles'][0]
+    assert data['type'] == 'sampled'
+    assert len(data['samples']) == len(data['weights'])
+    assert all(0 <= i < len(frames) for stack in data['samples'] for i in stack)
+
+
+def test_profiling_requires_admin_and_stores_profile(monkeypatch):
+    client = TestClient(main.app)
+
+    monkeypatch.setattr(settings, 'ADMIN_API_KEY', None)
+    assert client.get('/api/v1/health', headers={'X-Profile': '1'}).status_code == 403
+    assert client.get('/api/v1/profiles').status_code == 404
+
+    monkeypatch.setattr(settings, 'ADMIN_API_KEY', 'test-admin-key')
+    plain = client.get('/api/v1/health')
+    assert 'x-profile-id' not in plain.headers
+    assert client.get('/api/v1/health?profile=1', headers={'X-Admin-Key': 'wrong'}).status_code == 403
+
+    admin = {'X-Admin-Key': 'test-admin-key'}
+    response = client.get('/api/v1/health?profile=1', headers={**admin, 'X-Profile-Interval-Ms': '1'})
+    assert response.status_code == 200
+    profile_id = response.headers['x-profile-id']
+
+    listing = client.get('/api/v1/profiles', headers=admin).json()['profiles']
+    assert listing[0]['id'] == profile_id
+    assert listing[0]['path'] == '/api/v1/health'
+    assert listing[0]['status'] == 200
+
+    assert client.get(f'/api/v1/profiles/{profile_id}').status_code == 403
+    speedscope = client.get(f'/api/v1/profiles/{profile_id}', headers=admin)
+    assert speedscope.json()['profiles'][0]['type'] == 'sampled'
+    collapsed = client.get(f'/api/v1/profiles/{profile_id}?format=collapsed', headers=admin)
+    assert collapsed.headers['content-type'].startswith('text/plain')
+    assert client.get('/api/v1/profiles/missing', headers=admin).status_code == 404
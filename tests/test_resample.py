@@ -0,0 +1,145 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from resample import BarCache, resample_frame, resample_rates
+
+RATES_DTYPE = [('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+               ('close', '<f8'), ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')]
+
+
+def create_m1_rates(start='2024-01-01', days=10, skip_weekends=True):
+    """Helper to create M1 rates with a weekend gap like real FX data"""
+    times = pd.date_range(start, periods=days * 1440, freq='min')
+    if skip_weekends:
+        times = times[times.dayofweek < 5]
+    np.random.seed(3)
+    n = len(times)
+    closes = 1.1 + np.cumsum(np.random.normal(0, 0.0001, n))
+    rates = np.zeros(n, dtype=RATES_DTYPE)
+    rates['time'] = times.values.astype('datetime64[s]').astype(np.int64)
+    rates['open'] = np.r_[closes[0], closes[:-1]]
+    rates['high'] = np.maximum(rates['open'], closes) + 0.00005
+    rates['low'] = np.minimum(rates['open'], closes) - 0.00005
+    rates['close'] = closes
+    rates['tick_volume'] = np.random.randint(1, 100, n)
+    rates['spread'] = np.random.randint(1, 20, n)
+    return rates
+
+
+def pandas_reference(rates, rule, offset=None):
+    df = pd.DataFrame(rates)
+    df.index = pd.to_datetime(df['time'], unit='s')
+    agg = df.resample(rule, offset=offset).agg({'open': 'first', 'high': 'max', 'low': 'min',
+                                                'close': 'last', 'tick_volume': 'sum'})
+    return agg.dropna()
+
+
+@pytest.mark.parametrize('timeframe,rule', [('M15', '15min'), ('H1', '1h'), ('H4', '4h'), ('D1', '1D')])
+def test_matches_pandas_resample(timeframe, rule):
+    rates = create_m1_rates()
+    result = resample_rates(rates, timeframe, base_timeframe='M1')
+    expected = pandas_reference(rates, rule)
+
+    assert len(result) == len(expected)
+    np.testing.assert_array_equal(pd.to_datetime(result['time'], unit='s'), expected.index)
+    for field in ('open', 'high', 'low', 'close', 'tick_volume'):
+        np.testing.assert_allclose(result[field], expected[field].to_numpy())
+
+
+def test_weekly_and_monthly_alignment():
+    rates = create_m1_rates(start='2024-01-25', days=20, skip_weekends=False)
+
+    weekly = pd.to_datetime(resample_rates(rates, 'W1')['time'], unit='s')
+    assert all(day.dayofweek == 6 for day in weekly)  # MT5 weeks open on Sunday
+
+    monthly = pd.to_datetime(resample_rates(rates, 'MN1')['time'], unit='s')
+    assert list(monthly) == [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01')]
+
+
+def test_session_offset_shifts_day_boundary():
+    rates = create_m1_rates(days=3, skip_weekends=False)
+    offset = -7 * 3600  # Day rolls at 17:00
+
+    daily = resample_rates(rates, 'D1', session_offset=offset)
+    assert all(ts.hour == 17 for ts in pd.to_datetime(daily['time'], unit='s'))
+    expected = pandas_reference(rates, '24h', offset='17h')
+    np.testing.assert_allclose(daily['close'], expected['close'].to_numpy())
+
+
+def test_rejects_incompatible_base_and_drops_incomplete_bar():
+    rates = create_m1_rates(days=1, skip_weekends=False)[:-30]  # Last H1 bar is half formed
+
+    with pytest.raises(ValueError):
+        resample_rates(rates, 'M1', base_timeframe='M5')
+    assert len(resample_rates(rates, 'H1', base_timeframe='M1')) == 24
+    assert len(resample_rates(rates, 'H1', base_timeframe='M1', drop_incomplete=True)) == 23
+
+
+def test_resample_frame_keeps_datetime_column():
+    rates = create_m1_rates(days=1, skip_weekends=False)
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+
+    h1 = resample_frame(df, 'H1')
+    assert pd.api.types.is_datetime64_any_dtype(h1['time'])
+    assert len(h1) == 24
+
+
+def test_bar_cache_fetches_only_missing_ranges():
+    full = create_m1_rates(start='2024-01-01', days=6, skip_weekends=False)
+    calls = []
+
+    def fetch(symbol, timeframe, start, end):
+        calls.append((start, end))
+        lo = np.searchsorted(full['time'], BarCache._epoch(start))
+        hi = np.searchsorted(full['time'], BarCache._epoch(end), side='right')
+        return full[lo:hi]
+
+    cache = BarCache(fetch, base_timeframe='M1')
+    h4 = cache.get_rates('EURUSD', 'H4', datetime(2024, 1, 2), datetime(2024, 1, 4))
+    d1 = cache.get_rates('EURUSD', 'D1', datetime(2024, 1, 2), datetime(2024, 1, 4))
+    # The D1 request needs the rest of Jan 4, so only the tail is fetched
+    assert len(calls) == 2
+    assert len(h4) == 13 and len(d1) == 3
+
+    cache.get_rates('EURUSD', 'H1', datetime(2024, 1, 1), datetime(2024, 1, 5))
+    assert len(calls) == 4  # One head and one tail extension
+    base = cache.get_base('EURUSD', datetime(2024, 1, 1), datetime(2024, 1, 5))
+    assert np.all(np.diff(base['time']) == 60)
+    assert base['time'][0] == full['time'][0]
+
+
+def test_bar_cache_matches_copy_rates_range_buckets():
+    full = create_m1_rates(start='2024-01-01', days=6, skip_weekends=False)
+    available = {'until': int(full['time'][len(full) // 2])}
+
+    def fetch(symbol, timeframe, start, end):
+        lo = np.searchsorted(full['time'], BarCache._epoch(start))
+        hi = np.searchsorted(full['time'], min(BarCache._epoch(end), available['until']), side='right')
+        return full[lo:hi]
+
+    def copy_rates_range(timeframe, start, end):
+        bars = resample_rates(full[full['time'] <= available['until']], timeframe)
+        return bars[(bars['time'] >= BarCache._epoch(start)) & (bars['time'] <= BarCache._epoch(end))]
+
+    cache = BarCache(fetch, base_timeframe='M1')
+    start, end = datetime(2024, 1, 1, 13), datetime(2024, 1, 2, 13)
+    # No partial D1 bar stamped before the start, and the last bar covers its whole day
+    d1 = cache.get_rates('EURUSD', 'D1', start, end)
+    assert list(d1['time']) == [BarCache._epoch(datetime(2024, 1, 2))]
+    assert np.array_equal(d1, copy_rates_range('D1', start, end))
+
+    # A request into the future must not mark bars that have not formed yet as cached
+    future = datetime(2024, 1, 10)
+    before = cache.get_rates('EURUSD', 'H4', datetime(2024, 1, 2), future)
+    available['until'] = int(full['time'][-1])
+    after = cache.get_rates('EURUSD', 'H4', datetime(2024, 1, 2), future)
+    assert len(after) > len(before)
+    assert np.array_equal(after, copy_rates_range('H4', datetime(2024, 1, 2), future))
@@ -0,0 +1,49 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from advanced_strategies import RiskManagement
+from ea_tester import EATester
+from risk_metrics import batch_risk_metrics, metrics_row
+from tests.test_ea_tester import create_mock_data
+
+
+def test_batch_matches_risk_management_per_curve():
+    rng = np.random.default_rng(7)
+    curves = 10000 * np.cumprod(1 + rng.normal(0.0002, 0.004, (5, 400)), axis=1)
+    curves[2, 100:160] = curves[2, 99]  # plateau inside the first drawdown
+    metrics = batch_risk_metrics(curves, risk_free_rate=0.02)
+
+    for row, curve in enumerate(curves):
+        equity = pd.Series(curve)
+        returns = equity.pct_change().dropna()
+        max_dd, start, end = RiskManagement.calculate_max_drawdown(equity)
+        assert np.isclose(metrics['sharpe'][row], RiskManagement.calculate_sharpe_ratio(returns))
+        assert np.isclose(metrics['max_drawdown'][row] * 100, max_dd)
+        assert (metrics['drawdown_start'][row], metrics['drawdown_end'][row]) == (start, end)
+        assert np.isclose(metrics['var'][row], RiskManagement.calculate_var(returns))
+        assert metrics['cvar'][row] <= metrics['var'][row]
+
+    flat = metrics_row(batch_risk_metrics(np.full((1, 10), 100.0)), 0)
+    assert flat['sharpe'] == 0.0 and flat['calmar'] is None and flat['exposure'] == 0.0
+
+
+def test_optimizer_scores_every_candidate():
+    tester = EATester()
+    df = create_mock_data(bars=300, trend='sideways')
+    result = tester.optimize_parameters(df, 'simple_ma_crossover',
+                                        {'fast_period': [3, 5, 8], 'slow_period': [13, 21]})
+
+    assert sorted((c['params']['fast_period'], c['params']['slow_period']) for c in result['candidates']) == [
+        (f, s) for f in (3, 5, 8) for s in (13, 21)
+    ]
+    for candidate in result['candidates']:
+        single = tester.backtest(tester.run_strategy(df, 'simple_ma_crossover', candidate['params']))
+        assert candidate['final_balance'] == single['final_balance']
+        for name, value in single['risk_metrics'].items():
+            assert value == candidate['risk_metrics'][name] or np.isclose(value, candidate['risk_metrics'][name])
+    assert result['best_result']['risk_metrics'] is not None
@@ -0,0 +1,64 @@
+import sys
+import os
+import asyncio
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+from mt5_sim import SimulatedMT5
+from snapshots import SnapshotPoller
+
+
+def test_versions_move_only_on_change_and_stale_snapshots_are_dropped():
+    state = {'positions': [], 'calls': 0}
+
+    def positions():
+        state['calls'] += 1
+        return list(state['positions'])
+
+    async def scenario():
+        poller = SnapshotPoller({'positions': positions}, interval=0.01)
+        poller.start()
+        await asyncio.sleep(0.05)
+        first = poller.get('positions')
+        assert first.version == 1 and first.data == [] and state['calls'] > 1
+
+        state['positions'].append({'ticket': 1})
+        poller.poke()
+        await asyncio.sleep(0.005)
+        second = poller.get('positions')
+        assert second.version == 2 and second.etag != first.etag
+        poller.stop()
+        await asyncio.sleep(0.05)
+        assert poller.get('positions') is None and not poller.running
+
+    asyncio.run(scenario())
+
+
+def test_endpoints_serve_snapshot_with_etags(monkeypatch):
+    sim = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    sim.initialize()
+    monkeypatch.setattr(main, 'mt5', sim)
+    monkeypatch.setattr(main.mt5_manager, 'connected', True)
+    poller = SnapshotPoller({'positions': main.mt5_manager.get_positions, 'orders': main.mt5_manager.get_orders},
+                            interval=60)
+    monkeypatch.setattr(main, 'snapshot_poller', poller)
+    client = TestClient(main.app)
+
+    asyncio.run(poller.refresh())
+    response = client.get('/api/v1/positions')
+    assert response.status_code == 200 and response.json()['count'] == 0
+    etag, version = response.headers['ETag'], response.json()['version']
+    assert client.get('/api/v1/positions', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/v1/positions', headers={'If-None-Match': f'"other", W/{etag}'}).status_code == 304
+    assert client.get(f'/api/v1/positions?version={version}').status_code == 304
+
+    assert client.post('/api/v1/orders/batch', json={'orders': [{'symbol': 'EURUSD', 'order_type': 'BUY', 'volume': 0.01}]}).json()['succeeded'] == 1
+    asyncio.run(poller.refresh())
+    changed = client.get('/api/v1/positions', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.json()['count'] == 1 and changed.headers['ETag'] != etag
+    # Orders did not change, so their version did not move
+    assert client.get('/api/v1/orders?version=1').status_code == 304
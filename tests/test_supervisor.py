@@ -0,0 +1,109 @@
+import sys
+import os
+import asyncio
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+import metrics
+import supervisor
+from mt5_sim import SimulatedMT5
+from mt5_worker import MT5Worker
+from supervisor import ConnectionSupervisor
+
+
+def test_reconnects_after_terminal_drop_and_warms_caches(monkeypatch):
+    sim = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    monkeypatch.setattr(main, 'mt5', sim)
+    monkeypatch.setattr(main.mt5_manager, 'connected', False)
+    monkeypatch.setattr(main.mt5_manager, 'credentials', None)
+    for attribute in ('login', 'server', 'account_info'):
+        monkeypatch.setattr(main.mt5_manager, attribute, getattr(main.mt5_manager, attribute))
+    main.mt5_manager.connect(login=10000001, password='demo', server='Simulator-Demo')
+    warmed = []
+    sup = ConnectionSupervisor(main.mt5_manager.probe, main.mt5_manager.reconnect, interval=0.01, backoff=0.01,
+                               enabled=lambda: main.mt5_manager.credentials is not None,
+                               on_down=main.mark_disconnected, on_up=lambda: warmed.append(sim.now()))
+    monkeypatch.setattr(main, 'connection_supervisor', sup)
+    reconnects_before = metrics.MT5_RECONNECTS._default().value
+
+    async def scenario():
+        await sup.step()
+        assert sup.up and sup.missed_probes == 0
+        sim.simulate_disconnect()
+        await sup.step()
+        # One miss is tolerated, the second one triggers the reconnect
+        assert sup.up and main.mt5_manager.connected
+        await sup.step()
+
+    asyncio.run(scenario())
+    assert sup.up and sup.reconnects == 1 and len(warmed) == 1
+    assert main.mt5_manager.connected and sim.account_info() is not None
+    assert sup.downtime > 0 and sup.down_since is None
+    assert metrics.MT5_RECONNECTS._default().value == reconnects_before + 1
+
+    client = TestClient(main.app)
+    assert client.get('/api/v1/health').json()['mt5_connection']['reconnects'] == 1
+    if main.settings.METRICS_ENABLED:
+        assert 'mt5_downtime_seconds_total' in client.get('/metrics').text
+
+
+def test_backoff_doubles_until_reconnect_succeeds_and_stops_when_disabled(monkeypatch):
+    state = {'healthy': False, 'attempts': 0, 'enabled': True}
+    delays = []
+
+    async def fake_sleep(seconds):
+        delays.append(seconds)
+
+    def reconnect():
+        state['attempts'] += 1
+        if state['attempts'] < 4:
+            raise RuntimeError("terminal not running")
+        state['healthy'] = True
+
+    monkeypatch.setattr(supervisor.random, 'uniform', lambda low, high: 1.0)
+    sup = ConnectionSupervisor(lambda: state['healthy'], reconnect, backoff=1.0, max_backoff=3.0, failure_threshold=1,
+                               enabled=lambda: state['enabled'])
+
+    async def scenario():
+        monkeypatch.setattr(supervisor.asyncio, 'sleep', fake_sleep)
+        await sup.step()
+
+    asyncio.run(scenario())
+    assert delays == [1.0, 2.0, 3.0] and sup.reconnect_failures == 3 and sup.reconnects == 1 and sup.up
+
+    def slow_probe():
+        time.sleep(0.2)
+        return True
+
+    async def disabled_while_down():
+        slow = ConnectionSupervisor(slow_probe, reconnect, timeout=0.05, failure_threshold=1,
+                                    runner=lambda fn: asyncio.get_running_loop().run_in_executor(None, fn), enabled=lambda: state['enabled'])
+        state['enabled'] = False
+        await slow.mark_down()
+        await slow.recover()
+        assert slow.reconnects == 0 and not slow.up
+        await slow.step()
+        assert slow.up and slow.downtime > 0
+        state['enabled'] = True
+        assert not await slow.check() and 'timed out' in slow.last_error
+
+    asyncio.run(disabled_while_down())
+
+    async def reconnect_queued_behind_hung_probe():
+        worker = MT5Worker()
+        hung = ConnectionSupervisor(slow_probe, reconnect, timeout=0.05, failure_threshold=1, runner=worker.call,
+                                    enabled=lambda: hung.reconnect_failures < 1)
+        await hung.step()
+        return hung, worker
+
+    hung, worker = asyncio.run(reconnect_queued_behind_hung_probe())
+    assert hung.reconnect_failures == 1 and hung.reconnects == 0 and 'Reconnect timed out' in hung.last_error
+    time.sleep(0.25)
+    # The cancelled reconnect left the queue without running
+    assert worker.pending == 0 and state['attempts'] == 4
+    worker.shutdown()
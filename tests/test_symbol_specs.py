@@ -0,0 +1,104 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import main
+from ea_tester import EATester
+from mt5_sim import SimulatedMT5
+from symbol_specs import SymbolSpec, SymbolSpecRegistry
+
+
+def simulator():
+    sim = SimulatedMT5(start_time=datetime(2024, 3, 5, 12))
+    sim.initialize()
+    return sim
+
+
+def test_registry_loads_once_and_persists_for_offline_use(tmp_path):
+    sim = simulator()
+    calls = []
+
+    def loader(symbol):
+        calls.append(symbol)
+        return sim.symbol_info(symbol)
+
+    path = str(tmp_path / 'specs.json')
+    registry = SymbolSpecRegistry(loader, path=path)
+    for _ in range(3):
+        eurusd, usdjpy, gold = registry.get('EURUSD'), registry.get('USDJPY'), registry.get('XAUUSD')
+    assert calls == ['EURUSD', 'USDJPY', 'XAUUSD']
+    assert registry.get('NOPE') is None
+    assert (eurusd.pip_size, usdjpy.pip_size, gold.pip_size) == (0.0001, 0.01, 0.01)
+    assert np.isclose(eurusd.price_value, 100000.0)
+
+    offline = SymbolSpecRegistry(path=path)
+    assert offline.get('USDJPY').to_dict() == usdjpy.to_dict()
+    assert offline.get('EURUSD').price_value == eurusd.price_value
+
+
+def test_backtest_uses_spec_for_pnl_and_stops():
+    sim = simulator()
+    rates = sim.copy_rates_range('USDJPY', sim.TIMEFRAME_H1, datetime(2024, 1, 1), datetime(2024, 3, 1))
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    tester = EATester()
+    frame = tester.run_strategy(df, 'simple_ma_crossover', {'fast_period': 5, 'slow_period': 20})
+
+    spec = SymbolSpec.from_symbol_info(sim.symbol_info('USDJPY'))
+    guessed = tester.backtest(frame, stop_loss_pips=30)
+    assert guessed == tester.backtest(frame, stop_loss_pips=30, spec=SymbolSpec.guess(float(df['close'].iloc[0])))
+    exact = tester.backtest(frame, stop_loss_pips=30, spec=spec)
+    assert exact['total_trades'] == guessed['total_trades'] > 0
+    # USD-account P&L: JPY profits converted through the tick value instead of a fixed 1000 contract guess
+    ratio = spec.price_value / 1000.0
+    for a, b in zip(exact['trades'], guessed['trades']):
+        assert np.isclose(a['profit'], b['profit'] * ratio)
+
+
+def test_spec_endpoint(monkeypatch):
+    monkeypatch.setattr(main, 'mt5', simulator())
+    monkeypatch.setattr(main, 'symbol_specs', SymbolSpecRegistry(lambda symbol: main.mt5.symbol_info(symbol)))
+    client = TestClient(main.app)
+    body = client.get('/api/v1/symbol/EURUSD/spec').json()
+    assert body['data']['digits'] == 5 and body['data']['pip_size'] == 0.0001
+    assert client.get('/api/v1/symbol/NOPE/spec?refresh=true').status_code == 404
+
+
+def test_expired_and_persisted_specs_reload_when_the_terminal_answers(tmp_path, monkeypatch):
+    sim = simulator()
+    state = {'online': True, 'tick_value': None, 'calls': 0}
+
+    def loader(symbol):
+        state['calls'] += 1
+        if not state['online']:
+            return None
+        info = sim.symbol_info(symbol)
+        return info._replace(trade_tick_value=state['tick_value']) if state['tick_value'] else info
+
+    path = str(tmp_path / 'specs.json')
+    registry = SymbolSpecRegistry(loader, path=path, ttl=60)
+    original = registry.get('USDJPY').tick_value
+    clock = [1000.0]
+    monkeypatch.setattr('symbol_specs.time.time', lambda: clock[0])
+    registry.put(registry.get('USDJPY'))
+    state['tick_value'] = original * 1.05
+    clock[0] += 30
+    assert registry.get('USDJPY').tick_value == original and state['calls'] == 1
+    clock[0] += 30
+    assert registry.get('USDJPY').tick_value == original * 1.05 and state['calls'] == 2
+
+    # Offline: the expired spec is still served; a restart with a terminal refreshes the persisted one
+    state['online'] = False
+    clock[0] += 60
+    assert registry.get('USDJPY').tick_value == original * 1.05
+    restarted = SymbolSpecRegistry(loader, path=path)
+    assert restarted.refresh() == 0 and restarted.get('USDJPY').tick_value == original * 1.05
+    state['online'], state['tick_value'] = True, original * 0.9
+    assert restarted.refresh() == 1 and restarted.get('USDJPY').tick_value == original * 0.9
+    assert SymbolSpecRegistry(path=path).get('USDJPY').tick_value == original * 0.9
@@ -0,0 +1,67 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracemalloc
+
+from fastapi.testclient import TestClient
+
+import main
+from mt5_sim import SimulatedMT5
+from timings import PhaseTimer
+
+
+def test_phases_accumulate_and_trace_allocations():
+    was_tracing = tracemalloc.is_tracing()
+    timer = PhaseTimer(trace_memory=True)
+    for _ in range(3):
+        with timer.phase('build', bars=10):
+            data = [0.0] * 100_000
+            del data
+    timer.start('fetch')
+    timer.stop(bars=42)
+    report = timer.report()
+
+    build, fetch = report['phases']
+    assert build['phase'] == 'build' and build['calls'] == 3 and build['bars'] == 30
+    assert build['allocated_bytes'] > 3 * 700_000
+    assert fetch['bars'] == 42
+    assert report['wall_ms'] >= build['wall_ms'] + fetch['wall_ms']
+    assert tracemalloc.is_tracing() == was_tracing
+
+
+def test_backtest_and_optimize_responses_carry_timings(monkeypatch):
+    monkeypatch.setattr(main, 'mt5', SimulatedMT5(start_time=datetime(2024, 3, 5, 12)))
+    monkeypatch.setattr(main, 'backtest_cache', None)
+    monkeypatch.setattr(main, 'bar_cache', None)
+    client = TestClient(main.app)
+    window = {'symbol': 'EURUSD', 'timeframe': 'H1',
+              'start_date': '2024-01-01T00:00:00', 'end_date': '2024-02-01T00:00:00'}
+
+    client.post('/api/v1/connect', json={'login': 1, 'password': '', 'server': 'Simulator'})
+    try:
+        backtest = client.post('/api/v1/backtest', json={
+            **window, 'strategy_name': 'rsi', 'strategy_params': {'rsi_period': 14}})
+        optimize = client.post('/api/v1/optimize?trace_memory=true', json={
+            **window, 'strategy_name': 'simple_ma_crossover',
+            'param_ranges': {'fast_period': [5, 10], 'slow_period': [20, 30]}})
+    finally:
+        client.post('/api/v1/disconnect')
+
+    assert backtest.status_code == 200, backtest.text
+    body = backtest.json()
+    phases = {p['phase']: p for p in body['timings']['phases']}
+    assert list(phases) == ['fetch', 'dataframe', 'signals:rsi', 'simulation', 'statistics', 'serialization']
+    assert phases['fetch']['bars'] == phases['simulation']['bars'] > 0
+    assert phases['simulation']['allocated_bytes'] is None
+    assert 'total_trades' in body
+
+    assert optimize.status_code == 200, optimize.text
+    timings = optimize.json()['timings']
+    phases = {p['phase']: p for p in timings['phases']}
+    assert timings['memory_traced'] is True
+    assert phases['signals:simple_ma_crossover']['calls'] == 4
+    assert phases['simulation']['calls'] == 4
+    assert phases['dataframe']['allocated_bytes'] > 0
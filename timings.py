@@ -0,0 +1,149 @@
+"""
+Per-phase wall/CPU timing embedded in backtest and optimize responses.
+
+A :class:`PhaseTimer` accumulates named phases (fetch, dataframe build,
+signals, simulation, statistics, serialization). Phases with the same name
+add up, so the optimizer reports totals across all of its evaluations. CPU
+time is ``time.thread_time()``, because each request's work runs on one
+thread.
+
+Allocation tracking uses ``tracemalloc`` and slows pandas/numpy code by
+several times, so it is opt-in per request. When it is off,
+``allocated_bytes`` is null. When it is on, each phase reports the peak
+memory it allocated above its starting point. The tracing peak is global,
+so concurrent traced requests can inflate each other's figures.
+"""
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+
+def _acquire_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+class PhaseTimer:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self._current = None
+        self._closed = False
+        if trace_memory:
+            _acquire_tracing()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+
+    def start(self, name: str, bars: Optional[int] = None):
+        if self._current is not None:
+            self.stop()
+        traced = None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced = tracemalloc.get_traced_memory()[0]
+        self._current = (name, bars, traced, time.perf_counter(), time.thread_time())
+
+    def stop(self, bars: Optional[int] = None):
+        """End the current phase; ``bars`` overrides the count given to :meth:`start`."""
+        if self._current is None:
+            return
+        wall, cpu = time.perf_counter(), time.thread_time()
+        name, start_bars, traced, wall_start, cpu_start = self._current
+        bars = start_bars if bars is None else bars
+        self._current = None
+        phase = self.phases.setdefault(name, {
+            'phase': name, 'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0, 'bars': None, 'allocated_bytes': None
+        })
+        phase['calls'] += 1
+        phase['wall_ms'] += (wall - wall_start) * 1000
+        phase['cpu_ms'] += (cpu - cpu_start) * 1000
+        if bars is not None:
+            phase['bars'] = (phase['bars'] or 0) + bars
+        if traced is not None:
+            allocated = max(tracemalloc.get_traced_memory()[1] - traced, 0)
+            phase['allocated_bytes'] = (phase['allocated_bytes'] or 0) + allocated
+
+    @contextmanager
+    def phase(self, name: str, bars: Optional[int] = None):
+        self.start(name, bars)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def close(self):
+        self.stop()
+        if self.trace_memory and not self._closed:
+            _release_tracing()
+        self._closed = True
+
+    def report(self) -> Dict[str, Any]:
+        self.close()
+        phases = []
+        for phase in self.phases.values():
+            phases.append({**phase, 'wall_ms': round(phase['wall_ms'], 3), 'cpu_ms': round(phase['cpu_ms'], 3)})
+        return {
+            'wall_ms': round((time.perf_counter() - self._wall_start) * 1000, 3),
+            'cpu_ms': round((time.thread_time() - self._cpu_start) * 1000, 3),
+            'memory_traced': self.trace_memory,
+            'phases': phases,
+        }
+
+
+class _NullTimer:
+    """Stand-in used when callers do not ask for timings."""
+
+    def start(self, name: str, bars: Optional[int] = None):
+        pass
+
+    def stop(self, bars: Optional[int] = None):
+        pass
+
+    @contextmanager
+    def phase(self, name: str, bars: Optional[int] = None):
+        yield
+
+
+NULL_TIMER = _NullTimer()
+
+
+def timed_json_response(content: Dict[str, Any], timer: PhaseTimer, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serialize ``content`` inside a ``serialization`` phase, then add a top-level
+    ``timings`` key.
+
+    ``content`` is left unmodified so it can still be cached without timings.
+    The timings are spliced into the encoded object rather than encoding the
+    payload twice.
+    """
+    with timer.phase('serialization'):
+        body = json.dumps(jsonable_encoder(content), allow_nan=False, separators=(',', ':')).encode()
+    timings = json.dumps(timer.report(), separators=(',', ':')).encode()
+    if body == b'{}':
+        body = b'{"timings":' + timings + b'}'
+    else:
+        body = body[:-1] + b',"timings":' + timings + b'}'
+    return Response(content=body, media_type='application/json', headers=headers)